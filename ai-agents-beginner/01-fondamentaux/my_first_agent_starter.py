@@ -30,6 +30,7 @@ INSTRUCTIONS:
 import os
 import json
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional
@@ -469,6 +470,9 @@ class ToolUseAgent(BaseAgent):
         self.pattern_name = "Tool Use Agent"
         self.tool_registry = ToolRegistry()
         self.available_tools = self.tool_registry.tools
+        self.tool_timeout = 10.0  # secondes par appel d'outil
+        # Les outils sont synchrones : ils tournent dans ce pool pour ne pas bloquer la boucle asyncio
+        self.tool_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="outil")
         print(f"🛠️ Pattern initialisé: {self.pattern_name}")
         print(f"🔧 Outils: {', '.join(self.tool_registry.list_tools())}")
     
@@ -505,15 +509,26 @@ class ToolUseAgent(BaseAgent):
             else:
                 result = tool_function(params)
             
-            # Enregistrer l'utilisation
-            if tool_name not in self.state.tools_used:
-                self.state.tools_used.append(tool_name)
-            
             result["tool_used"] = tool_name
             return result
         except Exception as e:
             return {"error": f"Erreur {tool_name}: {e}", "success": False}
     
+    async def _aexecute_tool(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Exécuter un outil sans bloquer la boucle asyncio, avec un délai maximum"""
+        loop = asyncio.get_running_loop()
+        try:
+            return await asyncio.wait_for(
+                loop.run_in_executor(self.tool_pool, self._execute_tool, tool_name, params),
+                self.tool_timeout
+            )
+        except asyncio.TimeoutError:
+            return {"error": f"Outil '{tool_name}': délai de {self.tool_timeout}s dépassé", "success": False}
+    
+    async def _aexecute_tools(self, calls: List[tuple]) -> List[Dict[str, Any]]:
+        """Exécuter des outils indépendants en parallèle, résultats dans l'ordre des appels"""
+        return list(await asyncio.gather(*(self._aexecute_tool(tool, params) for tool, params in calls)))
+    
     async def handle_tool_request(self, user_input: str) -> Dict[str, Any]:
         """Traiter une requête avec outils"""
         print(f"\n🎯 PATTERN: {self.pattern_name} - '{user_input}'")
@@ -525,12 +540,17 @@ class ToolUseAgent(BaseAgent):
         needed_tools = self._detect_tool_need(user_input)
         print(f"🔧 Outils détectés: {needed_tools}")
         
-        # Exécuter les outils
-        tool_results = []
-        for tool in needed_tools:
-            params = self._extract_tool_params(user_input, tool)
-            result = self._execute_tool(tool, params)
-            tool_results.append({"tool": tool, "result": result})
+        # Exécuter les outils (indépendants, donc en parallèle)
+        calls = [(tool, self._extract_tool_params(user_input, tool)) for tool in needed_tools]
+        tool_results = [
+            {"tool": tool, "result": result}
+            for tool, result in zip(needed_tools, await self._aexecute_tools(calls))
+        ]
+        
+        # Enregistrer l'utilisation ici, sur la boucle, et non dans les threads du pool
+        for item in tool_results:
+            if "tool_used" in item["result"] and item["tool"] not in self.state.tools_used:
+                self.state.tools_used.append(item["tool"])
         
         # Synthèse avec LLM
         synthesis_prompt = self._build_synthesis_prompt(user_input, tool_results)
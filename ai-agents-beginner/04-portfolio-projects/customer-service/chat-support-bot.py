@@ -10,6 +10,8 @@ Technologies: LangChain + FastAPI + Vector Knowledge Base
 import os
 import json
 import time
+import random
+import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, asdict
@@ -38,6 +40,67 @@ class TicketStatus(Enum):
     RESOLVED = "resolved"
     ESCALATED = "escalated"
 
+class LLMGuard:
+    """
+    Retries avec backoff jitté et coupe-circuit autour des appels LLM
+    Après failure_threshold échecs consécutifs, les appels sont refusés
+    pendant reset_timeout secondes; l'appel suivant sert d'essai
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.counters = {"calls": 0, "retries": 0, "failures": 0, "short_circuited": 0}
+        self._lock = threading.Lock()
+    
+    def call(self, fn, *args, **kwargs):
+        """Appeler fn avec retries; lève l'erreur finale, ou RuntimeError si le circuit est ouvert"""
+        with self._lock:
+            if self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout:
+                self.counters["short_circuited"] += 1
+                raise RuntimeError("Circuit LLM ouvert: appel refusé")
+            self.counters["calls"] += 1
+        
+        for attempt in range(self.max_attempts):
+            try:
+                result = fn(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    self.counters["failures"] += 1
+                    self.consecutive_failures += 1
+                    # Un essai raté rouvre le circuit tout de suite
+                    if self.opened_at is not None or self.consecutive_failures >= self.failure_threshold:
+                        self.opened_at = time.monotonic()
+                    give_up = self.opened_at is not None or attempt + 1 >= self.max_attempts
+                    if not give_up:
+                        self.counters["retries"] += 1
+                if give_up:
+                    raise
+                # Full jitter: les retries de plusieurs clients ne se synchronisent pas
+                time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+                continue
+            with self._lock:
+                self.consecutive_failures = 0
+                self.opened_at = None
+            return result
+    
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs et état du circuit"""
+        with self._lock:
+            return {**self.counters, "state": "open" if self.opened_at is not None else "closed"}
+
 @dataclass
 class SupportTicket:
     id: str
@@ -59,12 +122,15 @@ class CustomerServiceBot:
     Résout automatiquement 70% des tickets courants
     """
     
-    def __init__(self, knowledge_base_path: str = "./knowledge_base"):
+    def __init__(self, knowledge_base_path: str = "./knowledge_base", llm_guard: Optional[LLMGuard] = None):
         self.llm = ChatOpenAI(
             model="gpt-4",
             temperature=0.3,
             max_tokens=500
         )
+        # Tous les appels LLM passent par le même garde: retries avec backoff
+        # jitté, et coupure rapide quand l'API est en panne
+        self.llm_guard = llm_guard or LLMGuard()
         self.embeddings = OpenAIEmbeddings()
         self.knowledge_base_path = knowledge_base_path
         self.tickets = []
@@ -209,7 +275,7 @@ class CustomerServiceBot:
         """
         
         try:
-            response = self.llm.invoke([{"role": "user", "content": classification_prompt}])
+            response = self.llm_guard.call(self.llm.invoke, [{"role": "user", "content": classification_prompt}])
             classification = json.loads(response.content)
             return classification
         
@@ -254,7 +320,7 @@ class CustomerServiceBot:
             """
             
             # Utiliser le système RAG pour la réponse
-            result = self.qa_chain.invoke({
+            result = self.llm_guard.call(self.qa_chain.invoke, {
                 "question": resolution_prompt,
                 "chat_history": []
             })
@@ -343,7 +409,7 @@ class CustomerServiceBot:
         """
         
         try:
-            result = self.llm.invoke([{"role": "user", "content": evaluation_prompt}])
+            result = self.llm_guard.call(self.llm.invoke, [{"role": "user", "content": evaluation_prompt}])
             score = float(result.content.strip())
             return max(0.0, min(1.0, score))  # Clamper entre 0 et 1
         except:
@@ -424,7 +490,8 @@ class CustomerServiceBot:
             "auto_resolution_rate": auto_resolution_rate,
             "escalation_rate": escalation_rate,
             "auto_resolution_percentage": f"{auto_resolution_rate*100:.1f}%",
-            "average_resolution_time_formatted": f"{self.metrics['average_resolution_time']:.1f}s"
+            "average_resolution_time_formatted": f"{self.metrics['average_resolution_time']:.1f}s",
+            "llm_guard": self.llm_guard.stats()
         }
     
     def simulate_satisfaction_feedback(self, ticket_id: str, score: float):
@@ -0,0 +1,6 @@
+"""
+Benchmarks for AI Agents Ydays Lab shared components
+
+Run from the ai-agents-beginner directory, e.g.:
+    python -m benchmarks.bench_ann --size 50000
+"""
\ No newline at end of file
@@ -0,0 +1,72 @@
+"""
+Recall vs latency of the IVF index against exact VectorMemory search
+    
+    python -m benchmarks.bench_ann --size 50000 --lists 256
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from shared.ann import IVFIndex
+from shared.memory import VectorMemory
+
+from .common import measure, synthetic_corpus, synthetic_queries
+
+def run(size: int, n_lists: int, probes: list, n_queries: int, k: int) -> dict:
+    corpus = synthetic_corpus(size)
+    queries = synthetic_queries(corpus, n_queries)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = VectorMemory(
+            os.path.join(tmp, "memory.json"),
+            ann=IVFIndex(n_lists=n_lists, min_train_size=size + 1)
+        )
+        for i, doc in enumerate(corpus):
+            memory.add(f"doc{i}", doc)
+        memory.rebuild_index()
+        
+        truth = [{key for key, _ in hits} for hits in memory.search_batch(queries, k, exact=True)]
+        exact = measure(lambda: [memory.search_batch([q], k, exact=True) for q in queries], 3)
+        
+        rows = [{"mode": "exact", "n_probe": None, "recall": 1.0, "ms_per_query": exact["p50_ms"] / n_queries}]
+        for n_probe in probes:
+            memory.ann.n_probe = n_probe
+            found = memory.search_batch(queries, k)
+            recall = sum(
+                len(expected & {key for key, _ in hits}) / max(len(expected), 1)
+                for expected, hits in zip(truth, found)
+            ) / n_queries
+            timing = measure(lambda: [memory.search_batch([q], k) for q in queries], 3)
+            rows.append({
+                "mode": "ivf",
+                "n_probe": n_probe,
+                "recall": recall,
+                "ms_per_query": timing["p50_ms"] / n_queries
+            })
+        memory.close()
+    
+    return {"size": size, "n_lists": n_lists, "k": k, "results": rows}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--lists", type=int, default=256)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    report = run(args.size, args.lists, args.probes, args.queries, args.k)
+    print(f"{'mode':<6} {'n_probe':>7} {'recall@' + str(args.k):>10} {'ms/query':>10}")
+    for row in report["results"]:
+        print(f"{row['mode']:<6} {str(row['n_probe'] or '-'):>7} {row['recall']:>10.3f} {row['ms_per_query']:>10.3f}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,149 @@
+"""
+Multi-threaded stress check and throughput of ConcurrentSimpleMemory
+    
+    python -m benchmarks.bench_concurrency --threads 1 2 4 8 --ops 20000
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+from shared.memory import ConcurrentSimpleMemory, SimpleMemory
+
+from .common import percentile, synthetic_corpus
+
+class GloballyLockedMemory:
+    """Baseline: a SimpleMemory behind one lock"""
+    
+    def __init__(self, max_size: int):
+        self._memory = SimpleMemory(max_size)
+        self._lock = threading.Lock()
+    
+    def add(self, key, value, metadata=None):
+        with self._lock:
+            self._memory.add(key, value, metadata)
+    
+    def get(self, key):
+        with self._lock:
+            return self._memory.get(key)
+    
+    def delete(self, key):
+        with self._lock:
+            return self._memory.delete(key)
+    
+    def search(self, query, limit=10):
+        with self._lock:
+            return self._memory.search(query, limit)
+
+def _worker(
+    memory, docs, ops: int, key_space: int, seed: int, errors: list, search_ratio: float, latencies: list
+) -> None:
+    rng = random.Random(seed)
+    try:
+        for _ in range(ops):
+            key = f"k{rng.randrange(key_space)}"
+            roll = rng.random()
+            if roll < search_ratio:
+                memory.search(rng.choice(docs).split()[0], 5)
+            elif roll < 0.55:
+                start = time.perf_counter()
+                memory.get(key)
+                latencies.append((time.perf_counter() - start) * 1000)
+            elif roll < 0.95:
+                memory.add(key, rng.choice(docs), {"worker": seed})
+            else:
+                memory.delete(key)
+    except Exception as e:  # Reported by the caller
+        errors.append(repr(e))
+
+def _run_threads(memory, docs, n_threads: int, ops: int, key_space: int, search_ratio: float) -> tuple:
+    errors: list = []
+    latencies: list = []
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(memory, docs, ops, key_space, seed, errors, search_ratio, latencies)
+        )
+        for seed in range(n_threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, errors, latencies
+
+def stress(n_threads: int, ops: int, max_size: int) -> dict:
+    """Hammer one instance from many threads and check that its structures still agree"""
+    docs = synthetic_corpus(2000)
+    memory = ConcurrentSimpleMemory(max_size=max_size, stripes=8)
+    _, errors, _ = _run_threads(memory, docs, n_threads, ops, key_space=max_size * 4, search_ratio=0.05)
+    
+    problems = list(errors)
+    for i, shard in enumerate(memory._shards):
+        keys = set(shard._cache)
+        if len(keys) > shard.max_size:
+            problems.append(f"shard {i} holds {len(keys)} > {shard.max_size} entries")
+        if keys != set(shard._index._doc_len):
+            problems.append(f"shard {i} keyword index out of sync")
+        if keys != set(shard._meta_index._fields):
+            problems.append(f"shard {i} metadata index out of sync")
+    if memory.size() > memory.stripes * memory._shards[0].max_size:
+        problems.append(f"size {memory.size()} exceeds capacity")
+    return {"threads": n_threads, "ops_per_thread": ops, "size": memory.size(), "problems": problems}
+
+def throughput(thread_counts: list, ops: int, max_size: int, search_ratio: float) -> list:
+    """Operations per second for a globally locked SimpleMemory vs the striped variant"""
+    docs = synthetic_corpus(2000)
+    rows = []
+    for n_threads in thread_counts:
+        for name, factory in (
+            ("global-lock", lambda: GloballyLockedMemory(max_size)),
+            ("striped", lambda: ConcurrentSimpleMemory(max_size=max_size))
+        ):
+            memory = factory()
+            elapsed, errors, latencies = _run_threads(memory, docs, n_threads, ops, max_size * 2, search_ratio)
+            rows.append({
+                "memory": name,
+                "threads": n_threads,
+                "ops_per_sec": n_threads * ops / elapsed,
+                "get_p50_ms": percentile(latencies, 50),
+                "get_p99_ms": percentile(latencies, 99),
+                "errors": len(errors)
+            })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--ops", type=int, default=20000)
+    parser.add_argument("--max-size", type=int, default=1000)
+    parser.add_argument("--search-ratio", type=float, default=0.02, help="Share of operations that search")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    check = stress(max(args.threads), args.ops, args.max_size)
+    print(f"stress: {check['threads']} threads x {check['ops_per_thread']} ops, "
+          f"{len(check['problems'])} problems")
+    for problem in check["problems"]:
+        print(f"  {problem}")
+    
+    rows = throughput(args.threads, args.ops, args.max_size, args.search_ratio)
+    print(f"{'memory':<12} {'threads':>7} {'ops/s':>10} {'get p50 ms':>11} {'get p99 ms':>11}")
+    for row in rows:
+        print(
+            f"{row['memory']:<12} {row['threads']:>7} {row['ops_per_sec']:>10.0f}"
+            f" {row['get_p50_ms']:>11.4f} {row['get_p99_ms']:>11.4f}"
+        )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"stress": check, "throughput": rows}, f, indent=2)
+    if check["problems"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
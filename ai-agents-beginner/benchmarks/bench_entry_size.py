@@ -0,0 +1,83 @@
+"""
+Python heap bytes per entry held by SimpleMemory and a reopened VectorMemory
+(vectors are memory-mapped and not counted)
+    
+    python -m benchmarks.bench_entry_size --size 100000
+"""
+
+import argparse
+import gc
+import json
+import os
+import tempfile
+import tracemalloc
+
+from shared.memory import SimpleMemory, VectorMemory
+
+from .common import synthetic_corpus
+
+def _allocated(build) -> tuple:
+    """Bytes still allocated after ``build()`` returns, and its result"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+def run(size: int, with_metadata: bool) -> dict:
+    docs = synthetic_corpus(size)
+    keys = [f"doc{i}" for i in range(size)]
+    values = list(docs)  # Shared by every layout so only the bookkeeping is measured
+    metadata = [{"source": "bench"} if with_metadata else None for _ in range(size)]
+    rows = []
+    
+    def simple():
+        memory = SimpleMemory(max_size=size)
+        for key, value, meta in zip(keys, values, metadata):
+            memory.add(key, value, meta)
+        return memory
+    
+    nbytes, memory = _allocated(simple)
+    rows.append({"memory": "SimpleMemory", "bytes_per_entry": nbytes / size})
+    del memory
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = VectorMemory(os.path.join(tmp, "memory.json"))
+        memory.add_many(zip(keys, values, metadata))
+        memory.compact()
+        memory.close()
+        del memory
+        
+        def reopen():
+            # Reopening maps the vectors, so this counts entries and bookkeeping only
+            reopened = VectorMemory(os.path.join(tmp, "memory.json"))
+            reopened.close()
+            return reopened
+        
+        nbytes, memory = _allocated(reopen)
+        rows.append({"memory": "VectorMemory", "bytes_per_entry": nbytes / size})
+        del memory
+    
+    return {"size": size, "metadata": with_metadata, "results": rows}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    reports = [run(args.size, with_metadata) for with_metadata in (False, True)]
+    print(f"{'memory':<14} {'metadata':>8} {'bytes/entry':>12}")
+    for report in reports:
+        for row in report["results"]:
+            print(f"{row['memory']:<14} {str(report['metadata']):>8} {row['bytes_per_entry']:>12.1f}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
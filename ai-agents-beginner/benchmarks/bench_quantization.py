@@ -0,0 +1,82 @@
+"""
+Memory footprint and recall of int8 VectorMemory storage against float32
+    
+    python -m benchmarks.bench_quantization --size 50000 --rerank 0 50 100
+"""
+
+import argparse
+import json
+import os
+import tempfile
+
+from shared.memory import VectorMemory
+
+from .common import measure, synthetic_corpus, synthetic_queries
+
+def _keys(hits) -> set:
+    return {key for key, _ in hits}
+
+def run(size: int, reranks: list, n_queries: int, k: int) -> dict:
+    corpus = synthetic_corpus(size)
+    queries = synthetic_queries(corpus, n_queries)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = VectorMemory(os.path.join(tmp, "float.json"))
+        quantized = VectorMemory(os.path.join(tmp, "int8.json"), quantize="int8")
+        for i, doc in enumerate(corpus):
+            reference.add(f"doc{i}", doc)
+            quantized.add(f"doc{i}", doc)
+        
+        truth = [_keys(hits) for hits in reference.search_batch(queries, k)]
+        timing = measure(lambda: [reference.search_batch([q], k) for q in queries], 3)
+        rows = [{
+            "storage": "float32",
+            "rerank": 0,
+            "matrix_bytes": reference._matrix.nbytes,
+            "recall": 1.0,
+            "ms_per_query": timing["p50_ms"] / n_queries
+        }]
+        
+        for rerank in reranks:
+            quantized.rerank = rerank
+            found = quantized.search_batch(queries, k)
+            recall = sum(
+                len(expected & _keys(hits)) / max(len(expected), 1)
+                for expected, hits in zip(truth, found)
+            ) / n_queries
+            timing = measure(lambda: [quantized.search_batch([q], k) for q in queries], 3)
+            rows.append({
+                "storage": "int8",
+                "rerank": rerank,
+                "matrix_bytes": quantized._matrix.nbytes,
+                "recall": recall,
+                "ms_per_query": timing["p50_ms"] / n_queries
+            })
+        reference.close()
+        quantized.close()
+    
+    return {"size": size, "k": k, "results": rows}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--rerank", type=int, nargs="+", default=[0, 20, 50, 100])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    report = run(args.size, args.rerank, args.queries, args.k)
+    print(f"{'storage':>8} {'rerank':>7} {'MB':>8} {'recall@' + str(args.k):>10} {'ms/query':>9}")
+    for row in report["results"]:
+        print(
+            f"{row['storage']:>8} {row['rerank']:>7} {row['matrix_bytes'] / 2**20:>8.1f}"
+            f" {row['recall']:>10.3f} {row['ms_per_query']:>9.2f}"
+        )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Keyword search latency of SimpleMemory on natural-language text, against a substring scan
+    
+    python -m benchmarks.bench_text_search --size 100000
+"""
+
+import argparse
+import json
+import random
+
+from shared.memory import SimpleMemory
+
+from .common import measure, synthetic_corpus
+
+# Function words appear in most documents, like in real conversation logs
+STOPWORDS = ["the", "is", "a", "what", "of", "to", "and", "in", "it", "for", "on", "with", "user", "that"]
+
+QUERIES = {
+    "rare terms": None,  # Filled with corpus words at run time
+    "natural language": "what is the weather",
+    "stopword only": "the",
+    "stopwords only": "what is the"
+}
+
+def natural_corpus(size: int, seed: int = 0):
+    """Topic documents with Zipf-distributed function words mixed in"""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(STOPWORDS))]
+    docs = []
+    for doc in synthetic_corpus(size, seed=seed):
+        words = doc.split() + rng.choices(STOPWORDS, weights, k=8)
+        rng.shuffle(words)
+        docs.append(" ".join(words))
+    for i in range(0, size, max(1, size // 50)):
+        docs[i] += " weather report"
+    return docs
+
+def substring_search(memory: SimpleMemory, query: str, limit: int = 10):
+    """The pre-index behaviour: scan every value for the raw query"""
+    query = query.lower()
+    hits = []
+    for key, entry in memory._cache.items():
+        if query in key.lower() or query in str(entry.value).lower():
+            hits.append((key, entry.value))
+            if len(hits) >= limit:
+                break
+    return hits
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    
+    docs = natural_corpus(args.size)
+    memory = SimpleMemory(max_size=args.size)
+    for i, doc in enumerate(docs):
+        memory.add(f"m{i}", doc)
+    
+    topic_words = [word for word in docs[7].split() if word.startswith("t") and word not in STOPWORDS]
+    queries = dict(QUERIES, **{"rare terms": " ".join(topic_words[:3])})
+    results = {}
+    print(f"{'query':<18} {'index p50 ms':>13} {'index p99 ms':>13} {'scan p50 ms':>12}")
+    for label, query in queries.items():
+        index = measure(lambda: memory.search(query, 10), args.repeat)
+        scan = measure(lambda: substring_search(memory, query, 10), max(1, args.repeat // 4))
+        results[label] = {"query": query, "index": index, "scan": scan}
+        print(f"{label:<18} {index['p50_ms']:>13.3f} {index['p99_ms']:>13.3f} {scan['p50_ms']:>12.3f}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"size": args.size, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Benchmark helpers - synthetic corpora and latency statistics
+"""
+
+import random
+import time
+from typing import Callable, Dict, List, Sequence
+
+def synthetic_corpus(size: int, n_topics: int = 200, words_per_doc: int = 12, seed: int = 0) -> List[str]:
+    """Generate documents that cluster around topics, like real agent memories"""
+    rng = random.Random(seed)
+    common = [f"mot{i}" for i in range(500)]
+    topics = [[f"t{t}w{i}" for i in range(40)] for t in range(n_topics)]
+    
+    docs = []
+    for _ in range(size):
+        topic = rng.choice(topics)
+        n_topic = words_per_doc * 2 // 3
+        words = rng.choices(topic, k=n_topic) + rng.choices(common, k=words_per_doc - n_topic)
+        rng.shuffle(words)
+        docs.append(" ".join(words))
+    return docs
+
+def synthetic_queries(corpus: Sequence[str], count: int, seed: int = 1) -> List[str]:
+    """Queries made of a few words from random corpus documents"""
+    rng = random.Random(seed)
+    return [" ".join(rng.sample(rng.choice(corpus).split(), 3)) for _ in range(count)]
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def measure(fn: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Run fn repeatedly and summarize latency in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "mean_ms": sum(samples) / len(samples),
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99)
+    }
\ No newline at end of file
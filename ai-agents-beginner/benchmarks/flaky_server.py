@@ -0,0 +1,152 @@
+"""
+Local flaky HTTP stand-in for a downstream service, and a retry/circuit-breaker check against it
+    
+    python -m benchmarks.flaky_server --calls 300 --failure-rate 0.2 --outage 0.5
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+from shared.resilience import Resilience, RetryPolicy
+from shared.tools import BaseTool, ToolRegistry
+
+from .common import percentile
+
+class FlakyServer:
+    """
+    HTTP server on localhost that fails a share of its requests.
+    
+    Each request sleeps ``latency`` seconds, then answers 503 with
+    probability ``failure_rate`` and 200 otherwise. ``outage(seconds)``
+    makes every request fail for a while, like a dependency going down.
+    Requests received are counted, so callers can see the load they cause.
+    """
+    
+    def __init__(self, failure_rate: float = 0.0, latency: float = 0.0, seed: int = 0):
+        self.failure_rate = failure_rate
+        self.latency = latency
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status = server._respond()
+                body = json.dumps({"ok": status == 200}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}/"
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+    
+    def __enter__(self) -> "FlakyServer":
+        self._thread.start()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+    
+    def outage(self, seconds: float) -> None:
+        """Fail every request for the next ``seconds``"""
+        with self._lock:
+            self._down_until = time.monotonic() + seconds
+    
+    def _respond(self) -> int:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests += 1
+            if time.monotonic() < self._down_until or self._rng.random() < self.failure_rate:
+                return 503
+        return 200
+
+class HttpGetTool(BaseTool):
+    """Idempotent GET against a fixed URL, reporting HTTP errors as error results"""
+    
+    retryable = True
+    
+    def __init__(self, url: str, timeout: float = 2.0):
+        super().__init__("http_get", "Fetch a JSON document")
+        self.url = url
+        self.timeout = timeout
+    
+    def execute(self) -> Dict[str, Any]:
+        try:
+            with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+                return {"data": json.loads(response.read()), "success": True}
+        except (urllib.error.URLError, OSError) as e:
+            return {"error": str(e), "success": False}
+    
+    def get_parameters(self) -> Dict[str, Any]:
+        return {"type": "object", "properties": {}}
+
+def run_phase(
+    registry: ToolRegistry, server: FlakyServer, calls: int, interval: float, outage: Optional[float]
+) -> Dict[str, Any]:
+    """Make ``calls`` tool calls ``interval`` seconds apart, starting an outage halfway through if asked"""
+    start_requests = server.requests
+    latencies, ok = [], 0
+    start = time.perf_counter()
+    for i in range(calls):
+        if outage and i == calls // 2:
+            server.outage(outage)
+        t0 = time.perf_counter()
+        result = registry.execute_tool("http_get")
+        latencies.append((time.perf_counter() - t0) * 1000)
+        ok += bool(result.get("success"))
+        time.sleep(interval)
+    return {
+        "success_rate": ok / calls,
+        "server_requests": server.requests - start_requests,
+        "elapsed_s": time.perf_counter() - start,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99)
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--failure-rate", type=float, default=0.2)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--interval", type=float, default=0.005, help="Seconds between calls")
+    parser.add_argument("--outage", type=float, default=0.5, help="Seconds of total outage starting mid-run (0 = none)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    report = {}
+    for label, resilience in (
+        ("plain", None),
+        ("resilient", Resilience(
+            RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.2, rng=random.Random(args.seed)),
+            failure_threshold=5,
+            reset_timeout=0.25
+        ))
+    ):
+        with FlakyServer(args.failure_rate, args.latency, args.seed) as server:
+            registry = ToolRegistry(use_cache=False, resilience=resilience)
+            registry.register(HttpGetTool(server.url))
+            report[label] = run_phase(registry, server, args.calls, args.interval, args.outage or None)
+            report[label]["resilience"] = registry.resilience_stats().get("http_get", {})
+            registry.close()
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
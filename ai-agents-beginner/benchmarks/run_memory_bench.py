@@ -0,0 +1,256 @@
+"""
+Latency, throughput, RSS and on-disk size of every BaseMemory backend
+
+Each (backend, size) pair runs in a fresh interpreter so RSS is not skewed by
+earlier runs. Results are written as JSON named after the current commit,
+and ``--compare`` diffs two result files to spot regressions:
+    
+    python -m benchmarks.run_memory_bench --sizes 1000 10000 100000
+    python -m benchmarks.run_memory_bench --sizes 1000000 --backends vector vector-int8 sqlite
+    python -m benchmarks.run_memory_bench --compare benchmarks/results/a1b2c3d.json benchmarks/results/e4f5a6b.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from shared.memory import ConcurrentSimpleMemory, SimpleMemory, SQLiteMemory, TieredMemory, VectorMemory
+
+from .common import percentile, synthetic_corpus, synthetic_queries
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (factory(size, path), persistent?, on-disk file basename)
+BACKENDS: Dict[str, tuple] = {
+    "simple": (lambda size, path: SimpleMemory(max_size=size), False, None),
+    "concurrent": (lambda size, path: ConcurrentSimpleMemory(max_size=size), False, None),
+    "vector": (lambda size, path: VectorMemory(path), True, "memory.json"),
+    "vector-int8": (lambda size, path: VectorMemory(path, quantize="int8"), True, "memory.json"),
+    "sqlite": (lambda size, path: SQLiteMemory(path), True, "memory.db"),
+    "tiered": (
+        lambda size, path: TieredMemory(hot_size=max(size // 10, 1), persist_path=path), True, "memory.json"
+    )
+}
+
+# Metrics where a larger value is better; everything else is a cost
+HIGHER_IS_BETTER = {"load_per_sec", "add_per_sec", "get_per_sec", "search_per_sec"}
+
+def rss_mb() -> float:
+    """Current resident set size, falling back to the peak where /proc is unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is bytes on macOS, KiB elsewhere)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+def disk_mb(directory: str) -> float:
+    """Total size of the files a backend left in its directory"""
+    total = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass  # Removed by a background compaction
+    return total / 2**20
+
+def _timed(fn: Callable[[], object], calls: int) -> Dict[str, float]:
+    """Per-call latency percentiles and overall throughput of ``calls`` invocations"""
+    samples = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - start
+    return {
+        "p50_ms": percentile(samples, 50),
+        "p99_ms": percentile(samples, 99),
+        "per_sec": calls / elapsed if elapsed else 0.0
+    }
+
+def run_one(backend: str, size: int, ops: int, n_queries: int, seed: int = 0) -> dict:
+    """Benchmark one backend at one corpus size in the current process"""
+    factory, persistent, filename = BACKENDS[backend]
+    rng = random.Random(seed)
+    corpus = synthetic_corpus(size + ops, seed=seed)
+    queries = synthetic_queries(corpus[:size], n_queries, seed=seed + 1)
+    items = [(f"doc{i}", doc, {"source": "bench", "n": i % 10}) for i, doc in enumerate(corpus[:size])]
+    extra = [(f"new{i}", doc, {"source": "bench"}) for i, doc in enumerate(corpus[size:])]
+    result = {"backend": backend, "size": size, "rss_base_mb": rss_mb()}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, filename) if filename else None
+        memory = factory(size + ops, path)
+        
+        start = time.perf_counter()
+        for chunk in range(0, size, 10000):
+            memory.add_many(items[chunk:chunk + 10000])
+        elapsed = time.perf_counter() - start
+        result["load_s"] = elapsed
+        result["load_per_sec"] = size / elapsed if elapsed else 0.0
+        
+        added = iter(extra)
+        stats = _timed(lambda: memory.add(*next(added)), ops)
+        result.update({"add_p50_ms": stats["p50_ms"], "add_p99_ms": stats["p99_ms"], "add_per_sec": stats["per_sec"]})
+        
+        keys = [f"doc{rng.randrange(size)}" for _ in range(ops)]
+        lookups = iter(keys)
+        stats = _timed(lambda: memory.get(next(lookups)), ops)
+        result.update({"get_p50_ms": stats["p50_ms"], "get_p99_ms": stats["p99_ms"], "get_per_sec": stats["per_sec"]})
+        
+        searches = iter(queries)
+        stats = _timed(lambda: memory.search(next(searches), 10), n_queries)
+        result.update({
+            "search_p50_ms": stats["p50_ms"],
+            "search_p99_ms": stats["p99_ms"],
+            "search_per_sec": stats["per_sec"]
+        })
+        result["rss_mb"] = rss_mb() - result["rss_base_mb"]
+        
+        if persistent:
+            # Persist: fold the log into a snapshot (or flush queued rows) and close
+            start = time.perf_counter()
+            memory.close()
+            if isinstance(memory, TieredMemory):
+                memory = memory.cold
+            if isinstance(memory, VectorMemory):
+                memory.compact()
+                memory.close()
+            result["persist_s"] = time.perf_counter() - start
+            result["disk_mb"] = disk_mb(tmp)
+            del memory
+            
+            start = time.perf_counter()
+            memory = factory(size + ops, path)
+            result["reopen_s"] = time.perf_counter() - start
+            missing = sum(memory.get(key) is None for key in keys[:100])
+            if missing:
+                result["error"] = f"{missing}/100 keys missing after reopen"
+            memory.close()
+        result["peak_rss_mb"] = peak_rss_mb()
+    
+    return result
+
+def _run_isolated(backend: str, size: int, ops: int, n_queries: int) -> dict:
+    """Run ``run_one`` in a child interpreter and parse its JSON line"""
+    command = [
+        sys.executable, "-m", "benchmarks.run_memory_bench", "--worker",
+        "--backends", backend, "--sizes", str(size), "--ops", str(ops), "--queries", str(n_queries)
+    ]
+    proc = subprocess.run(command, cwd=os.path.dirname(BENCH_DIR), capture_output=True, text=True)
+    if proc.returncode != 0:
+        return {"backend": backend, "size": size, "error": proc.stderr.strip().splitlines()[-1:]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def environment() -> dict:
+    """Enough context to tell whether two result files are comparable"""
+    return {
+        "commit": _git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+def compare(base_path: str, head_path: str, threshold: float) -> List[dict]:
+    """Metrics that got worse by more than ``threshold`` (relative) between two result files"""
+    with open(base_path) as f:
+        base = {(r["backend"], r["size"]): r for r in json.load(f)["results"]}
+    with open(head_path) as f:
+        head = {(r["backend"], r["size"]): r for r in json.load(f)["results"]}
+    
+    regressions = []
+    for run, after in head.items():
+        before = base.get(run)
+        if before is None:
+            continue
+        for metric, new in after.items():
+            old = before.get(metric)
+            if metric.startswith("rss_base") or not isinstance(new, (int, float)) or not old:
+                continue
+            change = (new - old) / old
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append({
+                    "backend": run[0], "size": run[1], "metric": metric, "before": old, "after": new, "change": change
+                })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS), default=list(BACKENDS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--ops", type=int, default=2000, help="Timed add and get calls per run")
+    parser.add_argument("--queries", type=int, default=200, help="Timed searches per run")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "HEAD"), help="Report regressions between two result files")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change counted as a regression")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        for r in regressions:
+            print(f"{r['backend']:<12} {r['size']:>8} {r['metric']:<16} "
+                  f"{r['before']:>12.4f} -> {r['after']:>12.4f} ({r['change']:+.0%} worse)")
+        print(f"{len(regressions)} regressions above {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+    
+    if args.worker:
+        print(json.dumps(run_one(args.backends[0], args.sizes[0], args.ops, args.queries)))
+        return
+    
+    results = []
+    print(f"{'backend':<12} {'size':>8} {'load/s':>9} {'add p50/p99 ms':>16} {'get p50/p99 ms':>16} "
+          f"{'search p50/p99 ms':>18} {'rss MB':>7} {'disk MB':>8} {'reopen s':>9}")
+    for size in args.sizes:
+        for backend in args.backends:
+            row = _run_isolated(backend, size, args.ops, args.queries)
+            results.append(row)
+            if "load_s" not in row:
+                print(f"{backend:<12} {size:>8} failed: {row.get('error')}")
+                continue
+            print(
+                f"{backend:<12} {size:>8} {row['load_per_sec']:>9.0f}"
+                f" {row['add_p50_ms']:>7.3f}/{row['add_p99_ms']:<8.3f}"
+                f" {row['get_p50_ms']:>7.4f}/{row['get_p99_ms']:<8.4f}"
+                f" {row['search_p50_ms']:>8.2f}/{row['search_p99_ms']:<9.2f}"
+                f" {row['rss_mb']:>7.1f} {row.get('disk_mb', 0.0):>8.1f} {row.get('reopen_s', 0.0):>9.3f}"
+            )
+    
+    report = {"environment": environment(), "results": results}
+    output = args.output or os.path.join(BENCH_DIR, "results", f"{report['environment']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
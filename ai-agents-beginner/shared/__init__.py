@@ -8,17 +8,33 @@ across different modules and portfolio projects.
 __version__ = "1.0.0"
 
 from .base_agent import BaseAgent
-from .tools import ToolRegistry, CalculatorTool, TimeTool
-from .memory import SimpleMemory, VectorMemory
+from .tools import ToolRegistry, AsyncTool, CalculatorTool, TimeTool
+from .memory import SimpleMemory, ConcurrentSimpleMemory, VectorMemory, SQLiteMemory, TieredMemory
+from .cache import LRUCache
+from .tool_cache import ToolResultCache
+from .sandbox import ToolSandbox
+from .ratelimit import RateLimiter
+from .resilience import Resilience, RetryPolicy, CircuitOpenError
 from .utils import setup_logging, load_config
 
 __all__ = [
     "BaseAgent",
     "ToolRegistry", 
+    "AsyncTool",
     "CalculatorTool",
     "TimeTool",
     "SimpleMemory",
+    "ConcurrentSimpleMemory",
     "VectorMemory", 
+    "SQLiteMemory",
+    "TieredMemory",
+    "LRUCache",
+    "ToolResultCache",
+    "ToolSandbox",
+    "RateLimiter",
+    "Resilience",
+    "RetryPolicy",
+    "CircuitOpenError",
     "setup_logging",
     "load_config"
 ]
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""
+Approximate Nearest-Neighbour Index for AI Agent Memory - Inverted-file (IVF) search
+"""
+
+import itertools
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embeddings import EmbeddingMatrix, normalize, top_k
+
+class IVFIndex:
+    """
+    Inverted-file index over the rows of an EmbeddingMatrix.
+    
+    Vectors are clustered around ``n_lists`` centroids (spherical k-means);
+    a query only scores the rows of its ``n_probe`` closest lists, so
+    ``n_probe`` trades recall for latency. Rows can be inserted, removed and
+    moved incrementally without retraining.
+    """
+    
+    def __init__(
+        self,
+        n_lists: int = 256,
+        n_probe: int = 8,
+        min_train_size: Optional[int] = None,
+        kmeans_iters: int = 10,
+        seed: int = 0
+    ):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.min_train_size = min_train_size or 32 * n_lists
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._assign = np.full(0, -1, dtype=np.int32)
+        self._pos = np.zeros(0, dtype=np.int64)
+    
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+    
+    def train(self, vectors: np.ndarray) -> None:
+        """Fit centroids on a sample of vectors (rows are not assigned)"""
+        rng = np.random.default_rng(self.seed)
+        n_lists = min(self.n_lists, len(vectors))
+        sample_size = min(len(vectors), 64 * n_lists)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+        for _ in range(self.kmeans_iters):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            # Re-seed empty clusters so every list stays useful
+            sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+            centroids = normalize(sums)
+        
+        self.centroids = centroids
+        self._lists = [[] for _ in range(n_lists)]
+        self._assign[:] = -1
+    
+    def assign(self, vectors: np.ndarray, batch_size: int = 4096) -> np.ndarray:
+        """Nearest list for each vector"""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), batch_size):
+            block = vectors[start:start + batch_size]
+            labels[start:start + batch_size] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+    
+    def add(
+        self,
+        rows: Sequence[int],
+        vectors: Optional[np.ndarray],
+        labels: Optional[np.ndarray] = None
+    ) -> None:
+        """Insert (or re-insert) rows into their nearest lists, or into ``labels`` if given"""
+        if labels is None:
+            labels = self.assign(vectors)
+        self._reserve(max(rows) + 1 if len(rows) else 0)
+        for row, label in zip(rows, labels):
+            if self._assign[row] >= 0:
+                self.remove(row)
+            lst = self._lists[label]
+            self._assign[row] = label
+            self._pos[row] = len(lst)
+            lst.append(row)
+    
+    def remove(self, row: int) -> None:
+        """Drop a row from its list"""
+        if row >= len(self._assign) or self._assign[row] < 0:
+            return
+        lst = self._lists[self._assign[row]]
+        pos = self._pos[row]
+        last = lst.pop()
+        if last != row:
+            lst[pos] = last
+            self._pos[last] = pos
+        self._assign[row] = -1
+    
+    def move(self, old_row: int, new_row: int) -> None:
+        """Follow a row that the matrix relocated (swap-remove)"""
+        if old_row >= len(self._assign) or self._assign[old_row] < 0:
+            return
+        self.remove(new_row)
+        label = self._assign[old_row]
+        pos = self._pos[old_row]
+        self._lists[label][pos] = new_row
+        self._assign[new_row] = label
+        self._pos[new_row] = pos
+        self._assign[old_row] = -1
+    
+    def clear(self) -> None:
+        """Forget all rows but keep the trained centroids"""
+        self._lists = [[] for _ in range(len(self._lists))]
+        self._assign[:] = -1
+    
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int,
+        matrix: EmbeddingMatrix,
+        n_probe: Optional[int] = None
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Approximate top-k rows and scores for each query"""
+        n_probe = min(n_probe or self.n_probe, len(self._lists))
+        probes = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+        
+        results = []
+        for query, lists in zip(queries, probes):
+            rows = np.fromiter(
+                itertools.chain.from_iterable(self._lists[l] for l in lists), dtype=np.int64
+            )
+            if len(rows) == 0:
+                results.append((rows, np.empty(0, dtype=np.float32)))
+                continue
+            scores = matrix.scores(query[None, :], rows)[0]
+            best = top_k(scores, k)
+            results.append((rows[best], scores[best]))
+        return results
+    
+    def labels(self, count: int) -> np.ndarray:
+        """Copy of the list assignment of rows ``0..count-1`` (-1 if unassigned)"""
+        labels = np.full(count, -1, dtype=np.int32)
+        n = min(count, len(self._assign))
+        labels[:n] = self._assign[:n]
+        return labels
+    
+    def save(self, path: str, keys: Sequence[str], labels: np.ndarray) -> None:
+        """Persist centroids and per-key list assignments"""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            keys=np.array(keys, dtype=str),
+            labels=labels
+        )
+        os.replace(tmp_path, path)
+    
+    def load(self, path: str) -> Dict[str, int]:
+        """Restore centroids; returns the saved key -> list assignments"""
+        with np.load(path, allow_pickle=False) as saved:
+            self.centroids = saved["centroids"]
+            keys, labels = saved["keys"], saved["labels"]
+        self._lists = [[] for _ in range(len(self.centroids))]
+        self._assign[:] = -1
+        return {str(key): int(label) for key, label in zip(keys, labels) if label >= 0}
+    
+    def list_sizes(self) -> List[int]:
+        """Number of rows in each list"""
+        return [len(lst) for lst in self._lists]
+    
+    def _reserve(self, needed: int) -> None:
+        if needed <= len(self._assign):
+            return
+        capacity = max(needed, 2 * len(self._assign), 1024)
+        assign = np.full(capacity, -1, dtype=np.int32)
+        assign[:len(self._assign)] = self._assign
+        pos = np.zeros(capacity, dtype=np.int64)
+        pos[:len(self._pos)] = self._pos
+        self._assign, self._pos = assign, pos
\ No newline at end of file
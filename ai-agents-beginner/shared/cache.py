@@ -0,0 +1,180 @@
+"""
+Cache Engine for AI Agents - O(1) LRU with TTL and byte-budget eviction
+"""
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+# Sentinel distinguishing "missing" from a cached None
+_MISSING = object()
+
+def estimate_size(value: Any) -> int:
+    """Approximate the memory footprint of a value in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_size(item) for item in value)
+    slots = getattr(type(value), "__slots__", ())
+    if isinstance(slots, str):
+        slots = (slots,)
+    return size + sum(estimate_size(getattr(value, name, None)) for name in slots)
+
+class _CacheEntry:
+    """Value stored in the cache with its size and expiry"""
+    
+    __slots__ = ("value", "size", "expires_at")
+    
+    def __init__(self, value: Any, size: int, expires_at: Optional[float]):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+
+class LRUCache:
+    """
+    Least-recently-used cache with constant-time recency updates.
+    
+    Entries are evicted when the entry count exceeds ``max_entries`` or the
+    estimated total size exceeds ``max_bytes``. Entries with a TTL expire
+    lazily on access or eagerly through ``purge_expired``.
+    """
+    
+    def __init__(
+        self,
+        max_entries: Optional[int] = 1000,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        sizeof: Callable[[Any], int] = estimate_size,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.on_evict = on_evict
+        self.sizeof = sizeof
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and not self._is_expired(entry)
+    
+    def __iter__(self) -> Iterator[Hashable]:
+        """Iterate keys from least to most recently used"""
+        return iter(list(self._entries))
+    
+    @property
+    def total_bytes(self) -> int:
+        """Estimated size of all cached values (tracked only with a byte budget)"""
+        return self._bytes
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Insert or overwrite a value and mark it most recently used"""
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = self.clock() + ttl if ttl is not None else None
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old.size
+        
+        self._entries[key] = _CacheEntry(value, size, expires_at)
+        self._bytes += size
+        self._enforce_limits()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value and mark it most recently used"""
+        value = self._lookup(key, touch=True)
+        return default if value is _MISSING else value
+    
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Get a value without updating recency or hit counters"""
+        entry = self._entries.get(key)
+        if entry is None or self._is_expired(entry):
+            return default
+        return entry.value
+    
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a value without counting it as an eviction"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return default
+        self._bytes -= entry.size
+        return entry.value
+    
+    def clear(self) -> None:
+        """Remove all entries without firing eviction callbacks"""
+        self._entries.clear()
+        self._bytes = 0
+    
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Live (key, value) pairs from least to most recently used"""
+        return [(k, e.value) for k, e in self._entries.items() if not self._is_expired(e)]
+    
+    def purge_expired(self) -> int:
+        """Drop every expired entry, returning how many were removed"""
+        expired = [k for k, e in self._entries.items() if self._is_expired(e)]
+        for key in expired:
+            self._expire(key)
+        return len(expired)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss/eviction counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+    
+    def _lookup(self, key: Hashable, touch: bool) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return _MISSING
+        if self._is_expired(entry):
+            self._expire(key)
+            self.misses += 1
+            return _MISSING
+        if touch:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return entry.value
+    
+    def _is_expired(self, entry: _CacheEntry) -> bool:
+        return entry.expires_at is not None and entry.expires_at <= self.clock()
+    
+    def _expire(self, key: Hashable) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        self.expirations += 1
+        if self.on_evict:
+            self.on_evict(key, entry.value)
+    
+    def _enforce_limits(self) -> None:
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+            if self.on_evict:
+                self.on_evict(key, entry.value)
\ No newline at end of file
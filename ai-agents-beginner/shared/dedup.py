@@ -0,0 +1,92 @@
+"""
+Near-Duplicate Detection for AI Agent Memory - SimHash signatures with LSH banding
+"""
+
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+class SimHashIndex:
+    """
+    Locality-sensitive index of embedding signatures.
+    
+    Each vector is hashed to ``bands * band_bits`` sign bits of random
+    projections (SimHash); the bits are cut into bands and every band value
+    is a bucket. Vectors at a small angle agree on most bits, so they share
+    at least one bucket with high probability, and a lookup only returns
+    keys from the query's buckets instead of scanning every entry. Callers
+    confirm candidates against ``threshold`` with an exact cosine.
+    """
+    
+    def __init__(
+        self,
+        threshold: float = 0.95,
+        bands: int = 16,
+        band_bits: int = 16,
+        seed: int = 0
+    ):
+        self.threshold = threshold
+        self.bands = bands
+        self.band_bits = band_bits
+        self.seed = seed
+        self._planes: Optional[np.ndarray] = None
+        self._weights = (1 << np.arange(band_bits, dtype=np.int64))
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in range(bands)]
+        self._codes: Dict[str, Tuple[int, ...]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._codes)
+    
+    def signatures(self, vectors: np.ndarray) -> np.ndarray:
+        """Band codes of each vector, shape (n, bands)"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        if self._planes is None or self._planes.shape[1] != vectors.shape[1]:
+            rng = np.random.default_rng(self.seed)
+            self._planes = rng.standard_normal(
+                (self.bands * self.band_bits, vectors.shape[1])
+            ).astype(np.float32)
+        bits = (vectors @ self._planes.T > 0).reshape(len(vectors), self.bands, self.band_bits)
+        return bits @ self._weights
+    
+    def add(
+        self,
+        keys: Sequence[str],
+        vectors: Optional[np.ndarray],
+        codes: Optional[np.ndarray] = None
+    ) -> None:
+        """Index (or re-index) keys under their vectors' signatures (or precomputed ``codes``)"""
+        if codes is None:
+            codes = self.signatures(vectors)
+        for key, key_codes in zip(keys, codes.tolist()):
+            if key in self._codes:
+                self.remove(key)
+            for buckets, code in zip(self._buckets, key_codes):
+                buckets.setdefault(code, set()).add(key)
+            self._codes[key] = tuple(key_codes)
+    
+    def remove(self, key: str) -> None:
+        """Drop a key if present"""
+        codes = self._codes.pop(key, None)
+        if codes is None:
+            return
+        for buckets, code in zip(self._buckets, codes):
+            bucket = buckets[code]
+            bucket.discard(key)
+            if not bucket:
+                del buckets[code]
+    
+    def clear(self) -> None:
+        """Remove every key"""
+        self._buckets = [{} for _ in range(self.bands)]
+        self._codes.clear()
+    
+    def candidates(self, vector: np.ndarray, codes: Optional[np.ndarray] = None) -> List[str]:
+        """Keys sharing at least one band with the vector (or its precomputed ``codes``)"""
+        if codes is None:
+            codes = self.signatures(vector[None, :])[0]
+        found: Set[str] = set()
+        for buckets, code in zip(self._buckets, codes.tolist()):
+            bucket = buckets.get(code)
+            if bucket:
+                found.update(bucket)
+        return list(found)
\ No newline at end of file
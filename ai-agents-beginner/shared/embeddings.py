@@ -0,0 +1,330 @@
+"""
+Embeddings for AI Agent Memory - Pluggable embedders and a contiguous vector matrix
+"""
+
+import os
+import zlib
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .text_index import tokenize
+
+class BaseEmbedder(ABC):
+    """Base class for text embedders producing unit-norm float32 vectors"""
+    
+    def __init__(self, name: str, dim: int):
+        self.name = name
+        self.dim = dim
+    
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Embed texts into a (len(texts), dim) float32 array"""
+        pass
+    
+    def signature(self) -> str:
+        """Identifier that changes whenever stored vectors become incompatible"""
+        return f"{self.name}:{self.dim}"
+
+class HashingEmbedder(BaseEmbedder):
+    """
+    Deterministic offline embedder based on signed feature hashing.
+    
+    Words and their character trigrams are hashed into ``dim`` buckets with
+    CRC32, so the same text always maps to the same vector across processes
+    and no model or network access is needed.
+    """
+    
+    def __init__(self, dim: int = 384, ngram: int = 3, ngram_weight: float = 0.5):
+        super().__init__(name="hashing", dim=dim)
+        self.ngram = ngram
+        self.ngram_weight = ngram_weight
+    
+    def signature(self) -> str:
+        return f"{self.name}:{self.dim}:{self.ngram}:{self.ngram_weight}"
+    
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            features = [self._token_features(token) for token in tokenize(text)]
+            if features:
+                columns, weights = zip(*features)
+                out[row] = np.bincount(
+                    np.concatenate(columns), np.concatenate(weights), minlength=self.dim
+                )
+        return normalize(out)
+    
+    def _token_features(self, token: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Hashed columns and signed weights for a token and its n-grams"""
+        return _token_features(token, self.dim, self.ngram, self.ngram_weight)
+
+@lru_cache(maxsize=1 << 16)
+def _token_features(token: str, dim: int, ngram: int, ngram_weight: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Feature hashing of one token, cached by value so the cache never keeps an embedder alive"""
+    features = [(token, 1.0)]
+    if ngram and len(token) > ngram:
+        padded = f"<{token}>"
+        features.extend(
+            ("#" + padded[i:i + ngram], ngram_weight)
+            for i in range(len(padded) - ngram + 1)
+        )
+    
+    columns = np.empty(len(features), dtype=np.int64)
+    weights = np.empty(len(features), dtype=np.float32)
+    for i, (feature, weight) in enumerate(features):
+        h = zlib.crc32(feature.encode("utf-8"))
+        columns[i] = h % dim
+        weights[i] = weight if h & 0x80000000 else -weight
+    return columns, weights
+
+class CallableEmbedder(BaseEmbedder):
+    """Adapter for any ``texts -> vectors`` function (e.g. an embeddings API client)"""
+    
+    def __init__(self, fn: Callable[[List[str]], Sequence[Sequence[float]]], dim: int, name: str = "callable"):
+        super().__init__(name=name, dim=dim)
+        self.fn = fn
+    
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return normalize(np.asarray(self.fn(list(texts)), dtype=np.float32).reshape(len(texts), self.dim))
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place, leaving all-zero rows untouched"""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, best first"""
+    n = scores.shape[-1]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+def _write_npy(path: str, rows: np.ndarray, capacity: int) -> None:
+    """Write rows into a memory-mappable .npy file with room for ``capacity`` rows"""
+    out = np.lib.format.open_memmap(
+        path, mode="w+", dtype=rows.dtype, shape=(max(capacity, 1),) + rows.shape[1:]
+    )
+    out[:len(rows)] = rows
+    out.flush()
+    del out
+    with open(path, "rb+") as f:
+        os.fsync(f.fileno())
+
+class EmbeddingMatrix:
+    """
+    Growable contiguous float32 matrix of embeddings.
+    
+    Rows are appended into spare capacity (doubling on overflow) so inserts
+    are amortized O(dim), and deletes swap the last row into the hole so
+    the live rows always form one contiguous block for matmuls.
+    """
+    
+    kind = "float32"
+    
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self.count = 0
+        self._data = np.zeros((max(capacity, 1), dim), dtype=np.float32)
+    
+    @classmethod
+    def from_array(cls, data: np.ndarray, count: int) -> "EmbeddingMatrix":
+        """Wrap an existing (capacity, dim) array, e.g. a memory-mapped file, without copying"""
+        matrix = cls.__new__(cls)
+        matrix.dim = data.shape[1]
+        matrix.count = count
+        matrix._data = data
+        return matrix
+    
+    @classmethod
+    def load(cls, prefix: str, count: int) -> "EmbeddingMatrix":
+        """Memory-map (copy-on-write) a matrix written by ``save``"""
+        data = np.load(prefix + ".npy", mmap_mode="c")
+        if data.ndim != 2 or len(data) < count:
+            raise ValueError(f"Vector file {prefix}.npy does not hold {count} rows")
+        return cls.from_array(data, count)
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the live rows"""
+        return self._data[:self.count]
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held for live rows"""
+        return self.count * self.dim * 4
+    
+    def get(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Float32 vectors of the given rows (all live rows by default)"""
+        return self.vectors if rows is None else self._data[rows]
+    
+    def append(self, vectors: np.ndarray) -> int:
+        """Append rows, returning the index of the first one"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        start = self.count
+        self._reserve(start + len(vectors))
+        self._data[start:start + len(vectors)] = vectors
+        self.count += len(vectors)
+        return start
+    
+    def set(self, row: int, vector: np.ndarray) -> None:
+        """Overwrite one row"""
+        self._data[row] = vector
+    
+    def copy(self) -> "EmbeddingMatrix":
+        """Independent copy of the live rows, e.g. for a background snapshot"""
+        return type(self).from_array(self.vectors.copy(), self.count)
+    
+    def save(self, prefix: str, spare: int = 0) -> None:
+        """Write live rows plus ``spare`` empty rows to ``prefix.npy`` for memory-mapping"""
+        _write_npy(prefix + ".npy", self.vectors, self.count + spare)
+    
+    def swap_remove(self, row: int) -> Optional[int]:
+        """Delete a row by moving the last row into it; returns the moved row's old index"""
+        last = self.count - 1
+        self.count = last
+        if row == last:
+            return None
+        self._data[row] = self._data[last]
+        return last
+    
+    def clear(self) -> None:
+        self.count = 0
+    
+    def scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarities of (m, dim) queries against live rows, shape (m, n)"""
+        return queries @ self.get(rows).T
+    
+    def _reserve(self, needed: int) -> None:
+        if needed <= len(self._data):
+            return
+        capacity = len(self._data)
+        while capacity < needed:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:self.count] = self._data[:self.count]
+        self._data = grown
+
+class Int8EmbeddingMatrix(EmbeddingMatrix):
+    """
+    Scalar-quantized embedding matrix: one int8 code per dimension plus a
+    float32 scale per row, about 4x smaller than float32 storage.
+    
+    Scores use asymmetric distance computation: float32 queries are
+    multiplied against the codes (dequantized a block at a time) and
+    rescaled per row, so queries themselves lose no precision.
+    """
+    
+    kind = "int8"
+    block_rows = 2048
+    
+    def __init__(self, dim: int, capacity: int = 1024):
+        self.dim = dim
+        self.count = 0
+        self._data = np.zeros((max(capacity, 1), dim), dtype=np.int8)
+        self._scales = np.zeros(max(capacity, 1), dtype=np.float32)
+    
+    @classmethod
+    def from_arrays(cls, codes: np.ndarray, scales: np.ndarray, count: int) -> "Int8EmbeddingMatrix":
+        """Wrap existing code and scale arrays without copying"""
+        matrix = cls.__new__(cls)
+        matrix.dim = codes.shape[1]
+        matrix.count = count
+        matrix._data = codes
+        matrix._scales = scales
+        return matrix
+    
+    @classmethod
+    def load(cls, prefix: str, count: int) -> "Int8EmbeddingMatrix":
+        codes = np.load(prefix + ".npy", mmap_mode="c")
+        scales = np.load(prefix + ".scales.npy", mmap_mode="c")
+        if codes.ndim != 2 or codes.dtype != np.int8 or min(len(codes), len(scales)) < count:
+            raise ValueError(f"Quantized vector files {prefix}.* do not hold {count} rows")
+        return cls.from_arrays(codes, scales, count)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.count * (self.dim + 4)
+    
+    @staticmethod
+    def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Symmetric per-row int8 quantization"""
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        safe = np.where(scales > 0, scales, 1.0)
+        codes = np.clip(np.rint(vectors / safe[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    
+    def get(self, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        if rows is None:
+            codes, scales = self._data[:self.count], self._scales[:self.count]
+        else:
+            codes, scales = self._data[rows], self._scales[rows]
+        return codes.astype(np.float32) * scales[:, None]
+    
+    def append(self, vectors: np.ndarray) -> int:
+        codes, scales = self.quantize(np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim))
+        start = self.count
+        self._reserve(start + len(codes))
+        self._data[start:start + len(codes)] = codes
+        self._scales[start:start + len(codes)] = scales
+        self.count += len(codes)
+        return start
+    
+    def set(self, row: int, vector: np.ndarray) -> None:
+        codes, scales = self.quantize(np.asarray(vector, dtype=np.float32).reshape(1, self.dim))
+        self._data[row] = codes[0]
+        self._scales[row] = scales[0]
+    
+    def copy(self) -> "Int8EmbeddingMatrix":
+        return self.from_arrays(
+            self._data[:self.count].copy(), self._scales[:self.count].copy(), self.count
+        )
+    
+    def save(self, prefix: str, spare: int = 0) -> None:
+        _write_npy(prefix + ".npy", self._data[:self.count], self.count + spare)
+        _write_npy(prefix + ".scales.npy", self._scales[:self.count], self.count + spare)
+    
+    def swap_remove(self, row: int) -> Optional[int]:
+        last = self.count - 1
+        self.count = last
+        if row == last:
+            return None
+        self._data[row] = self._data[last]
+        self._scales[row] = self._scales[last]
+        return last
+    
+    def scores(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        if rows is not None:
+            return queries @ self.get(rows).T
+        out = np.empty((len(queries), self.count), dtype=np.float32)
+        for start in range(0, self.count, self.block_rows):
+            end = min(start + self.block_rows, self.count)
+            block = self._data[start:end].astype(np.float32)
+            out[:, start:end] = (queries @ block.T) * self._scales[start:end]
+        return out
+    
+    def _reserve(self, needed: int) -> None:
+        if needed <= len(self._data):
+            return
+        capacity = len(self._data)
+        while capacity < needed:
+            capacity *= 2
+        codes = np.zeros((capacity, self.dim), dtype=np.int8)
+        codes[:self.count] = self._data[:self.count]
+        scales = np.zeros(capacity, dtype=np.float32)
+        scales[:self.count] = self._scales[:self.count]
+        self._data, self._scales = codes, scales
+
+MATRIX_KINDS = {cls.kind: cls for cls in (EmbeddingMatrix, Int8EmbeddingMatrix)}
\ No newline at end of file
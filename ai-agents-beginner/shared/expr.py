@@ -0,0 +1,179 @@
+"""
+Arithmetic Expression Engine for AI Agent Tools - Restricted AST compiled once and cached
+"""
+
+import ast
+import math
+import operator
+import threading
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from .cache import LRUCache
+
+Number = Union[int, float]
+
+class ExpressionError(ValueError):
+    """Expression rejected by the engine's grammar or resource limits"""
+
+class CompiledExpression:
+    """
+    An expression compiled to a tree of closures.
+    
+    Expressions have no variables, so the value is computed on the first
+    ``evaluate`` and reused afterwards; a failure is remembered the same way.
+    """
+    
+    __slots__ = ("source", "ops", "_fn", "_value", "_error")
+    
+    def __init__(self, source: str, fn: Callable[[], Number], ops: int):
+        self.source = source
+        self.ops = ops
+        self._fn = fn
+        self._value: Optional[Number] = None
+        self._error: Optional[Exception] = None
+    
+    def evaluate(self) -> Number:
+        """Value of the expression (raises the evaluation error, if any)"""
+        fn = self._fn  # Read once: another thread may clear it after computing the value
+        if fn is not None:
+            try:
+                self._value = fn()
+            except (ArithmeticError, ExpressionError) as e:
+                self._error = e
+            self._fn = None
+        if self._error is not None:
+            raise self._error.with_traceback(None)
+        return self._value
+
+class ExpressionEngine:
+    """
+    Safe evaluator for arithmetic over int and float literals.
+    
+    Sources are parsed with ``ast`` and only numbers, parentheses, unary
+    ``+``/``-`` and the binary ``+ - * / // **`` operators are accepted.
+    Compiled expressions are cached by source text. Integer results are
+    capped at ``max_bits`` and exponents at ``max_exponent``, so inputs like
+    ``9**9**9`` fail fast instead of pinning a CPU.
+    """
+    
+    _BINARY: Dict[type, Callable[[Number, Number], Number]] = {
+        ast.Add: operator.add,
+        ast.Sub: operator.sub,
+        ast.Div: operator.truediv,
+        ast.FloorDiv: operator.floordiv
+    }
+    _UNARY: Dict[type, Callable[[Number], Number]] = {
+        ast.UAdd: operator.pos,
+        ast.USub: operator.neg
+    }
+    
+    def __init__(
+        self,
+        max_length: int = 1000,
+        max_ops: int = 256,
+        max_exponent: int = 10000,
+        max_bits: int = 4096,
+        cache_size: int = 1024
+    ):
+        self.max_length = max_length
+        self.max_ops = max_ops
+        self.max_exponent = max_exponent
+        self.max_bits = max_bits
+        self._cache = LRUCache(max_entries=cache_size)
+        self._lock = threading.Lock()
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # Locks cannot be pickled: ship the limits and start with an empty cache
+        return {
+            "max_length": self.max_length,
+            "max_ops": self.max_ops,
+            "max_exponent": self.max_exponent,
+            "max_bits": self.max_bits,
+            "cache_size": self._cache.max_entries
+        }
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__init__(**state)
+    
+    def compile(self, source: str) -> CompiledExpression:
+        """Parse and validate ``source``, reusing a cached compilation when possible"""
+        with self._lock:
+            compiled = self._cache.get(source)
+        if compiled is not None:
+            return compiled
+        
+        if len(source) > self.max_length:
+            raise ExpressionError(f"Expression longer than {self.max_length} characters")
+        tree = ast.parse(source.strip(), mode="eval")
+        counter = [0]
+        fn = self._compile_node(tree.body, counter)
+        compiled = CompiledExpression(source, fn, counter[0])
+        with self._lock:
+            self._cache.set(source, compiled)
+        return compiled
+    
+    def evaluate(self, source: str) -> Number:
+        """Compile (or fetch) ``source`` and return its value"""
+        return self.compile(source).evaluate()
+    
+    def evaluate_many(self, sources: List[str]) -> List[Union[Number, Exception]]:
+        """Value of each source, or the exception it raised, in input order"""
+        results: List[Union[Number, Exception]] = []
+        for source in sources:
+            try:
+                results.append(self.evaluate(source))
+            except (SyntaxError, ArithmeticError, ExpressionError, RecursionError) as e:
+                results.append(e)
+        return results
+    
+    def cache_info(self) -> Dict[str, Any]:
+        """Hit/miss counters of the compilation cache"""
+        with self._lock:
+            return self._cache.stats()
+    
+    def _compile_node(self, node: ast.AST, counter: List[int]) -> Callable[[], Number]:
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ExpressionError(f"Unsupported literal: {value!r}")
+            return lambda: value
+        
+        counter[0] += 1
+        if counter[0] > self.max_ops:
+            raise ExpressionError(f"Expression has more than {self.max_ops} operations")
+        
+        if isinstance(node, ast.UnaryOp) and type(node.op) in self._UNARY:
+            op = self._UNARY[type(node.op)]
+            operand = self._compile_node(node.operand, counter)
+            return lambda: op(operand())
+        
+        if isinstance(node, ast.BinOp):
+            left = self._compile_node(node.left, counter)
+            right = self._compile_node(node.right, counter)
+            if isinstance(node.op, ast.Pow):
+                op = self._power
+            elif isinstance(node.op, ast.Mult):
+                op = self._multiply
+            elif type(node.op) in self._BINARY:
+                op = self._BINARY[type(node.op)]
+            else:
+                raise ExpressionError(f"Unsupported operator: {type(node.op).__name__}")
+            return lambda: op(left(), right())
+        
+        raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+    
+    def _multiply(self, a: Number, b: Number) -> Number:
+        if isinstance(a, int) and isinstance(b, int) and a.bit_length() + b.bit_length() > self.max_bits:
+            raise ExpressionError(f"Result exceeds {self.max_bits} bits")
+        return a * b
+    
+    def _power(self, base: Number, exponent: Number) -> Number:
+        if abs(exponent) > self.max_exponent:
+            raise ExpressionError(f"Exponent larger than {self.max_exponent}")
+        if (isinstance(base, int) and isinstance(exponent, int) and exponent > 0
+                and abs(base) > 1 and math.log2(abs(base)) * exponent > self.max_bits):
+            raise ExpressionError(f"Result exceeds {self.max_bits} bits")
+        result = base ** exponent
+        if isinstance(result, complex):
+            raise ExpressionError("Complex result")
+        return result
\ No newline at end of file
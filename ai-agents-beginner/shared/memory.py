@@ -2,10 +2,120 @@
 Memory Systems for AI Agents - Short-term and long-term memory
 """
 
+import glob
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional, Tuple
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, List, Any, Optional, Sequence, Tuple
 from datetime import datetime
 
+import numpy as np
+
+from .ann import IVFIndex
+from .cache import LRUCache
+from .dedup import SimHashIndex
+from .embeddings import MATRIX_KINDS, BaseEmbedder, EmbeddingMatrix, HashingEmbedder, top_k
+from .metadata_index import MetadataIndex, TimeBound, to_epoch, to_iso
+from .sharding import ShardedSearcher
+from .text_index import InvertedIndex, tokenize
+from .wal import WriteAheadLog, write_atomic
+
+logger = logging.getLogger("ai_agents")
+
+def _searchable_text(key: str, value: Any) -> str:
+    """Text indexed for a memory entry: its key plus string values"""
+    if isinstance(value, str):
+        return f"{key} {value}"
+    return key
+
+def _dedup_text(value: Any) -> str:
+    """Text compared for near-duplicate detection: the value alone, since repeats arrive under new keys"""
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, sort_keys=True, default=str)
+
+def _split(total: int, parts: int, i: int) -> int:
+    """Size of part ``i`` when ``total`` is divided into ``parts`` as evenly as possible"""
+    base, extra = divmod(total, parts)
+    return base + (1 if i < extra else 0)
+
+def _unpack_item(item: Sequence) -> Tuple[str, Any, Optional[Dict]]:
+    """Normalize a (key, value) or (key, value, metadata) batch item"""
+    if len(item) == 2:
+        return item[0], item[1], None
+    return item[0], item[1], item[2]
+
+class MemoryEntry:
+    """
+    Compact record of one memory entry.
+    
+    User metadata is flattened into one tuple of alternating field names
+    and values (None when empty) and the creation time is kept as epoch
+    seconds; the API-level metadata dict with its ISO timestamp is only
+    built when asked for.
+    """
+    
+    __slots__ = ("value", "extra", "created")
+    
+    def __init__(self, value: Any, fields: Optional[Dict] = None, created: Optional[float] = None):
+        self.value = value
+        self.extra = tuple(itertools.chain.from_iterable(fields.items())) if fields else None
+        self.created = time.time() if created is None else created
+    
+    @classmethod
+    def from_metadata(cls, value: Any, metadata: Optional[Dict]) -> "MemoryEntry":
+        """Build from an API-style metadata dict carrying an ISO 'timestamp'"""
+        extra = dict(metadata or {})
+        try:
+            created = to_epoch(extra.pop('timestamp', None))
+        except (TypeError, ValueError):
+            created = None  # Unparseable legacy timestamp
+        return cls(value, extra, created)
+    
+    @property
+    def fields(self) -> Dict:
+        """User metadata without the timestamp"""
+        extra = self.extra or ()
+        return dict(zip(extra[::2], extra[1::2]))
+    
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.created).isoformat()
+    
+    @property
+    def metadata(self) -> Dict:
+        """User metadata plus the ISO 'timestamp'"""
+        meta = self.fields
+        meta['timestamp'] = self.timestamp
+        return meta
+
+class _EntryView(Mapping):
+    """Read-only mapping of keys to one facet ("value" or "metadata") of their entries"""
+    
+    def __init__(self, entries: Dict[str, MemoryEntry], facet: str):
+        self._entries = entries
+        self._facet = facet
+    
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self._entries[key], self._facet)
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+    
+    def __iter__(self):
+        return iter(self._entries)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
 class BaseMemory(ABC):
     """Base class for memory systems"""
     
@@ -28,127 +138,1298 @@ class BaseMemory(ABC):
     def clear(self) -> None:
         """Clear all memory"""
         pass
+    
+    def add_many(self, items: Iterable[Sequence]) -> None:
+        """Add (key, value) or (key, value, metadata) items"""
+        for item in items:
+            self.add(*_unpack_item(item))
+    
+    def get_many(self, keys: Iterable[str]) -> List[Optional[Any]]:
+        """Get several items, None for missing keys"""
+        return [self.get(key) for key in keys]
+    
+    def search_many(self, queries: Iterable[str], limit: int = 10) -> List[List[Tuple[str, Any]]]:
+        """Run several searches"""
+        return [self.search(query, limit) for query in queries]
 
 class SimpleMemory(BaseMemory):
     """Simple in-memory storage with LRU eviction"""
     
-    def __init__(self, max_size: int = 1000):
+    def __init__(
+        self,
+        max_size: int = 1000,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[str, Any, Dict], None]] = None
+    ):
         self.max_size = max_size
-        self.data: Dict[str, Any] = {}
-        self.metadata: Dict[str, Dict] = {}
-        self.access_order: List[str] = []
+        self.on_evict = on_evict
+        self._cache = LRUCache(
+            max_entries=max_size,
+            max_bytes=max_bytes,
+            default_ttl=default_ttl,
+            on_evict=self._on_evict
+        )
+        self._index = InvertedIndex()
+        self._meta_index = MetadataIndex()
     
-    def add(self, key: str, value: Any, metadata: Optional[Dict] = None) -> None:
-        """Add item with optional metadata"""
-        if key in self.data:
-            self.access_order.remove(key)
-        
-        self.data[key] = value
-        self.metadata[key] = metadata or {}
-        self.metadata[key]['timestamp'] = datetime.now().isoformat()
-        self.access_order.append(key)
-        
-        # LRU eviction
-        while len(self.data) > self.max_size:
-            oldest = self.access_order.pop(0)
-            del self.data[oldest]
-            del self.metadata[oldest]
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Snapshot of stored values"""
+        return {key: entry.value for key, entry in self._cache.items()}
+    
+    @property
+    def metadata(self) -> Dict[str, Dict]:
+        """Snapshot of stored metadata"""
+        return {key: entry.metadata for key, entry in self._cache.items()}
+    
+    @property
+    def access_order(self) -> List[str]:
+        """Keys from least to most recently used"""
+        return [key for key, _ in self._cache.items()]
+    
+    def add(
+        self,
+        key: str,
+        value: Any,
+        metadata: Optional[Dict] = None,
+        ttl: Optional[float] = None,
+        created: Optional[float] = None
+    ) -> None:
+        """Add item with optional metadata, time-to-live in seconds and creation time (epoch seconds)"""
+        self._store(key, MemoryEntry(value, metadata, created), ttl)
     
     def get(self, key: str) -> Optional[Any]:
         """Get item and update access"""
-        if key in self.data:
-            self.access_order.remove(key)
-            self.access_order.append(key)
-            return self.data[key]
-        return None
+        entry = self._cache.get(key)
+        return entry.value if entry is not None else None
     
-    def search(self, query: str, limit: int = 10) -> List[Tuple[str, Any]]:
-        """Simple text search"""
-        query_lower = query.lower()
-        results = []
-        
-        for key, value in self.data.items():
-            if query_lower in key.lower():
-                results.append((key, value))
-            elif isinstance(value, str) and query_lower in value.lower():
-                results.append((key, value))
+    def delete(self, key: str) -> bool:
+        """Remove an item, returning whether it existed"""
+        if self._cache.pop(key) is None:
+            return False
+        self._index.remove(key)
+        self._meta_index.remove(key)
+        return True
+    
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> List[Tuple[str, Any]]:
+        """Ranked keyword search (BM25), optionally restricted by metadata and timestamp"""
+        return [(key, value) for key, value, _ in self._ranked(query, limit, where, since, until)]
+    
+    def clear(self) -> None:
+        """Clear all memory"""
+        self._cache.clear()
+        self._index.clear()
+        self._meta_index.clear()
+    
+    def size(self) -> int:
+        """Get current size"""
+        return len(self._cache)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss/eviction counters"""
+        return self._cache.stats()
+    
+    def _ranked(
+        self,
+        query: str,
+        limit: int,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> List[Tuple[str, Any, float]]:
+        """Search hits as (key, value, BM25 score)"""
+        candidates = self._meta_index.match(where, since, until)
+        ranked = self._index.search(query, limit, candidates)
+        if any(key not in self._cache for key, _ in ranked):
+            # Expired entries are dropped lazily; purge them and rank again
+            self._cache.purge_expired()
+            candidates = self._meta_index.match(where, since, until)
+            ranked = self._index.search(query, limit, candidates)
         
-        return results[:limit]
+        hits = []
+        for key, score in ranked:
+            entry = self._cache.peek(key)
+            if entry is not None:
+                hits.append((key, entry.value, score))
+        return hits
+    
+    def _on_evict(self, key: str, entry: MemoryEntry) -> None:
+        """Keep the search indexes in sync with LRU eviction and expiry"""
+        self._index.remove(key)
+        self._meta_index.remove(key)
+        if self.on_evict is not None:
+            self.on_evict(key, entry.value, entry.metadata)
+    
+    def _store(self, key: str, entry: MemoryEntry, ttl: Optional[float] = None) -> None:
+        """Insert an entry record as given"""
+        self._cache.set(key, entry, ttl=ttl)
+        if key in self._cache:
+            self._index.add(key, _searchable_text(key, entry.value))
+            self._meta_index.add(key, entry.fields, entry.created)
+
+class ConcurrentSimpleMemory(BaseMemory):
+    """
+    Thread-safe SimpleMemory built from lock-striped shards.
+    
+    Keys are hashed onto ``stripes`` independent SimpleMemory shards, each
+    guarded by its own lock, so threads touching different keys rarely
+    wait on each other. Each shard evicts its own least recently used
+    entry, which keeps LRU order approximately correct overall. Search
+    ranks every shard under its lock and merges the BM25 scores; document
+    frequencies are per shard, so scores are close to, not identical
+    with, a single index.
+    """
+    
+    def __init__(
+        self,
+        max_size: int = 1000,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[float] = None,
+        stripes: int = 16
+    ):
+        self.max_size = max_size
+        # Every shard must hold at least one entry, and the shard sizes add up to max_size exactly
+        self.stripes = stripes = max(1, min(stripes, max_size))
+        self._shards = [
+            SimpleMemory(
+                _split(max_size, stripes, i),
+                _split(max_bytes, stripes, i) if max_bytes else None,
+                default_ttl
+            )
+            for i in range(stripes)
+        ]
+        self._locks = [threading.Lock() for _ in range(stripes)]
+    
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Snapshot of stored values"""
+        snapshot = {}
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                snapshot.update(shard.data)
+        return snapshot
+    
+    @property
+    def metadata(self) -> Dict[str, Dict]:
+        """Snapshot of stored metadata"""
+        snapshot = {}
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                snapshot.update(shard.metadata)
+        return snapshot
+    
+    def add(
+        self,
+        key: str,
+        value: Any,
+        metadata: Optional[Dict] = None,
+        ttl: Optional[float] = None
+    ) -> None:
+        """Add item with optional metadata and time-to-live in seconds"""
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            self._shards[stripe].add(key, value, metadata, ttl)
+    
+    def add_many(self, items: Iterable[Sequence]) -> None:
+        """Add a batch, taking each stripe's lock once"""
+        for stripe, group in self._group(items, lambda item: item[0]).items():
+            with self._locks[stripe]:
+                shard = self._shards[stripe]
+                for item in group:
+                    shard.add(*_unpack_item(item))
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get item and update access"""
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            return self._shards[stripe].get(key)
+    
+    def get_many(self, keys: Iterable[str]) -> List[Optional[Any]]:
+        """Get several items, taking each stripe's lock once"""
+        keys = list(keys)
+        found: Dict[str, Any] = {}
+        for stripe, group in self._group(keys, lambda key: key).items():
+            with self._locks[stripe]:
+                shard = self._shards[stripe]
+                for key in group:
+                    found[key] = shard.get(key)
+        return [found[key] for key in keys]
+    
+    def delete(self, key: str) -> bool:
+        """Remove an item, returning whether it existed"""
+        stripe = self._stripe(key)
+        with self._locks[stripe]:
+            return self._shards[stripe].delete(key)
+    
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> List[Tuple[str, Any]]:
+        """Ranked keyword search (BM25) merged across shards"""
+        ranked = []
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                ranked.extend(shard._ranked(query, limit, where, since, until))
+        best = heapq.nlargest(limit, ranked, key=lambda hit: hit[2])
+        return [(key, value) for key, value, _ in best]
     
     def clear(self) -> None:
         """Clear all memory"""
-        self.data.clear()
-        self.metadata.clear()
-        self.access_order.clear()
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                shard.clear()
     
     def size(self) -> int:
         """Get current size"""
-        return len(self.data)
+        return sum(shard.size() for shard in self._shards)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache hit/miss/eviction counters summed over shards"""
+        totals: Dict[str, Any] = {}
+        for shard, lock in zip(self._shards, self._locks):
+            with lock:
+                for name, value in shard.stats().items():
+                    if name != 'hit_rate':
+                        totals[name] = totals.get(name, 0) + value
+        lookups = totals.get('hits', 0) + totals.get('misses', 0)
+        totals['hit_rate'] = totals.get('hits', 0) / lookups if lookups else 0.0
+        return totals
+    
+    def _stripe(self, key: str) -> int:
+        return hash(key) % self.stripes
+    
+    def _group(self, items: Iterable, key_of: Callable[[Any], str]) -> Dict[int, List]:
+        groups: Dict[int, List] = {}
+        for item in items:
+            groups.setdefault(self._stripe(key_of(item)), []).append(item)
+        return groups
 
 class VectorMemory(BaseMemory):
-    """Vector-based memory for semantic search (simplified)"""
+    """
+    Vector-based memory for semantic search over embeddings.
     
-    def __init__(self, persist_path: Optional[str] = None):
+    ``quantize="int8"`` stores one byte per dimension instead of four; with
+    ``rerank`` set, that many top candidates are re-embedded and rescored
+    exactly so the quantization error barely shows in the final ranking.
+    
+    With a ``dedup`` index, adding a new key whose embedding is within the
+    index's cosine threshold of an existing entry merges the metadata into
+    that entry and records the new key as an alias instead of inserting.
+    """
+    
+    def __init__(
+        self,
+        persist_path: Optional[str] = None,
+        embedder: Optional[BaseEmbedder] = None,
+        ann: Optional[IVFIndex] = None,
+        shards: int = 0,
+        quantize: Optional[str] = None,
+        rerank: int = 0,
+        dedup: Optional[SimHashIndex] = None,
+        sync_every: int = 64,
+        sync_interval: float = 1.0,
+        compact_bytes: int = 4 * 1024 * 1024
+    ):
         self.persist_path = persist_path or "memory.json"
-        self.data: Dict[str, Any] = {}
-        self.metadata: Dict[str, Dict] = {}
+        self.compact_bytes = compact_bytes
+        self.embedder = embedder or HashingEmbedder()
+        self.ann = ann
+        self.rerank = rerank
+        self.dedup = dedup
+        self._matrix_cls = MATRIX_KINDS.get(quantize or "float32")
+        if self._matrix_cls is None:
+            raise ValueError(f"Unknown quantization {quantize!r}, expected one of {sorted(MATRIX_KINDS)}")
+        self._entries: Dict[str, MemoryEntry] = {}
+        self._index = InvertedIndex()
+        self._meta_index = MetadataIndex()
+        self._index_ready = True
+        self._matrix: EmbeddingMatrix = self._matrix_cls(self.embedder.dim)
+        self._keys: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._aliases: Dict[str, str] = {}
+        self._dedup_counters = dict.fromkeys(('checked', 'candidates', 'merged'), 0)
+        self._wal = WriteAheadLog(
+            self.persist_path + ".wal",
+            sync_every=sync_every,
+            sync_interval=sync_interval
+        )
+        self._snapshot_bytes = 0
+        self._compaction: Optional[threading.Thread] = None
+        self._sharded: Optional[ShardedSearcher] = None
+        self._dirty_rows: set = set()
+        self._published = False
         self._load_from_disk()
+        if shards > 1:
+            self._sharded = ShardedSearcher(self.embedder.dim, shards)
     
-    def add(self, key: str, value: Any, metadata: Optional[Dict] = None) -> None:
-        """Add item to persistent memory"""
-        self.data[key] = value
-        self.metadata[key] = {
-            **(metadata or {}),
-            'timestamp': datetime.now().isoformat()
-        }
-        self._save_to_disk()
+    @property
+    def data(self) -> Mapping:
+        """Read-only view of stored values"""
+        return _EntryView(self._entries, "value")
+    
+    @property
+    def metadata(self) -> Mapping:
+        """Read-only view of stored metadata (dicts are built on access)"""
+        return _EntryView(self._entries, "metadata")
+    
+    def add(
+        self,
+        key: str,
+        value: Any,
+        metadata: Optional[Dict] = None,
+        created: Optional[float] = None
+    ) -> None:
+        """Add item to persistent memory, optionally with its original creation time (epoch seconds)"""
+        entry = MemoryEntry(value, metadata, created)
+        if self.dedup is None or key in self._entries:
+            self._store(key, entry)
+            return
+        
+        vectors = self.embedder.embed([_dedup_text(value)])
+        codes = self.dedup.signatures(vectors)
+        target = self._find_duplicate(vectors[0], codes[0])
+        if target is not None:
+            self._log(self._merge(key, target, entry))
+        else:
+            self._store(key, entry, codes=codes)
+    
+    def add_many(self, items: Iterable[Sequence]) -> None:
+        """Add a batch with batched embedding, one ANN update and one log write"""
+        created = time.time()
+        entries: Dict[str, MemoryEntry] = {}
+        for item in items:
+            key, value, metadata = _unpack_item(item)
+            entries[key] = MemoryEntry(value, metadata, created)
+        if not entries:
+            return
+        
+        keys = list(entries)
+        records, rows = [], []
+        for start in range(0, len(keys), 256):
+            chunk = keys[start:start + 256]
+            vectors = self.embedder.embed([_searchable_text(key, entries[key].value) for key in chunk])
+            dedup_vectors = codes = None
+            if self.dedup is not None:
+                dedup_vectors = self.embedder.embed([_dedup_text(entries[key].value) for key in chunk])
+                codes = self.dedup.signatures(dedup_vectors)
+            for i, (key, vector) in enumerate(zip(chunk, vectors)):
+                entry = entries[key]
+                if codes is not None and key not in self._entries:
+                    target = self._find_duplicate(dedup_vectors[i], codes[i])
+                    if target is not None:
+                        records.append(self._merge(key, target, entry))
+                        continue
+                self._put(key, entry)
+                rows.extend(self._embed_keys(
+                    [key], vector[None, :], codes[i:i + 1] if codes is not None else None
+                ))
+                records.append({'op': 'add', 'key': key, 'value': entry.value, 'metadata': entry.metadata})
+        self._ann_add(rows)
+        self._log_many(records)
     
     def get(self, key: str) -> Optional[Any]:
-        """Get item from memory"""
-        return self.data.get(key)
+        """Get item from memory, following near-duplicate aliases"""
+        entry = self._entries.get(key)
+        if entry is None and key in self._aliases:
+            entry = self._entries.get(self._aliases[key])
+        return entry.value if entry is not None else None
     
-    def search(self, query: str, limit: int = 10) -> List[Tuple[str, Any]]:
-        """Search with basic text matching"""
-        query_lower = query.lower()
-        results = []
-        
-        for key, value in self.data.items():
-            score = 0
-            if query_lower in key.lower():
-                score += 1
-            if isinstance(value, str) and query_lower in value.lower():
-                score += 1
-            
-            if score > 0:
-                results.append((key, value))
+    def delete(self, key: str) -> bool:
+        """Remove an item, returning whether it existed"""
+        if key not in self._entries:
+            if self._aliases.pop(key, None) is None:
+                return False
+            self._log({'op': 'delete', 'key': key})
+            return True
+        
+        self._drop(key)
+        self._log({'op': 'delete', 'key': key})
+        return True
+    
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> List[Tuple[str, Any]]:
+        """Semantic search: entries ranked by cosine similarity to the query"""
+        return self.search_batch([query], limit, where=where, since=since, until=until)[0]
+    
+    def search_many(
+        self,
+        queries: Iterable[str],
+        limit: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> List[List[Tuple[str, Any]]]:
+        """Several searches sharing one embedding call and one matrix product"""
+        return self.search_batch(list(queries), limit, where=where, since=since, until=until)
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        limit: int = 10,
+        exact: bool = False,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> List[List[Tuple[str, Any]]]:
+        """
+        Semantic search for several queries, through the ANN index when trained.
         
-        return results[:limit]
+        ``where`` (metadata equality) and ``since``/``until`` (timestamp range)
+        are resolved through the metadata index first, and only the matching
+        rows are scored.
+        """
+        if not queries:
+            return []
+        if len(self._matrix) == 0:
+            return [[] for _ in queries]
+        
+        candidates = None
+        if where or since is not None or until is not None:
+            self._ensure_indexes()
+            candidates = self._meta_index.match(where, since, until)
+            if not candidates:
+                return [[] for _ in queries]
+        
+        vectors = self.embedder.embed(queries)
+        k = max(limit, self.rerank)
+        if candidates is not None:
+            hits = self._filtered_hits(vectors, k, candidates)
+        elif self.ann is not None and self.ann.trained and not exact:
+            hits = self.ann.search(vectors, k, self._matrix)
+        else:
+            hits = self._exact_hits(vectors, k)
+        if self.rerank:
+            hits = [self._rerank(vector, rows, limit) for vector, (rows, _) in zip(vectors, hits)]
+        
+        return [
+            [(self._keys[row], self._entries[self._keys[row]].value) for row, score in zip(rows, scores) if score > 0]
+            for rows, scores in hits
+        ]
+    
+    def rebuild_index(self) -> None:
+        """Retrain the ANN centroids on the current vectors and reassign every row"""
+        if self.ann is None or len(self._matrix) == 0:
+            return
+        self.ann.train(self._matrix.get())
+        # Assign in blocks so quantized storage is never fully dequantized at once
+        for start in range(0, len(self._matrix), 16384):
+            rows = np.arange(start, min(start + 16384, len(self._matrix)))
+            self.ann.add(rows, self._matrix.get(rows))
+    
+    def keyword_search(self, query: str, limit: int = 10) -> List[Tuple[str, Any]]:
+        """Ranked keyword search (BM25) over keys and string values"""
+        self._ensure_indexes()
+        return [(key, self._entries[key].value) for key, _ in self._index.search(query, limit)]
     
     def clear(self) -> None:
         """Clear all memory"""
-        self.data.clear()
-        self.metadata.clear()
-        self._save_to_disk()
+        self._entries.clear()
+        self._index.clear()
+        self._meta_index.clear()
+        self._index_ready = True
+        self._matrix.clear()
+        self._keys.clear()
+        self._rows.clear()
+        self._aliases.clear()
+        if self.dedup is not None:
+            self.dedup.clear()
+        if self.ann is not None:
+            self.ann.clear()
+        self._log({'op': 'clear'})
     
-    def _save_to_disk(self):
-        """Save to disk"""
-        import json
+    def compact(self, wait: bool = True) -> None:
+        """Fold the write-ahead log into a fresh snapshot"""
+        if self._compaction is not None and self._compaction.is_alive():
+            if wait:
+                self._compaction.join()
+            return
+        
         try:
-            with open(self.persist_path, 'w') as f:
-                json.dump({
-                    'data': self.data,
-                    'metadata': self.metadata
-                }, f, indent=2)
-        except Exception:
-            pass  # Silent fail for demo
+            self._wal.rotate()
+        except OSError as e:
+            logger.warning(f"Memory log rotation failed: {e}")
+            return
+        
+        # Copies pin the current state; later writes go to the new log
+        keys = list(self._keys)
+        snapshot = {
+            'format': 2,
+            'embedder': self.embedder.signature(),
+            'storage': self._matrix.kind,
+            'keys': keys,
+            'values': [self._entries[key].value for key in keys],
+            'metadata': [self._entries[key].fields for key in keys],
+            'created': [self._entries[key].created for key in keys],
+            'aliases': dict(self._aliases)
+        }
+        vectors = self._matrix.copy()
+        ann_state = None
+        if self.ann is not None and self.ann.trained:
+            ann_state = (keys, self.ann.labels(len(keys)))
+        self._compaction = threading.Thread(
+            target=self._write_snapshot, args=(snapshot, vectors, ann_state), daemon=True
+        )
+        self._compaction.start()
+        if wait:
+            self._compaction.join()
+    
+    def dedup_stats(self) -> Dict[str, int]:
+        """Near-duplicate counters: adds checked, candidates verified, merges and live aliases"""
+        return {**self._dedup_counters, 'aliases': len(self._aliases)}
+    
+    def close(self) -> None:
+        """Flush pending log records, wait for any compaction and stop shard workers"""
+        if self._compaction is not None:
+            self._compaction.join()
+        self._wal.close()
+        if self._sharded is not None:
+            self._sharded.close()
+    
+    def _log(self, record: Dict[str, Any]) -> None:
+        """Append a mutation to the write-ahead log"""
+        self._log_many([record])
+    
+    def _log_many(self, records: List[Dict[str, Any]]) -> None:
+        """Append mutations to the write-ahead log in one write"""
+        try:
+            self._wal.append_many(records)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Memory log write failed: {e}")
+            return
+        
+        if self._wal.size >= max(self.compact_bytes, self._snapshot_bytes):
+            self.compact(wait=False)
+    
+    @property
+    def _ann_path(self) -> str:
+        return self.persist_path + ".ivf.npz"
+    
+    def _vectors_prefix(self, generation: str) -> str:
+        return f"{self.persist_path}.vectors.{generation}"
+    
+    def _write_snapshot(
+        self,
+        snapshot: Dict[str, Any],
+        vectors: EmbeddingMatrix,
+        ann_state: Optional[Tuple] = None
+    ) -> None:
+        """Write the vector file, ANN state and sidecar, then drop the log segment they cover"""
+        try:
+            generation = f"{time.time_ns():x}"
+            prefix = self._vectors_prefix(generation)
+            # Spare rows let a reopened memory append in place before reallocating
+            vectors.save(prefix, spare=max(1024, len(vectors) // 8))
+            snapshot['vectors'] = os.path.basename(prefix)
+            if ann_state is not None:
+                self.ann.save(self._ann_path, *ann_state)
+            
+            payload = json.dumps(snapshot, separators=(',', ':'), default=str)
+            write_atomic(self.persist_path, payload)
+            self._wal.discard_rotated()
+            self._snapshot_bytes = len(payload)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Memory snapshot failed: {e}")
+            return
+        
+        for path in glob.glob(glob.escape(self.persist_path) + ".vectors.*.npy"):
+            if not path.startswith(prefix + "."):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # Still mapped elsewhere on some platforms
     
     def _load_from_disk(self):
-        """Load from disk"""
-        import json
+        """Map the snapshot's vectors, load its sidecar and replay the write-ahead log"""
         try:
             with open(self.persist_path, 'r') as f:
                 saved = json.load(f)
-                self.data = saved.get('data', {})
-                self.metadata = saved.get('metadata', {})
+            self._snapshot_bytes = os.path.getsize(self.persist_path)
         except (FileNotFoundError, json.JSONDecodeError):
-            pass  # Start fresh
\ No newline at end of file
+            saved = {}  # Start fresh
+        
+        if saved.get('format') == 2:
+            keys = saved['keys']
+            if 'created' in saved:
+                self._entries = {
+                    key: MemoryEntry(value, fields, created)
+                    for key, value, fields, created
+                    in zip(keys, saved['values'], saved['metadata'], saved['created'])
+                }
+            else:
+                self._entries = {
+                    key: MemoryEntry.from_metadata(value, meta)
+                    for key, value, meta in zip(keys, saved['values'], saved['metadata'])
+                }
+            self._aliases = dict(saved.get('aliases', {}))
+            self._map_vectors(saved)
+        else:
+            legacy_metadata = saved.get('metadata', {})
+            self._entries = {
+                key: MemoryEntry.from_metadata(value, legacy_metadata.get(key))
+                for key, value in saved.get('data', {}).items()
+            }
+        
+        replayed = set()
+        for record in self._wal.replay():
+            if record.get('op') == 'add':
+                self._entries[record['key']] = MemoryEntry.from_metadata(
+                    record['value'], record.get('metadata')
+                )
+                self._aliases.pop(record['key'], None)
+                replayed.add(record['key'])
+            elif record.get('op') == 'merge':
+                target = self._entries.get(record['into'])
+                if target is not None:
+                    merged = MemoryEntry.from_metadata(None, record.get('metadata'))
+                    target.extra, target.created = merged.extra, merged.created
+                    self._aliases[record['key']] = record['into']
+            elif record.get('op') == 'delete':
+                self._entries.pop(record['key'], None)
+                self._aliases.pop(record['key'], None)
+            elif record.get('op') == 'clear':
+                self._entries.clear()
+                self._aliases.clear()
+                replayed.clear()
+        
+        for key in [key for key in self._keys if key not in self._entries]:
+            self._remove_row(key)
+        pending = [key for key in self._entries if key in replayed or key not in self._rows]
+        for start in range(0, len(pending), 256):
+            self._embed_keys(pending[start:start + 256])
+        
+        # Keyword and metadata indexes are built on first use so cold start stays cheap
+        self._index_ready = not self._entries
+        self._restore_ann()
+        self._restore_dedup()
+    
+    def _map_vectors(self, saved: Dict[str, Any]) -> None:
+        """Memory-map the snapshot's vector files (copy-on-write) if they match the sidecar"""
+        matrix_cls = MATRIX_KINDS.get(saved.get('storage', 'float32'))
+        if (saved.get('embedder') != self.embedder.signature() or not saved.get('vectors')
+                or matrix_cls is None):
+            return
+        prefix = os.path.join(os.path.dirname(os.path.abspath(self.persist_path)), saved['vectors'])
+        if prefix.endswith('.npy'):
+            prefix = prefix[:-4]  # Sidecars written before storage kinds existed
+        keys = saved['keys']
+        try:
+            matrix = matrix_cls.load(prefix, len(keys))
+        except (OSError, ValueError):
+            return
+        if matrix.dim != self.embedder.dim:
+            return
+        
+        if matrix_cls is not self._matrix_cls:
+            # Storage setting changed: convert rather than re-embed every entry
+            converted = self._matrix_cls(matrix.dim, len(keys) + 1024)
+            for start in range(0, len(keys), 16384):
+                converted.append(matrix.get(np.arange(start, min(start + 16384, len(keys)))))
+            matrix = converted
+        self._matrix = matrix
+        self._keys = list(keys)
+        self._rows = {key: row for row, key in enumerate(keys)}
+    
+    def _exact_hits(self, vectors: np.ndarray, limit: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Brute-force top-k, fanned out to shard workers when sharding is enabled"""
+        if self._sharded is None:
+            hits = []
+            for row_scores in self._matrix.scores(vectors):
+                best = top_k(row_scores, limit)
+                hits.append((best, row_scores[best]))
+            return hits
+        
+        count = len(self._matrix)
+        if not self._published or len(self._dirty_rows) > max(1024, count // 20):
+            self._sharded.publish(self._matrix.get())
+            self._dirty_rows.clear()
+            self._published = True
+        
+        # Rows written since the last publish are stale in the shards: score them here
+        dirty = np.array(sorted(row for row in self._dirty_rows if row < count), dtype=np.int64)
+        local = self._matrix.scores(vectors, dirty) if len(dirty) else None
+        hits = []
+        for i, (rows, scores) in enumerate(self._sharded.search(vectors, limit + len(dirty))):
+            keep = (rows < count) & ~np.isin(rows, dirty)
+            rows, scores = rows[keep], scores[keep]
+            if local is not None:
+                rows = np.concatenate([rows, dirty])
+                scores = np.concatenate([scores, local[i]])
+            best = top_k(scores, limit)
+            hits.append((rows[best], scores[best]))
+        return hits
+    
+    def _store(
+        self,
+        key: str,
+        entry: MemoryEntry,
+        vectors: Optional[np.ndarray] = None,
+        codes: Optional[np.ndarray] = None
+    ) -> None:
+        """Insert an entry record as given, indexing and logging it"""
+        self._put(key, entry)
+        self._ann_add(self._embed_keys([key], vectors, codes))
+        self._log({'op': 'add', 'key': key, 'value': entry.value, 'metadata': entry.metadata})
+    
+    def _put(self, key: str, entry: MemoryEntry) -> None:
+        """Set an entry record and update the secondary indexes"""
+        self._entries[key] = entry
+        self._aliases.pop(key, None)
+        if self._index_ready:
+            self._index.add(key, _searchable_text(key, entry.value))
+            self._meta_index.add(key, entry.fields, entry.created)
+    
+    def _filtered_hits(
+        self,
+        vectors: np.ndarray,
+        limit: int,
+        keys: Iterable[str]
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Exact top-k over the rows of the given keys only"""
+        rows = np.sort(np.fromiter((self._rows[key] for key in keys), dtype=np.int64))
+        hits = []
+        for row_scores in self._matrix.scores(vectors, rows):
+            best = top_k(row_scores, limit)
+            hits.append((rows[best], row_scores[best]))
+        return hits
+    
+    def _ensure_indexes(self) -> None:
+        if self._index_ready:
+            return
+        for key, entry in self._entries.items():
+            self._index.add(key, _searchable_text(key, entry.value))
+            self._meta_index.add(key, entry.fields, entry.created)
+        self._index_ready = True
+    
+    def _restore_ann(self) -> None:
+        """Reload saved ANN assignments, assigning rows logged since the last snapshot"""
+        if self.ann is None or len(self._matrix) == 0:
+            return
+        try:
+            saved = self.ann.load(self._ann_path)
+        except (OSError, ValueError, KeyError):
+            saved = None
+        if saved is None or self.ann.centroids.shape[1] != self._matrix.dim:
+            self.ann.centroids = None
+            self._ann_add([])
+            return
+        
+        labels = np.array([saved.get(key, -1) for key in self._keys], dtype=np.int32)
+        known = np.flatnonzero(labels >= 0)
+        unknown = np.flatnonzero(labels < 0)
+        self.ann.add(known, None, labels[known])
+        self.ann.add(unknown, self._matrix.get(unknown))
+    
+    def _rerank(self, query: np.ndarray, rows: np.ndarray, limit: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Rescore candidate rows with freshly computed full-precision embeddings"""
+        if len(rows) == 0:
+            return rows, np.empty(0, dtype=np.float32)
+        texts = [_searchable_text(self._keys[row], self._entries[self._keys[row]].value) for row in rows]
+        scores = self.embedder.embed(texts) @ query
+        best = top_k(scores, limit)
+        return rows[best], scores[best]
+    
+    def _restore_dedup(self) -> None:
+        """Rebuild near-duplicate signatures from the loaded values"""
+        if self.dedup is None:
+            return
+        self.dedup.clear()
+        for start in range(0, len(self._keys), 16384):
+            keys = self._keys[start:start + 16384]
+            self.dedup.add(keys, None, self._dedup_codes(keys))
+    
+    def _find_duplicate(self, vector: np.ndarray, codes: Optional[np.ndarray] = None) -> Optional[str]:
+        """Existing key whose value embedding is within the dedup threshold of ``vector``, if any"""
+        self._dedup_counters['checked'] += 1
+        keys = self.dedup.candidates(vector, codes)
+        if not keys:
+            return None
+        self._dedup_counters['candidates'] += len(keys)
+        # Candidates are few: re-embed their values rather than keep a second matrix
+        scores = self.embedder.embed([_dedup_text(self._entries[key].value) for key in keys]) @ vector
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.dedup.threshold else None
+    
+    def _merge(self, key: str, target: str, entry: MemoryEntry) -> Dict[str, Any]:
+        """Fold a near-duplicate's metadata into an existing entry; returns the log record"""
+        existing = self._entries[target]
+        merged = MemoryEntry(existing.value, {**existing.fields, **entry.fields}, entry.created)
+        existing.extra, existing.created = merged.extra, merged.created
+        if self._index_ready:
+            self._meta_index.add(target, existing.fields, existing.created)
+        self._aliases[key] = target
+        self._dedup_counters['merged'] += 1
+        return {'op': 'merge', 'key': key, 'into': target, 'metadata': existing.metadata}
+    
+    def _embed_keys(
+        self,
+        keys: List[str],
+        vectors: Optional[np.ndarray] = None,
+        codes: Optional[np.ndarray] = None
+    ) -> List[int]:
+        """Write entries' vectors into the matrix, embedding them (and their dedup ``codes``) unless given"""
+        if vectors is None:
+            vectors = self.embedder.embed([_searchable_text(k, self._entries[k].value) for k in keys])
+        rows = []
+        for key, vector in zip(keys, vectors):
+            row = self._rows.get(key)
+            if row is None:
+                row = self._rows[key] = self._matrix.append(vector)
+                self._keys.append(key)
+            else:
+                self._matrix.set(row, vector)
+            rows.append(row)
+        if self._sharded is not None:
+            self._dirty_rows.update(rows)
+        if self.dedup is not None:
+            self.dedup.add(keys, None, codes if codes is not None else self._dedup_codes(keys))
+        return rows
+    
+    def _dedup_codes(self, keys: List[str]) -> np.ndarray:
+        """Near-duplicate signatures of entries' values (keys play no part)"""
+        return self.dedup.signatures(self.embedder.embed([_dedup_text(self._entries[k].value) for k in keys]))
+    
+    def _ann_add(self, rows: List[int]) -> None:
+        """Index new or updated rows, training the ANN index once enough exist"""
+        if self.ann is None:
+            return
+        if not self.ann.trained:
+            if len(self._matrix) >= self.ann.min_train_size:
+                self.rebuild_index()
+            return
+        if rows:
+            self.ann.add(rows, self._matrix.get(np.asarray(rows)))
+    
+    def _drop(self, key: str) -> None:
+        """Remove an entry from every in-memory structure"""
+        del self._entries[key]
+        if self._index_ready:
+            self._index.remove(key)
+            self._meta_index.remove(key)
+        self._remove_row(key)
+    
+    def _remove_row(self, key: str) -> None:
+        """Remove a key's vector, moving the last row into its place"""
+        row = self._rows.pop(key)
+        if self.ann is not None:
+            self.ann.remove(row)
+        if self.dedup is not None:
+            self.dedup.remove(key)
+        moved = self._matrix.swap_remove(row)
+        if self._sharded is not None:
+            self._dirty_rows.add(row)
+        last_key = self._keys.pop()
+        if moved is not None:
+            self._keys[row] = last_key
+            self._rows[last_key] = row
+            if self.ann is not None:
+                self.ann.move(moved, row)
+
+def _write_pending(db_path: str, pending: Dict[str, Tuple[str, str, str, str]], lock, timeout: float) -> None:
+    """Commit rows a batched SQLiteMemory still holds when it is collected or the interpreter exits"""
+    with lock:
+        if not pending:
+            return
+        conn = sqlite3.connect(db_path, timeout=timeout)
+        try:
+            with conn:
+                conn.executemany(SQLiteMemory._UPSERT, list(pending.values()))
+            pending.clear()
+        finally:
+            conn.close()
+
+def _timed_flush(ref: "weakref.ref") -> None:
+    memory = ref()
+    if memory is not None:
+        try:
+            memory.flush()
+        except sqlite3.Error as e:
+            logger.warning(f"Memory flush failed: {e}")
+        finally:
+            # Every timer is a new thread: drop its connection rather than keep one per flush
+            memory._release_connection()
+
+class SQLiteMemory(BaseMemory):
+    """
+    Durable memory in a SQLite database with an FTS5 full-text index.
+    
+    The database runs in WAL journal mode so readers never block the
+    writer, and every thread gets its own connection (the flush timer's
+    thread closes its own when done). By default every
+    add is committed; ``add_many`` writes its batch in one transaction.
+    With ``batch_size > 1`` adds are buffered and committed every
+    ``batch_size`` items, ``flush_interval`` seconds after the first
+    buffered add (by a timer), before any read, and at interpreter exit,
+    so a hard crash loses at most the current batch.
+    """
+    
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS memory ("
+        " key TEXT PRIMARY KEY, value TEXT NOT NULL, metadata TEXT NOT NULL, body TEXT NOT NULL)",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5("
+        " key, body, content='memory', content_rowid='rowid')",
+        "CREATE TRIGGER IF NOT EXISTS memory_ai AFTER INSERT ON memory BEGIN"
+        " INSERT INTO memory_fts(rowid, key, body) VALUES (new.rowid, new.key, new.body); END",
+        "CREATE TRIGGER IF NOT EXISTS memory_ad AFTER DELETE ON memory BEGIN"
+        " INSERT INTO memory_fts(memory_fts, rowid, key, body)"
+        " VALUES ('delete', old.rowid, old.key, old.body); END",
+        "CREATE TRIGGER IF NOT EXISTS memory_au AFTER UPDATE ON memory BEGIN"
+        " INSERT INTO memory_fts(memory_fts, rowid, key, body)"
+        " VALUES ('delete', old.rowid, old.key, old.body);"
+        " INSERT INTO memory_fts(rowid, key, body) VALUES (new.rowid, new.key, new.body); END",
+        "CREATE INDEX IF NOT EXISTS memory_timestamp ON memory(json_extract(metadata, '$.timestamp'))"
+    )
+    
+    _UPSERT = (
+        "INSERT INTO memory (key, value, metadata, body) VALUES (?, ?, ?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value,"
+        " metadata = excluded.metadata, body = excluded.body"
+    )
+    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        batch_size: int = 1,
+        flush_interval: float = 1.0,
+        timeout: float = 30.0
+    ):
+        self.db_path = db_path or "memory.db"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.RLock()
+        self._pending: Dict[str, Tuple[str, str, str, str]] = {}
+        self._last_flush = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+        # Commits whatever is still buffered if close() is never called
+        self._finalizer = weakref.finalize(self, _write_pending, self.db_path, self._pending, self._lock, timeout)
+        
+        conn = self._connection()
+        with conn:
+            for statement in self._SCHEMA:
+                conn.execute(statement)
+    
+    def add(self, key: str, value: Any, metadata: Optional[Dict] = None) -> None:
+        """Queue an item for the next write transaction"""
+        meta = {**(metadata or {}), 'timestamp': datetime.now().isoformat()}
+        row = (
+            key,
+            json.dumps(value, default=str),
+            json.dumps(meta, default=str),
+            _searchable_text(key, value)
+        )
+        with self._lock:
+            self._pending[key] = row
+            due = (len(self._pending) >= self.batch_size
+                   or time.monotonic() - self._last_flush >= self.flush_interval)
+            if not due and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, _timed_flush, (weakref.ref(self),))
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get item from memory"""
+        self.flush()
+        row = self._connection().execute(
+            "SELECT value FROM memory WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+    
+    def add_many(self, items: Iterable[Sequence]) -> None:
+        """Write a batch in one transaction, bypassing the add queue"""
+        timestamp = datetime.now().isoformat()
+        rows = []
+        for item in items:
+            key, value, metadata = _unpack_item(item)
+            rows.append((
+                key,
+                json.dumps(value, default=str),
+                json.dumps({**(metadata or {}), 'timestamp': timestamp}, default=str),
+                _searchable_text(key, value)
+            ))
+        
+        with self._lock:
+            self.flush()  # Keep earlier queued adds ordered before the batch
+            conn = self._connection()
+            with conn:
+                conn.executemany(self._UPSERT, rows)
+    
+    def get_many(self, keys: Iterable[str]) -> List[Optional[Any]]:
+        """Get several items with one query per 500 keys"""
+        keys = list(keys)
+        self.flush()
+        found: Dict[str, Any] = {}
+        conn = self._connection()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for key, value in conn.execute(
+                f"SELECT key, value FROM memory WHERE key IN ({placeholders})", chunk
+            ):
+                found[key] = json.loads(value)
+        return [found.get(key) for key in keys]
+    
+    def get_metadata(self, key: str) -> Optional[Dict]:
+        """Get an item's metadata"""
+        self.flush()
+        row = self._connection().execute(
+            "SELECT metadata FROM memory WHERE key = ?", (key,)
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+    
+    def delete(self, key: str) -> bool:
+        """Remove an item, returning whether it existed"""
+        self.flush()
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute("DELETE FROM memory WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+    
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> List[Tuple[str, Any]]:
+        """Ranked full-text search (FTS5 BM25), optionally restricted by metadata and timestamp"""
+        terms = tokenize(query)
+        if not terms:
+            return []
+        
+        self.flush()
+        # Quote every term so user text can never be parsed as FTS5 syntax
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in dict.fromkeys(terms))
+        clauses, params = ["memory_fts MATCH ?"], [match]
+        for field, wanted in (where or {}).items():
+            path = '$."' + str(field).replace('"', '""') + '"'
+            values = list(wanted) if isinstance(wanted, (list, tuple, set, frozenset)) else [wanted]
+            if not values:
+                return []
+            clauses.append(f"json_extract(m.metadata, ?) IN ({','.join('?' * len(values))})")
+            params.extend([path, *values])
+        if since is not None:
+            clauses.append("json_extract(m.metadata, '$.timestamp') >= ?")
+            params.append(to_iso(since))
+        if until is not None:
+            clauses.append("json_extract(m.metadata, '$.timestamp') <= ?")
+            params.append(to_iso(until))
+        
+        rows = self._connection().execute(
+            "SELECT m.key, m.value FROM memory_fts JOIN memory AS m ON m.rowid = memory_fts.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY bm25(memory_fts) LIMIT ?",
+            (*params, limit)
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+    
+    def clear(self) -> None:
+        """Clear all memory"""
+        with self._lock:
+            self._pending.clear()
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM memory")
+    
+    def size(self) -> int:
+        """Get current size"""
+        self.flush()
+        return self._connection().execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+    
+    def flush(self) -> None:
+        """Commit queued writes in a single transaction"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._pending:
+                return
+            rows = list(self._pending.values())
+            conn = self._connection()
+            with conn:
+                conn.executemany(self._UPSERT, rows)
+            self._pending.clear()
+            self._last_flush = time.monotonic()
+    
+    def close(self) -> None:
+        """Commit queued writes and close every thread's connection"""
+        self.flush()
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
+    def _release_connection(self) -> None:
+        """Close this thread's connection, if it has one"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:  # close() may have closed it already
+                self._connections.remove(conn)
+                conn.close()
+
+class TieredMemory(BaseMemory):
+    """
+    Hot/cold memory: a SimpleMemory in RAM in front of a persistent VectorMemory.
+    
+    New and recently read items live in the hot tier. With
+    ``write_through`` (the default) adds also go straight to the cold
+    tier, so they are as durable as its write-ahead log and evicting
+    them from the hot tier costs nothing. Without it, an entry is only
+    demoted into the cold tier when the hot tier evicts it (or on
+    close). A cold read promotes the entry back into the hot tier.
+    """
+    
+    def __init__(
+        self,
+        hot_size: int = 1000,
+        hot_bytes: Optional[int] = None,
+        cold: Optional[VectorMemory] = None,
+        persist_path: Optional[str] = None,
+        write_through: bool = True
+    ):
+        self.hot = SimpleMemory(max_size=hot_size, max_bytes=hot_bytes, on_evict=self._demote)
+        self.cold = cold or VectorMemory(persist_path)
+        self.write_through = write_through
+        self._dirty: set = set()  # Hot keys whose cold copy is missing or stale
+        self._counters = dict.fromkeys(
+            ('hot_hits', 'cold_hits', 'misses', 'promotions', 'demotions'), 0
+        )
+    
+    def add(self, key: str, value: Any, metadata: Optional[Dict] = None) -> None:
+        """Add item to the hot tier, writing it through to the cold tier if enabled"""
+        if self.write_through:
+            self.cold.add(key, value, metadata)
+            self._dirty.discard(key)
+        else:
+            self._dirty.add(key)
+        self.hot.add(key, value, metadata)
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get item from the hot tier, promoting it from the cold tier on a miss"""
+        value = self.hot.get(key)
+        if value is not None:
+            self._counters['hot_hits'] += 1
+            return value
+        
+        value = self.cold.get(key)
+        if value is None:
+            self._counters['misses'] += 1
+            return None
+        self._counters['cold_hits'] += 1
+        meta = self.cold.metadata.get(key)
+        if meta is None:
+            return value  # Answered through a near-duplicate alias; nothing to promote
+        self._counters['promotions'] += 1
+        entry = MemoryEntry.from_metadata(value, meta)
+        self.hot.add(key, value, entry.fields, created=entry.created)
+        return value
+    
+    def delete(self, key: str) -> bool:
+        """Remove an item from both tiers"""
+        self._dirty.discard(key)
+        in_hot = self.hot.delete(key)
+        return self.cold.delete(key) or in_hot
+    
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> List[Tuple[str, Any]]:
+        """Search both tiers, ranking the merged hits with the cold tier's embedder"""
+        hot_hits = self.hot.search(query, limit, where=where, since=since, until=until)
+        cold_hits = self.cold.search(query, limit, where=where, since=since, until=until)
+        # A cold copy is stale if the key was overwritten in the hot tier and not written back yet
+        merged = {key: value for key, value in cold_hits if key not in self._dirty}
+        merged.update(hot_hits)
+        if not merged:
+            return []
+        
+        keys = list(merged)
+        embedder = self.cold.embedder
+        texts = [_searchable_text(key, merged[key]) for key in keys]
+        scores = embedder.embed(texts) @ embedder.embed([query])[0]
+        ranked = sorted(zip(scores, range(len(keys))), reverse=True)[:limit]
+        return [(keys[i], merged[keys[i]]) for score, i in ranked if score > 0]
+    
+    def clear(self) -> None:
+        """Clear both tiers"""
+        self._dirty.clear()
+        self.hot.clear()
+        self.cold.clear()
+    
+    def size(self) -> int:
+        """Number of distinct keys across both tiers"""
+        return len(set(self.hot.access_order) | set(self.cold.data))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-tier hit rates, promotion/demotion counts and tier sizes"""
+        counters = dict(self._counters)
+        lookups = counters['hot_hits'] + counters['cold_hits'] + counters['misses']
+        counters['hot_hit_rate'] = counters['hot_hits'] / lookups if lookups else 0.0
+        counters['cold_hit_rate'] = counters['cold_hits'] / lookups if lookups else 0.0
+        counters['hot_size'] = self.hot.size()
+        counters['cold_size'] = len(self.cold.data)
+        return counters
+    
+    def close(self) -> None:
+        """Demote every unsaved hot entry, then close the cold tier"""
+        if self._dirty:
+            values, metadata = self.hot.data, self.hot.metadata
+            for key in list(self._dirty):
+                if key in values:
+                    self._write_back(key, values[key], metadata[key])
+        self._dirty.clear()
+        self.hot.clear()
+        self.cold.close()
+    
+    def _demote(self, key: str, value: Any, meta: Dict) -> None:
+        """Hot-tier eviction hook: move an unsaved entry into the cold tier"""
+        if key in self._dirty:
+            self._counters['demotions'] += 1
+            self._write_back(key, value, meta)
+    
+    def _write_back(self, key: str, value: Any, meta: Dict) -> None:
+        """Add a hot entry to the cold tier, keeping its creation time"""
+        self._dirty.discard(key)
+        entry = MemoryEntry.from_metadata(value, meta)
+        self.cold.add(key, value, entry.fields, created=entry.created)
\ No newline at end of file
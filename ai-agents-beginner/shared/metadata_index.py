@@ -0,0 +1,174 @@
+"""
+Metadata Index for AI Agent Memory - Equality postings and sorted timestamps for pre-filtering
+"""
+
+import bisect
+from datetime import datetime
+from typing import Any, Collection, Dict, Hashable, Iterator, List, Optional, Set, Tuple, Union
+
+TimeBound = Optional[Union[str, datetime, float]]
+
+def to_iso(value: TimeBound) -> Optional[str]:
+    """ISO string for a timestamp bound (ISO strings sort chronologically)"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value).isoformat()
+    return value.isoformat()
+
+def to_epoch(value: TimeBound) -> Optional[float]:
+    """Epoch seconds for a timestamp bound; naive values are local time like ``datetime.now()``"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+class _TimeWindow:
+    """
+    Keys whose timestamp lies in ``[lo, hi]``, without materializing them.
+    
+    Membership is one lookup in the key -> timestamp map, so a filter that
+    is only tested against (BM25 postings) costs nothing to build; iterating
+    walks the sorted timestamps between the bisected bounds.
+    """
+    
+    __slots__ = ("_key_time", "_timestamps", "_start", "_stop", "_lo", "_hi")
+    
+    def __init__(self, key_time: Dict[str, float], timestamps: List[Tuple[float, str]], lo: float, hi: float):
+        self._key_time = key_time
+        self._timestamps = timestamps
+        self._lo = lo
+        self._hi = hi
+        self._start = bisect.bisect_left(timestamps, (lo,))
+        self._stop = bisect.bisect_right(timestamps, (hi, "\U0010ffff"))
+    
+    def __contains__(self, key: object) -> bool:
+        timestamp = self._key_time.get(key)
+        return timestamp is not None and self._lo <= timestamp <= self._hi
+    
+    def __len__(self) -> int:
+        return max(0, self._stop - self._start)
+    
+    def __iter__(self) -> Iterator[str]:
+        timestamps = self._timestamps
+        return (timestamps[i][1] for i in range(self._start, self._stop))
+
+class MetadataIndex:
+    """
+    Secondary indexes over entry metadata.
+    
+    Every hashable metadata value gets a posting set of keys per field, and
+    epoch timestamps are kept in a sorted list, so a filter resolves to its
+    candidate keys by set intersection and bisection without visiting
+    non-matching entries.
+    """
+    
+    def __init__(self):
+        self._postings: Dict[str, Dict[Hashable, Set[str]]] = {}
+        self._fields: Dict[str, Tuple[Tuple[str, Hashable], ...]] = {}
+        self._timestamps: List[Tuple[float, str]] = []
+        self._key_time: Dict[str, float] = {}
+    
+    def __len__(self) -> int:
+        return len(self._fields)
+    
+    def add(self, key: str, metadata: Optional[Dict[str, Any]], timestamp: Optional[float] = None) -> None:
+        """Index an entry's metadata and epoch timestamp, replacing any previous version"""
+        if key in self._fields:
+            self.remove(key)
+        
+        fields = []
+        for field, value in (metadata or {}).items():
+            try:
+                self._postings.setdefault(field, {}).setdefault(value, set()).add(key)
+            except TypeError:
+                continue  # Unhashable values (lists, dicts) are not filterable
+            fields.append((field, value))
+        self._fields[key] = tuple(fields)
+        
+        if timestamp is not None:
+            bisect.insort(self._timestamps, (timestamp, key))
+            self._key_time[key] = timestamp
+    
+    def remove(self, key: str) -> None:
+        """Drop an entry if present"""
+        fields = self._fields.pop(key, None)
+        if fields is None:
+            return
+        
+        for field, value in fields:
+            values = self._postings[field]
+            keys = values[value]
+            keys.discard(key)
+            if not keys:
+                del values[value]
+                if not values:
+                    del self._postings[field]
+        
+        timestamp = self._key_time.pop(key, None)
+        if timestamp is not None:
+            i = bisect.bisect_left(self._timestamps, (timestamp, key))
+            del self._timestamps[i]
+    
+    def clear(self) -> None:
+        """Remove every entry"""
+        self._postings.clear()
+        self._fields.clear()
+        self._timestamps.clear()
+        self._key_time.clear()
+    
+    def match(
+        self,
+        where: Optional[Dict[str, Any]] = None,
+        since: TimeBound = None,
+        until: TimeBound = None
+    ) -> Optional[Collection[str]]:
+        """
+        Keys whose metadata equals every ``where`` item (a list, tuple or set
+        value matches any of its members) and whose timestamp lies in
+        ``[since, until]``. Returns None when no filter is given.
+        
+        A time range alone comes back as a lazy collection; combined with
+        ``where`` it only filters the smallest candidate set, so the keys in
+        the range are never gathered into a set of their own.
+        """
+        if not where and since is None and until is None:
+            return None
+        
+        sets = []
+        for field, wanted in (where or {}).items():
+            values = self._postings.get(field, {})
+            if isinstance(wanted, (list, tuple, set, frozenset)):
+                keys = set().union(*(values.get(v, ()) for v in wanted))
+            else:
+                try:
+                    keys = values.get(wanted, set())
+                except TypeError:
+                    keys = set()
+            if not keys:
+                return set()
+            sets.append(keys)
+        
+        window = None
+        if since is not None or until is not None:
+            window = _TimeWindow(
+                self._key_time,
+                self._timestamps,
+                -float("inf") if since is None else to_epoch(since),
+                float("inf") if until is None else to_epoch(until)
+            )
+            if not sets or not window:
+                return window if window else set()
+        
+        sets.sort(key=len)
+        if window is not None and len(window) < len(sets[0]):
+            sets.insert(0, window)  # A narrow range is the cheapest starting point
+        elif window is not None:
+            sets.append(window)
+        result = set(sets[0])
+        for keys in sets[1:]:
+            result = {key for key in result if key in keys} if keys is window else result & keys
+            if not result:
+                break
+        return result
\ No newline at end of file
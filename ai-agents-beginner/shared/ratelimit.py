@@ -0,0 +1,313 @@
+"""
+Rate Limiting for AI Agent Tools - Token buckets and concurrency caps for sync and async callers
+"""
+
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+class RateLimitExceeded(RuntimeError):
+    """A call would have waited longer than the limiter allows"""
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``rate`` tokens per second up to ``capacity``.
+    
+    ``reserve`` takes tokens immediately, letting the balance go negative,
+    and returns how long the caller must wait before proceeding; callers
+    are therefore served in arrival order and a burst is spread out
+    instead of failing. Sync callers sleep, async callers ``await``.
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def per_minute(cls, requests: float, burst: Optional[float] = None, clock=time.monotonic) -> "TokenBucket":
+        """Bucket allowing ``requests`` per minute with bursts of ``burst`` (default: one second's worth, at least 1)"""
+        return cls(requests / 60.0, burst if burst is not None else max(requests / 60.0, 1.0), clock)
+    
+    def reserve(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> Optional[float]:
+        """Take tokens and return the delay to honour, or None (taking nothing) if it exceeds ``max_wait``"""
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            delay = max(0.0, (tokens - self._tokens) / self.rate)
+            if max_wait is not None and delay > max_wait:
+                return None
+            self._tokens -= tokens
+            return delay
+    
+    def refund(self, tokens: float = 1.0) -> None:
+        """Give back tokens from a reservation that was not used"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + tokens)
+    
+    def acquire(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> bool:
+        """Block until the tokens are available; False if that would take longer than ``max_wait``"""
+        delay = self.reserve(tokens, max_wait)
+        if delay is None:
+            return False
+        if delay:
+            time.sleep(delay)
+        return True
+    
+    async def aacquire(self, tokens: float = 1.0, max_wait: Optional[float] = None) -> bool:
+        """Async counterpart of ``acquire``"""
+        delay = self.reserve(tokens, max_wait)
+        if delay is None:
+            return False
+        if delay:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.refund(tokens)
+                raise
+        return True
+
+class _Waiter:
+    """A queued acquirer: a thread's Event or a coroutine's Future"""
+    
+    __slots__ = ("granted", "event", "loop", "future")
+    
+    def __init__(self, event=None, loop=None, future=None):
+        self.granted = False
+        self.event = event
+        self.loop = loop
+        self.future = future
+
+class ConcurrencyLimit:
+    """
+    Semaphore that threads and coroutines can share.
+    
+    Slots are handed to waiters in FIFO order, whichever kind they are; an
+    async waiter is woken on its own loop through ``call_soon_threadsafe``.
+    """
+    
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._waiters: "deque[_Waiter]" = deque()
+        self._lock = threading.Lock()
+    
+    @property
+    def active(self) -> int:
+        return self._active
+    
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Take a slot, blocking up to ``timeout`` seconds"""
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return True
+            waiter = _Waiter(event=threading.Event())
+            self._waiters.append(waiter)
+        if waiter.event.wait(timeout):
+            return True
+        return self._abandon(waiter)
+    
+    async def aacquire(self, timeout: Optional[float] = None) -> bool:
+        """Async counterpart of ``acquire``"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return True
+            waiter = _Waiter(loop=loop, future=loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter.future, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return self._abandon(waiter)
+        except asyncio.CancelledError:
+            if self._abandon(waiter):
+                self.release()
+            raise
+    
+    def release(self) -> None:
+        """Free a slot, handing it straight to the oldest waiter if any"""
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            waiter = self._waiters.popleft()
+            waiter.granted = True
+        if waiter.event is not None:
+            waiter.event.set()
+        else:
+            waiter.loop.call_soon_threadsafe(self._wake, waiter.future)
+    
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Leave the queue after a timeout; True if the slot was granted meanwhile"""
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            return False
+    
+    @staticmethod
+    def _wake(future: asyncio.Future) -> None:
+        if not future.done():
+            future.set_result(True)
+
+class _Stats:
+    """Queueing-time counters for one tool"""
+    
+    __slots__ = ("calls", "queued", "rejected", "wait_total", "wait_max")
+    
+    def __init__(self):
+        self.calls = 0
+        self.queued = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "wait_mean_s": self.wait_total / self.calls if self.calls else 0.0,
+            "wait_max_s": self.wait_max
+        }
+
+class RateLimiter:
+    """
+    Global and per-tool request rates plus concurrency caps.
+    
+    A call first takes a token from the global bucket and the tool's
+    bucket, then a slot from the global and the tool's concurrency limits.
+    Waiting smooths bursts out; a call that would wait longer than
+    ``max_wait`` raises RateLimitExceeded instead. Time spent waiting is
+    recorded per tool and reported by ``stats``.
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        max_concurrent: Optional[int] = None,
+        burst: Optional[float] = None,
+        max_wait: Optional[float] = 60.0,
+        clock=time.monotonic
+    ):
+        self.max_wait = max_wait
+        self.clock = clock
+        self._bucket = TokenBucket.per_minute(requests_per_minute, burst, clock) if requests_per_minute else None
+        self._concurrency = ConcurrencyLimit(max_concurrent) if max_concurrent else None
+        self._tool_buckets: Dict[str, TokenBucket] = {}
+        self._tool_concurrency: Dict[str, ConcurrencyLimit] = {}
+        self._stats: Dict[str, _Stats] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> "RateLimiter":
+        """Global limiter enforcing ``max_requests_per_minute`` from ``load_config``"""
+        return cls(requests_per_minute=config.get("max_requests_per_minute"), **kwargs)
+    
+    def set_tool_limit(
+        self,
+        tool_name: str,
+        requests_per_minute: Optional[float] = None,
+        max_concurrent: Optional[int] = None,
+        burst: Optional[float] = None
+    ) -> None:
+        """Limit one tool on top of the global limits (None leaves that dimension unlimited)"""
+        with self._lock:
+            if requests_per_minute:
+                self._tool_buckets[tool_name] = TokenBucket.per_minute(requests_per_minute, burst, self.clock)
+            else:
+                self._tool_buckets.pop(tool_name, None)
+            if max_concurrent:
+                self._tool_concurrency[tool_name] = ConcurrencyLimit(max_concurrent)
+            else:
+                self._tool_concurrency.pop(tool_name, None)
+    
+    @contextlib.contextmanager
+    def limit(self, tool_name: str) -> Iterator[None]:
+        """Hold a rate token and concurrency slots for one call of ``tool_name``"""
+        buckets, slots = self._limits_for(tool_name)
+        start = self.clock()
+        deadline = None if self.max_wait is None else start + self.max_wait
+        for i, bucket in enumerate(buckets):
+            if not bucket.acquire(max_wait=self._remaining(deadline)):
+                self._reject(tool_name, start, buckets[:i])
+        held: List[ConcurrencyLimit] = []
+        try:
+            for slot in slots:
+                if not slot.acquire(self._remaining(deadline)):
+                    self._record(tool_name, start, rejected=True)
+                    raise RateLimitExceeded(f"No free slot for tool '{tool_name}' within {self.max_wait:g}s")
+                held.append(slot)
+            self._record(tool_name, start)
+            yield
+        finally:
+            for slot in reversed(held):
+                slot.release()
+    
+    @contextlib.asynccontextmanager
+    async def alimit(self, tool_name: str) -> AsyncIterator[None]:
+        """Async counterpart of ``limit``"""
+        buckets, slots = self._limits_for(tool_name)
+        start = self.clock()
+        deadline = None if self.max_wait is None else start + self.max_wait
+        for i, bucket in enumerate(buckets):
+            if not await bucket.aacquire(max_wait=self._remaining(deadline)):
+                self._reject(tool_name, start, buckets[:i])
+        held: List[ConcurrencyLimit] = []
+        try:
+            for slot in slots:
+                if not await slot.aacquire(self._remaining(deadline)):
+                    self._record(tool_name, start, rejected=True)
+                    raise RateLimitExceeded(f"No free slot for tool '{tool_name}' within {self.max_wait:g}s")
+                held.append(slot)
+            self._record(tool_name, start)
+            yield
+        finally:
+            for slot in reversed(held):
+                slot.release()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-tool call, queueing and rejection counters with mean/max wait in seconds"""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self._stats.items()}
+    
+    def _limits_for(self, tool_name: str) -> tuple:
+        with self._lock:
+            buckets = [b for b in (self._bucket, self._tool_buckets.get(tool_name)) if b is not None]
+            slots = [s for s in (self._concurrency, self._tool_concurrency.get(tool_name)) if s is not None]
+        return buckets, slots
+    
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - self.clock())
+    
+    def _reject(self, tool_name: str, start: float, taken: List[TokenBucket]) -> None:
+        """Give back tokens already taken for a call that cannot proceed, then raise"""
+        for bucket in taken:
+            bucket.refund()
+        self._record(tool_name, start, rejected=True)
+        raise RateLimitExceeded(f"Rate limit for tool '{tool_name}' would exceed {self.max_wait:g}s of waiting")
+    
+    def _record(self, tool_name: str, start: float, rejected: bool = False) -> None:
+        waited = self.clock() - start
+        with self._lock:
+            stats = self._stats.get(tool_name)
+            if stats is None:
+                stats = self._stats[tool_name] = _Stats()
+            if rejected:
+                stats.rejected += 1
+                return
+            stats.calls += 1
+            stats.wait_total += waited
+            stats.wait_max = max(stats.wait_max, waited)
+            if waited > 0.001:
+                stats.queued += 1
\ No newline at end of file
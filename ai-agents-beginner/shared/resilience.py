@@ -0,0 +1,399 @@
+"""
+Resilience for AI Agent Dependencies - Jittered retries, retry budgets and circuit breakers
+"""
+
+import asyncio
+import functools
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+class CircuitOpenError(RuntimeError):
+    """A call was refused because its dependency's circuit breaker is open"""
+
+def is_error_result(result: Any) -> bool:
+    """Default failure test for results: the repo's ``{"error": ..., "success": False}`` dicts"""
+    return isinstance(result, dict) and result.get("success") is False
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probing.
+    
+    ``failure_threshold`` failures in a row open the circuit and calls are
+    refused for ``reset_timeout`` seconds. The breaker then goes half-open
+    and lets up to ``half_open_max_calls`` probes through at a time; a
+    successful probe closes it, a failed one opens it for another timeout.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock=time.monotonic
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.transitions: Dict[str, int] = {self.OPEN: 0, self.HALF_OPEN: 0, self.CLOSED: 0}
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+    
+    def allow(self) -> bool:
+        """Whether a call may go ahead now; a True in half-open state takes a probe slot"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            return False
+    
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            if self._state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                self._move(self.CLOSED)
+    
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                self._open()
+            elif self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                self._open()
+    
+    def release(self) -> None:
+        """Give back a probe slot taken by ``allow`` for a call that recorded nothing"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+    
+    def retry_after(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 when not open)"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state != self.OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - self.clock())
+    
+    def _open(self) -> None:
+        self._opened_at = self.clock()
+        self._probes = 0
+        self._move(self.OPEN)
+    
+    def _maybe_half_open(self) -> None:
+        if self._state == self.OPEN and self.clock() - self._opened_at >= self.reset_timeout:
+            self._probes = 0
+            self._move(self.HALF_OPEN)
+    
+    def _move(self, state: str) -> None:
+        self._state = state
+        self.transitions[state] += 1
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of recent calls.
+    
+    Over a sliding ``window`` of seconds, retries may add at most ``ratio``
+    of the first attempts made, plus ``min_per_second`` so that a quiet
+    dependency can still be retried. When a dependency fails for everyone,
+    the retries it receives stay bounded instead of multiplying the load.
+    """
+    
+    def __init__(self, ratio: float = 0.2, min_per_second: float = 1.0, window: float = 10.0, clock=time.monotonic):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self.clock = clock
+        self._buckets: "deque[list]" = deque()  # [second, calls, retries], oldest first
+        self._calls = 0
+        self._retries = 0
+        self._lock = threading.Lock()
+    
+    def record_call(self) -> None:
+        with self._lock:
+            self._bucket()[1] += 1
+            self._calls += 1
+    
+    def try_retry(self) -> bool:
+        """Spend one retry if the budget allows it"""
+        with self._lock:
+            bucket = self._bucket()
+            if self._retries + 1 > self.ratio * self._calls + self.min_per_second * self.window:
+                return False
+            bucket[2] += 1
+            self._retries += 1
+            return True
+    
+    def _bucket(self) -> list:
+        """Current one-second bucket, after dropping those older than the window"""
+        now = int(self.clock())
+        while self._buckets and self._buckets[0][0] <= now - self.window:
+            _, calls, retries = self._buckets.popleft()
+            self._calls -= calls
+            self._retries -= retries
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+        return self._buckets[-1]
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+    
+    Attempt ``n`` (counting retries from 0) sleeps a uniform random time in
+    ``[0, min(max_delay, base_delay * multiplier ** n)]``, which spreads
+    the retries of many agents apart instead of synchronizing them.
+    """
+    
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        base_delay: float = 0.1,
+        max_delay: float = 5.0,
+        multiplier: float = 2.0,
+        rng: Optional[random.Random] = None
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self._rng = rng or random.Random()
+    
+    def backoff(self, retry: int) -> float:
+        """Seconds to wait before retry number ``retry`` (0-based)"""
+        return self._rng.uniform(0.0, min(self.max_delay, self.base_delay * self.multiplier ** retry))
+
+class _Dependency:
+    """Breaker, budget and counters for one downstream dependency"""
+    
+    __slots__ = ("breaker", "budget", "counters")
+    
+    def __init__(self, breaker: CircuitBreaker, budget: RetryBudget):
+        self.breaker = breaker
+        self.budget = budget
+        self.counters = {
+            "calls": 0, "successes": 0, "failures": 0, "retries": 0,
+            "short_circuited": 0, "budget_exhausted": 0
+        }
+
+class Resilience:
+    """
+    Retries and circuit breaking for calls to named dependencies.
+    
+    Every dependency (a tool, an LLM endpoint, an HTTP API) gets its own
+    CircuitBreaker and RetryBudget, created on first use from the settings
+    given here. A call fails when it raises or when ``is_failure`` says its
+    result is an error; failed calls are retried with the policy's jittered
+    backoff while attempts, the budget and the breaker allow it. A call to
+    an open circuit raises CircuitOpenError without touching the dependency.
+    """
+    
+    def __init__(
+        self,
+        retry: Optional[RetryPolicy] = None,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        budget_ratio: float = 0.2,
+        budget_min_per_second: float = 1.0,
+        budget_window: float = 10.0,
+        clock=time.monotonic
+    ):
+        self.retry = retry or RetryPolicy()
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.budget_ratio = budget_ratio
+        self.budget_min_per_second = budget_min_per_second
+        self.budget_window = budget_window
+        self.clock = clock
+        self._dependencies: Dict[str, _Dependency] = {}
+        self._lock = threading.Lock()
+    
+    def breaker(self, dependency: str) -> CircuitBreaker:
+        """The circuit breaker guarding ``dependency``"""
+        return self._dependency(dependency).breaker
+    
+    def call(
+        self,
+        dependency: str,
+        fn: Callable[[], Any],
+        retry: bool = True,
+        is_failure: Callable[[Any], bool] = is_error_result,
+        ignore: Tuple[Type[BaseException], ...] = ()
+    ) -> Any:
+        """
+        Run ``fn()`` for ``dependency`` under its breaker, retrying failures if ``retry``.
+        
+        Exceptions listed in ``ignore`` are raised straight through without
+        counting against the dependency. When retries run out the last
+        failing result is returned, or the last exception re-raised.
+        """
+        dep = self._dependency(dependency)
+        self._admit(dependency, dep)
+        attempt = 0
+        while True:
+            outcome = self._attempt(dep, fn, is_failure, ignore)
+            delay = self._next_delay(dep, outcome, attempt, retry)
+            if delay is None:
+                return self._settle(outcome)
+            time.sleep(delay)
+            attempt += 1
+            if not dep.breaker.allow():
+                return self._settle(outcome)
+    
+    async def acall(
+        self,
+        dependency: str,
+        fn: Callable[[], Awaitable[Any]],
+        retry: bool = True,
+        is_failure: Callable[[Any], bool] = is_error_result,
+        ignore: Tuple[Type[BaseException], ...] = ()
+    ) -> Any:
+        """Async counterpart of ``call``: ``fn`` returns an awaitable and backoff awaits"""
+        dep = self._dependency(dependency)
+        self._admit(dependency, dep)
+        attempt = 0
+        while True:
+            outcome = await self._aattempt(dep, fn, is_failure, ignore)
+            delay = self._next_delay(dep, outcome, attempt, retry)
+            if delay is None:
+                return self._settle(outcome)
+            await asyncio.sleep(delay)
+            attempt += 1
+            if not dep.breaker.allow():
+                return self._settle(outcome)
+    
+    def wrap(self, dependency: str, **options) -> Callable[[Callable], Callable]:
+        """Decorator running a function (sync or async) through ``call``/``acall``, e.g. an LLM client call"""
+        def decorate(fn: Callable) -> Callable:
+            if asyncio.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def async_wrapper(*args, **kwargs):
+                    return await self.acall(dependency, functools.partial(fn, *args, **kwargs), **options)
+                return async_wrapper
+            
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return self.call(dependency, functools.partial(fn, *args, **kwargs), **options)
+            return wrapper
+        return decorate
+    
+    def stats(self) -> Dict[str, Any]:
+        """Per-dependency breaker state, transitions and call/retry/rejection counters"""
+        with self._lock:
+            dependencies = list(self._dependencies.items())
+        return {
+            name: {
+                **dep.counters,
+                "state": dep.breaker.state,
+                "opened": dep.breaker.transitions[CircuitBreaker.OPEN]
+            }
+            for name, dep in dependencies
+        }
+    
+    def _dependency(self, name: str) -> _Dependency:
+        with self._lock:
+            dep = self._dependencies.get(name)
+            if dep is None:
+                breaker = CircuitBreaker(
+                    self.failure_threshold, self.reset_timeout, self.half_open_max_calls, self.clock
+                )
+                budget = RetryBudget(self.budget_ratio, self.budget_min_per_second, self.budget_window, self.clock)
+                dep = self._dependencies[name] = _Dependency(breaker, budget)
+            return dep
+    
+    def _admit(self, name: str, dep: _Dependency) -> None:
+        """Count a new call and raise CircuitOpenError if the breaker refuses it"""
+        if not dep.breaker.allow():
+            with self._lock:
+                dep.counters["short_circuited"] += 1
+            raise CircuitOpenError(
+                f"Circuit for '{name}' is open; retry in {dep.breaker.retry_after():.1f}s"
+            )
+        dep.budget.record_call()
+        with self._lock:
+            dep.counters["calls"] += 1
+    
+    def _attempt(self, dep: _Dependency, fn: Callable[[], Any], is_failure, ignore) -> tuple:
+        """Run one attempt and record it; returns (failed, result, exception)"""
+        try:
+            result = fn()
+        except ignore:
+            dep.breaker.release()
+            raise
+        except Exception as e:
+            outcome = (True, None, e)
+        except BaseException:
+            dep.breaker.release()
+            raise
+        else:
+            outcome = (is_failure(result), result, None)
+        self._record(dep, outcome[0])
+        return outcome
+    
+    async def _aattempt(self, dep: _Dependency, fn: Callable[[], Awaitable[Any]], is_failure, ignore) -> tuple:
+        """Async counterpart of ``_attempt``; cancellation records nothing"""
+        try:
+            result = await fn()
+        except ignore:
+            dep.breaker.release()
+            raise
+        except Exception as e:
+            outcome = (True, None, e)
+        except BaseException:
+            dep.breaker.release()
+            raise
+        else:
+            outcome = (is_failure(result), result, None)
+        self._record(dep, outcome[0])
+        return outcome
+    
+    def _record(self, dep: _Dependency, failed: bool) -> None:
+        if failed:
+            dep.breaker.record_failure()
+        else:
+            dep.breaker.record_success()
+        with self._lock:
+            dep.counters["failures" if failed else "successes"] += 1
+    
+    def _next_delay(self, dep: _Dependency, outcome: tuple, attempt: int, retry: bool) -> Optional[float]:
+        """Backoff before the next attempt, or None when the call is settled"""
+        if not outcome[0] or not retry or attempt + 1 >= self.retry.max_attempts:
+            return None
+        if dep.breaker.state == CircuitBreaker.OPEN:
+            return None
+        if not dep.budget.try_retry():
+            with self._lock:
+                dep.counters["budget_exhausted"] += 1
+            return None
+        with self._lock:
+            dep.counters["retries"] += 1
+        return self.retry.backoff(attempt)
+    
+    @staticmethod
+    def _settle(outcome: tuple) -> Any:
+        failed, result, error = outcome
+        if error is not None:
+            raise error
+        return result
\ No newline at end of file
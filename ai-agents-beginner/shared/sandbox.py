@@ -0,0 +1,229 @@
+"""
+Tool Sandbox for AI Agents - Warm worker processes with CPU, memory and wall-clock limits
+"""
+
+import math
+import multiprocessing as mp
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+import weakref
+from typing import Any, Dict, List, Optional
+
+def _set_cpu_budget(seconds: float) -> None:
+    """Let this process use ``seconds`` more CPU time before the kernel sends SIGXCPU"""
+    import resource  # POSIX only; imported here so the package still imports on Windows
+    
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    limit = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+def _sandbox_worker(conn, cpu_seconds: float) -> None:
+    """Worker loop: run tool calls sent by the parent, one at a time"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C is the parent's to handle
+    tools: Dict[int, Any] = {}
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == "load":
+                tools[message[1]] = pickle.loads(message[2])
+                continue
+            if message[0] != "call":
+                break
+            _, token, payload, kwargs = message
+            if payload is not None:
+                tools[token] = pickle.loads(payload)
+            
+            _set_cpu_budget(cpu_seconds)
+            try:
+                result = tools[token].execute(**kwargs)
+                pickle.dumps(result)  # Fail here, not in send(), on unpicklable results
+                conn.send(("ok", result))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+
+def _rss_bytes(pid: int) -> int:
+    """Resident set size of a process, 0 if it cannot be read"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class _Worker:
+    """One sandbox process and the tools it has already unpickled"""
+    
+    __slots__ = ("process", "conn", "loaded")
+    
+    def __init__(self, ctx, cpu_seconds: float):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_sandbox_worker, args=(child_conn, cpu_seconds), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.loaded: set = set()
+    
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+def _shutdown(workers: List[_Worker]) -> None:
+    """Stop every worker process"""
+    for worker in workers:
+        try:
+            worker.conn.send(("close",))
+        except (OSError, BrokenPipeError):
+            pass
+    for worker in workers:
+        worker.process.join(timeout=2)
+        worker.kill()
+    workers.clear()
+
+class ToolSandbox:
+    """
+    Runs tool calls in a pool of warm worker processes.
+    
+    Each call gets a budget of ``cpu_seconds`` of CPU time (enforced by
+    the kernel through ``RLIMIT_CPU``), ``memory_mb`` of resident memory
+    (polled by the caller through /proc, so Linux only: pass
+    ``memory_mb=None`` elsewhere) and ``timeout`` seconds of wall-clock time.
+    A worker that breaks a limit or crashes is killed and replaced, and the
+    call gets an error result; other calls keep their own workers.
+    
+    Tools are pickled once and cached in each worker, so warm calls only
+    ship their arguments. Tools must be picklable. Workers use the "spawn"
+    start method by default, so scripts must create the sandbox under an
+    ``if __name__ == "__main__":`` guard.
+    """
+    
+    def __init__(
+        self,
+        n_workers: int = 2,
+        cpu_seconds: float = 5.0,
+        memory_mb: Optional[float] = 512,
+        timeout: float = 30.0,
+        poll_interval: float = 0.02,
+        start_method: str = "spawn"
+    ):
+        try:
+            import resource
+        except ImportError:
+            raise RuntimeError(
+                "ToolSandbox needs POSIX resource limits (Linux, or macOS with memory_mb=None); "
+                "register tools without sandboxed=True on this platform"
+            ) from None
+        if memory_mb and not os.path.exists(f"/proc/{os.getpid()}/statm"):
+            raise ValueError(
+                "memory_mb is enforced by reading /proc, which only Linux has; "
+                "pass memory_mb=None to run without a memory limit on this platform"
+            )
+        self.n_workers = n_workers
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._ctx = mp.get_context(start_method)
+        self._lock = threading.Lock()
+        self._payloads: Dict[int, bytes] = {}
+        self._tokens: Dict[int, tuple] = {}  # id(tool) -> (token, tool); holding the tool keeps its id unique
+        self._counters = {"calls": 0, "killed_cpu": 0, "killed_memory": 0, "killed_timeout": 0, "crashed": 0}
+        
+        self._workers: List[_Worker] = [_Worker(self._ctx, cpu_seconds) for _ in range(n_workers)]
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        self._finalizer = weakref.finalize(self, _shutdown, self._workers)
+    
+    def execute(self, tool, kwargs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run ``tool.execute(**kwargs)`` in a worker, returning its result or an error dict"""
+        token, payload = self._payload(tool)
+        worker = self._idle.get()
+        try:
+            result = self._call(worker, tool.name, token, payload, kwargs or {})
+        except BaseException:
+            self._idle.put(self._replace(worker))
+            raise
+        if not worker.process.is_alive():
+            worker = self._replace(worker)
+        self._idle.put(worker)
+        return result
+    
+    def warm(self, tools) -> None:
+        """Ship tools to every worker ahead of the first call (waits for busy workers)"""
+        payloads = [self._payload(tool) for tool in tools]
+        workers = [self._idle.get() for _ in range(self.n_workers)]
+        for worker in workers:
+            for token, payload in payloads:
+                if token not in worker.loaded:
+                    worker.conn.send(("load", token, payload))
+                    worker.loaded.add(token)
+            self._idle.put(worker)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Call and kill counters"""
+        with self._lock:
+            return {**self._counters, "workers": self.n_workers}
+    
+    def close(self) -> None:
+        """Stop the worker processes"""
+        self._finalizer()
+    
+    def _payload(self, tool) -> tuple:
+        """Stable token and pickled bytes for a tool"""
+        with self._lock:
+            known = self._tokens.get(id(tool))
+            if known is None:
+                known = (len(self._tokens) + 1, tool)
+                self._payloads[known[0]] = pickle.dumps(tool)
+                self._tokens[id(tool)] = known
+            return known[0], self._payloads[known[0]]
+    
+    def _call(self, worker: _Worker, name: str, token: int, payload: bytes, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        worker.conn.send(("call", token, None if token in worker.loaded else payload, kwargs))
+        worker.loaded.add(token)
+        with self._lock:
+            self._counters["calls"] += 1
+        
+        deadline = time.monotonic() + self.timeout
+        limit = self.memory_mb * 2**20 if self.memory_mb else None
+        while not worker.conn.poll(self.poll_interval):
+            if not worker.process.is_alive():
+                break
+            if limit is not None and _rss_bytes(worker.process.pid) > limit:
+                return self._killed(worker, name, "killed_memory", f"exceeded {self.memory_mb:g} MB of memory")
+            if time.monotonic() >= deadline:
+                return self._killed(worker, name, "killed_timeout", f"timed out after {self.timeout:g}s")
+        
+        try:
+            status, value = worker.conn.recv()
+        except (EOFError, OSError):
+            worker.process.join(timeout=1)
+            if hasattr(signal, "SIGXCPU") and worker.process.exitcode == -signal.SIGXCPU:
+                return self._killed(worker, name, "killed_cpu", f"exceeded {self.cpu_seconds:g}s of CPU time")
+            return self._killed(worker, name, "crashed", f"worker exited with code {worker.process.exitcode}")
+        if status == "ok":
+            return value
+        return {"error": value, "success": False}
+    
+    def _killed(self, worker: _Worker, name: str, counter: str, reason: str) -> Dict[str, Any]:
+        worker.kill()
+        with self._lock:
+            self._counters[counter] += 1
+        return {"error": f"Tool '{name}' {reason}", "success": False}
+    
+    def _replace(self, worker: _Worker) -> _Worker:
+        """Swap a dead worker for a fresh process"""
+        worker.kill()
+        fresh = _Worker(self._ctx, self.cpu_seconds)
+        with self._lock:
+            self._workers[self._workers.index(worker)] = fresh
+        return fresh
\ No newline at end of file
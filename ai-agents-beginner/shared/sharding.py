@@ -0,0 +1,176 @@
+"""
+Sharded Vector Search for AI Agent Memory - Multi-process top-k over shared memory
+"""
+
+import multiprocessing as mp
+import os
+import threading
+import weakref
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .embeddings import top_k
+
+def _shard_worker(conn, query_name: str, max_queries: int, dim: int) -> None:
+    """Worker loop: score queries from the shared buffer against this process's shard"""
+    query_shm = shared_memory.SharedMemory(name=query_name)
+    queries = np.ndarray((max_queries, dim), dtype=np.float32, buffer=query_shm.buf)
+    shard_shm = None
+    block = np.zeros((0, dim), dtype=np.float32)
+    start = 0
+    
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == "attach":
+                _, name, start, count = message
+                del block
+                if shard_shm is not None:
+                    shard_shm.close()
+                shard_shm = shared_memory.SharedMemory(name=name) if count else None
+                block = (np.ndarray((count, dim), dtype=np.float32, buffer=shard_shm.buf)
+                         if count else np.zeros((0, dim), dtype=np.float32))
+                conn.send(True)
+            elif message[0] == "search":
+                _, m, k = message
+                results = []
+                if len(block):
+                    for row_scores in queries[:m] @ block.T:
+                        best = top_k(row_scores, k)
+                        results.append((best + start, row_scores[best]))
+                conn.send(results)
+            else:
+                break
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        del queries, block
+        query_shm.close()
+        if shard_shm is not None:
+            shard_shm.close()
+
+def _shutdown(processes, connections, segments) -> None:
+    """Stop workers and release every shared-memory segment"""
+    for conn in connections:
+        try:
+            conn.send(("close",))
+        except (OSError, BrokenPipeError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    for segment in segments:
+        try:
+            segment.close()
+        except BufferError:
+            pass  # A view is still alive; the mapping goes away with the process
+        try:
+            segment.unlink()
+        except FileNotFoundError:
+            pass
+    segments.clear()
+
+class ShardedSearcher:
+    """
+    Exact top-k search fanned out over worker processes.
+    
+    ``publish`` copies the matrix into one ``multiprocessing.shared_memory``
+    segment per shard, each attached by its own worker. Queries are written
+    once into a shared buffer, so only ``(count, k)`` crosses the pipes and
+    each worker returns its partial top-k for the parent to merge.
+    
+    Workers use the "spawn" start method by default (safe alongside the
+    memory's background threads), so scripts must create the searcher under
+    an ``if __name__ == "__main__":`` guard.
+    """
+    
+    def __init__(
+        self,
+        dim: int,
+        n_shards: Optional[int] = None,
+        max_queries: int = 64,
+        start_method: str = "spawn"
+    ):
+        self.dim = dim
+        self.n_shards = n_shards or os.cpu_count() or 1
+        self.max_queries = max_queries
+        self.count = 0
+        self._lock = threading.Lock()
+        self._segments: List[shared_memory.SharedMemory] = []
+        
+        ctx = mp.get_context(start_method)
+        self._query_shm = shared_memory.SharedMemory(create=True, size=max_queries * dim * 4)
+        self._queries = np.ndarray((max_queries, dim), dtype=np.float32, buffer=self._query_shm.buf)
+        self._connections = []
+        self._processes = []
+        for _ in range(self.n_shards):
+            parent_conn, child_conn = ctx.Pipe()
+            process = ctx.Process(
+                target=_shard_worker,
+                args=(child_conn, self._query_shm.name, max_queries, dim),
+                daemon=True
+            )
+            process.start()
+            self._connections.append(parent_conn)
+            self._processes.append(process)
+        
+        self._all_segments = [self._query_shm]
+        self._finalizer = weakref.finalize(
+            self, _shutdown, self._processes, self._connections, self._all_segments
+        )
+    
+    def publish(self, vectors: np.ndarray) -> None:
+        """Copy a (n, dim) matrix into fresh shard segments and hand them to the workers"""
+        with self._lock:
+            old_segments = self._segments
+            self._segments = []
+            bounds = np.linspace(0, len(vectors), self.n_shards + 1).astype(int)
+            for conn, start, end in zip(self._connections, bounds[:-1], bounds[1:]):
+                count = int(end - start)
+                name = None
+                if count:
+                    segment = shared_memory.SharedMemory(create=True, size=count * self.dim * 4)
+                    np.ndarray((count, self.dim), dtype=np.float32, buffer=segment.buf)[:] = vectors[start:end]
+                    self._segments.append(segment)
+                    self._all_segments.append(segment)
+                    name = segment.name
+                conn.send(("attach", name, int(start), count))
+            for conn in self._connections:
+                conn.recv()
+            
+            for segment in old_segments:
+                self._all_segments.remove(segment)
+                segment.close()
+                segment.unlink()
+            self.count = len(vectors)
+    
+    def search(self, queries: np.ndarray, k: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Top-k (rows, scores) per query over the published matrix"""
+        results = []
+        with self._lock:
+            for start in range(0, len(queries), self.max_queries):
+                chunk = queries[start:start + self.max_queries]
+                self._queries[:len(chunk)] = chunk
+                for conn in self._connections:
+                    conn.send(("search", len(chunk), k))
+                partials = [conn.recv() for conn in self._connections]
+                
+                for i in range(len(chunk)):
+                    parts = [p[i] for p in partials if p]
+                    if not parts:
+                        results.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                        continue
+                    rows = np.concatenate([r for r, _ in parts])
+                    scores = np.concatenate([s for _, s in parts])
+                    best = top_k(scores, k)
+                    results.append((rows[best], scores[best]))
+        return results
+    
+    def close(self) -> None:
+        """Stop the workers and free shared memory"""
+        if self._finalizer.alive:
+            del self._queries
+            self._finalizer()
\ No newline at end of file
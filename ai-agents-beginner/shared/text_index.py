@@ -0,0 +1,172 @@
+"""
+Text Index for AI Agent Memory - Incremental inverted index with BM25 ranking
+"""
+
+import heapq
+import itertools
+import math
+import re
+from collections import Counter
+from typing import Container, Dict, Hashable, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens"""
+    return _TOKEN_RE.findall(text.lower())
+
+class InvertedIndex:
+    """
+    Token-level inverted index maintained incrementally.
+    
+    Each document is indexed under a hashable id. Queries are scored with
+    Okapi BM25 and only touch the postings of the query terms, so search
+    cost depends on term frequency rather than on corpus size.
+    
+    Top-k searches use MaxScore early termination: terms are visited from
+    rarest to most common and the scan stops once no unvisited document
+    could enter the top k. Terms found in more than ``max_df_ratio`` of
+    the documents (and in more than ``common_scan_limit`` of them) are
+    treated as common: they add to the score of documents found through
+    the other terms but do not pull in documents of their own. A query made
+    only of common terms scores the ``common_scan_limit`` most recently
+    indexed documents of its rarest term.
+    """
+    
+    def __init__(self, k1: float = 1.5, b: float = 0.75, max_df_ratio: float = 0.25, common_scan_limit: int = 1000):
+        self.k1 = k1
+        self.b = b
+        self.max_df_ratio = max_df_ratio
+        self.common_scan_limit = common_scan_limit
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Tuple[str, ...]] = {}
+        self._doc_len: Dict[Hashable, int] = {}
+        self._total_len = 0
+    
+    def __len__(self) -> int:
+        return len(self._doc_len)
+    
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_len
+    
+    def add(self, doc_id: Hashable, text: str) -> None:
+        """Index a document, replacing any previous version"""
+        if doc_id in self._doc_len:
+            self.remove(doc_id)
+        
+        counts = Counter(tokenize(text))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        
+        length = sum(counts.values())
+        self._doc_terms[doc_id] = tuple(counts)
+        self._doc_len[doc_id] = length
+        self._total_len += length
+    
+    def remove(self, doc_id: Hashable) -> None:
+        """Drop a document from the index if present"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+        
+        self._total_len -= self._doc_len.pop(doc_id)
+    
+    def clear(self) -> None:
+        """Remove every document"""
+        self._postings.clear()
+        self._doc_terms.clear()
+        self._doc_len.clear()
+        self._total_len = 0
+    
+    def search(
+        self,
+        query: str,
+        limit: Optional[int] = 10,
+        candidates: Optional[Container[Hashable]] = None
+    ) -> List[Tuple[Hashable, float]]:
+        """Rank documents matching any query term, best first, optionally only among ``candidates``"""
+        n_docs = len(self._doc_len)
+        if n_docs == 0:
+            return []
+        
+        terms = []
+        for term in dict.fromkeys(tokenize(query)):
+            postings = self._postings.get(term)
+            if postings:
+                df = len(postings)
+                terms.append((math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5)), postings))
+        if not terms:
+            return []
+        if limit is None:
+            return self._score_all(terms, candidates)
+        if limit <= 0:
+            return []
+        return self._top_k(terms, limit, candidates)
+    
+    def _norms(self) -> Tuple[float, float, float]:
+        n_docs = len(self._doc_len)
+        return self.k1, self.b, self._total_len / n_docs or 1.0
+    
+    def _score_all(self, terms: List[Tuple[float, Dict[Hashable, int]]], candidates) -> List[Tuple[Hashable, float]]:
+        """Exhaustive BM25 over every posting of every term"""
+        k1, b, avg_len = self._norms()
+        scores: Dict[Hashable, float] = {}
+        for idf, postings in terms:
+            for doc_id, tf in postings.items():
+                if candidates is not None and doc_id not in candidates:
+                    continue
+                norm = k1 * (1.0 - b + b * self._doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    
+    def _top_k(
+        self,
+        terms: List[Tuple[float, Dict[Hashable, int]]],
+        limit: int,
+        candidates
+    ) -> List[Tuple[Hashable, float]]:
+        """MaxScore top-k: fully score documents term by term, rarest first, until the rest cannot compete"""
+        k1, b, avg_len = self._norms()
+        doc_len = self._doc_len
+        terms.sort(key=lambda term: term[0], reverse=True)
+        
+        common_df = max(self.max_df_ratio * len(doc_len), self.common_scan_limit)
+        seeds = [term for term in terms if len(term[1]) <= common_df]
+        capped = not seeds
+        if capped:
+            seeds = [terms[-1]]  # Only common terms: sample the rarest one
+        
+        # A term adds less than idf * (k1 + 1) to any document's score
+        remaining = sum(idf for idf, _ in seeds) * (k1 + 1.0)
+        heap: List[Tuple[float, int, Hashable]] = []
+        seen = set()
+        order = 0
+        for idf, postings in seeds:
+            remaining -= idf * (k1 + 1.0)
+            doc_ids = itertools.islice(reversed(postings), self.common_scan_limit) if capped else postings
+            for doc_id in doc_ids:
+                if doc_id in seen or (candidates is not None and doc_id not in candidates):
+                    continue
+                seen.add(doc_id)
+                norm = k1 * (1.0 - b + b * doc_len[doc_id] / avg_len)
+                score = 0.0
+                for term_idf, term_postings in terms:
+                    tf = term_postings.get(doc_id)
+                    if tf:
+                        score += term_idf * tf * (k1 + 1.0) / (tf + norm)
+                order += 1
+                # Ties keep the earlier document: it gets the larger second key
+                if len(heap) < limit:
+                    heapq.heappush(heap, (score, -order, doc_id))
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, -order, doc_id))
+            if len(heap) >= limit and heap[0][0] >= remaining:
+                break  # No document outside the scored ones can reach the top k
+        
+        return [(doc_id, score) for score, _, doc_id in sorted(heap, reverse=True)]
\ No newline at end of file
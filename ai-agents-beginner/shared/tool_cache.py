@@ -0,0 +1,202 @@
+"""
+Tool Result Cache for AI Agents - LRU/TTL cache keyed on tool name and normalized arguments
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from .cache import LRUCache
+
+def normalize_value(value: Any) -> Any:
+    """Canonical form of a tool argument: strings trimmed at both ends (inner whitespace kept), sorted dict keys"""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): normalize_value(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (list, tuple)):
+        return [normalize_value(v) for v in value]
+    return value
+
+def make_key(tool_name: str, kwargs: Dict[str, Any]) -> str:
+    """Cache key for a call: tool name plus JSON of its arguments, taken as given (already normalized)"""
+    return tool_name + ":" + json.dumps(kwargs, sort_keys=True, separators=(",", ":"), default=str)
+
+class ToolResultCache:
+    """
+    Bounded cache of successful tool results.
+    
+    Results are held as JSON text, so every hit returns a fresh dict that
+    callers may mutate, and anything that cannot be serialized is simply
+    not cached. With ``db_path`` set, a SQLite table (WAL mode) backs the
+    in-memory LRU so several processes can share results; its expiry uses
+    wall-clock time and it is pruned to ``max_disk_entries``.
+    """
+    
+    _SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS tool_cache ("
+        " key TEXT PRIMARY KEY, result TEXT NOT NULL, expires_at REAL, stored_at REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS tool_cache_stored ON tool_cache(stored_at)"
+    )
+    
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: Optional[int] = None,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 100000,
+        prune_every: int = 256,
+        timeout: float = 30.0
+    ):
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.prune_every = prune_every
+        self.timeout = timeout
+        self._memory = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._hits: Counter = Counter()
+        self._misses: Counter = Counter()
+        self._disk_hits = 0
+        self._stores = 0
+        
+        if db_path:
+            conn = self._connection()
+            with conn:
+                for statement in self._SCHEMA:
+                    conn.execute(statement)
+    
+    def get(self, tool_name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``key`` or None; ``tool_name`` only feeds the statistics"""
+        with self._lock:
+            payload = self._memory.get(key)
+        if payload is None and self.db_path:
+            payload = self._disk_get(key)
+        
+        with self._lock:
+            if payload is None:
+                self._misses[tool_name] += 1
+                return None
+            self._hits[tool_name] += 1
+        return json.loads(payload)
+    
+    def set(self, key: str, result: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Store a result, expiring after ``ttl`` seconds if given"""
+        try:
+            payload = json.dumps(result, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return
+        with self._lock:
+            self._memory.set(key, payload, ttl)
+            self._stores += 1
+            prune = self.prune_every and self._stores % self.prune_every == 0
+        if self.db_path:
+            expires_at = time.time() + ttl if ttl is not None else None
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tool_cache (key, result, expires_at, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, payload, expires_at, time.time())
+                )
+            if prune:
+                self.prune()
+    
+    def invalidate(self, tool_name: Optional[str] = None) -> None:
+        """Drop every cached result, or only those of one tool"""
+        prefix = None if tool_name is None else tool_name + ":"
+        with self._lock:
+            if prefix is None:
+                self._memory.clear()
+            else:
+                for key, _ in self._memory.items():
+                    if key.startswith(prefix):
+                        self._memory.pop(key)
+        if self.db_path:
+            conn = self._connection()
+            with conn:
+                if prefix is None:
+                    conn.execute("DELETE FROM tool_cache")
+                else:
+                    conn.execute("DELETE FROM tool_cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+    
+    def prune(self) -> int:
+        """Delete expired rows and the oldest rows beyond ``max_disk_entries``; returns rows removed"""
+        if not self.db_path:
+            return 0
+        conn = self._connection()
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM tool_cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+            overflow = conn.execute("SELECT COUNT(*) FROM tool_cache").fetchone()[0] - self.max_disk_entries
+            if overflow > 0:
+                removed += conn.execute(
+                    "DELETE FROM tool_cache WHERE key IN "
+                    "(SELECT key FROM tool_cache ORDER BY stored_at LIMIT ?)", (overflow,)
+                ).rowcount
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """Overall and per-tool hit rates plus the in-memory LRU counters"""
+        with self._lock:
+            hits, misses = sum(self._hits.values()), sum(self._misses.values())
+            per_tool = {}
+            for name in set(self._hits) | set(self._misses):
+                lookups = self._hits[name] + self._misses[name]
+                per_tool[name] = {
+                    "hits": self._hits[name],
+                    "misses": self._misses[name],
+                    "hit_rate": self._hits[name] / lookups
+                }
+            memory = self._memory.stats()
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+                "disk_hits": self._disk_hits,
+                "stores": self._stores,
+                "entries": memory["entries"],
+                "evictions": memory["evictions"],
+                "expirations": memory["expirations"],
+                "tools": per_tool
+            }
+    
+    def close(self) -> None:
+        """Close every thread's database connection"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+    
+    def _disk_get(self, key: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT result, expires_at FROM tool_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        payload, expires_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            return None
+        with self._lock:
+            # Promote with whatever lifetime the shared entry has left
+            self._memory.set(key, payload, None if expires_at is None else expires_at - now)
+            self._disk_hits += 1
+        return payload
+    
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
\ No newline at end of file
@@ -3,13 +3,40 @@ Tool System for AI Agents - Modular tools that agents can use
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any, Optional
+import asyncio
+import contextlib
+import copy
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Any, Optional, Sequence, Tuple
+import functools
+import hashlib
+import json
+import threading
 import time
 from datetime import datetime
 
+from .expr import ExpressionEngine
+from .ratelimit import RateLimiter, RateLimitExceeded
+from .resilience import Resilience, is_error_result
+from .sandbox import ToolSandbox
+from .tool_cache import ToolResultCache, make_key, normalize_value
+from .validation import ValidationError, compile_schema
+
 class BaseTool(ABC):
     """Base class for all agent tools"""
     
+    # Opt in to result caching only for tools whose output depends on the arguments alone
+    cacheable = False
+    cache_ttl: Optional[float] = None
+    # Per-tool limits applied by the registry's RateLimiter (None = unlimited)
+    rate_limit_per_minute: Optional[float] = None
+    max_concurrent: Optional[int] = None
+    # With a registry Resilience: error results of retryable tools count as dependency
+    # failures and are retried (idempotent tools only); otherwise only exceptions count.
+    # Tools sharing a ``dependency`` name share one circuit breaker (default: the tool name)
+    retryable = False
+    dependency: Optional[str] = None
+    
     def __init__(self, name: str, description: str):
         self.name = name
         self.description = description
@@ -19,6 +46,15 @@ class BaseTool(ABC):
         """Execute the tool with given arguments"""
         pass
     
+    async def aexecute(self, *args, **kwargs) -> Any:
+        """Execute without blocking the event loop (sync tools run in the loop's executor)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.execute, *args, **kwargs))
+    
+    def normalize_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Canonical arguments used for the result-cache key (default: strings trimmed, dict keys sorted)"""
+        return normalize_value(kwargs)
+    
     def get_schema(self) -> Dict[str, Any]:
         """Get JSON schema for this tool's parameters"""
         return {
@@ -35,29 +71,52 @@ class BaseTool(ABC):
         """Get parameters schema for this tool"""
         pass
 
+class AsyncTool(BaseTool):
+    """Base class for tools whose work is natively async (HTTP clients, async drivers)"""
+    
+    @abstractmethod
+    async def aexecute(self, *args, **kwargs) -> Any:
+        """Execute the tool on the running event loop"""
+        pass
+    
+    def execute(self, *args, **kwargs) -> Any:
+        """Run ``aexecute`` to completion; only valid where no event loop is running"""
+        return asyncio.run(self.aexecute(*args, **kwargs))
+
 class CalculatorTool(BaseTool):
     """Calculator tool for basic math operations"""
     
-    def __init__(self):
+    allowed_chars = frozenset('0123456789+-*/(). ')
+    cacheable = True
+    
+    def __init__(self, engine: Optional[ExpressionEngine] = None):
         super().__init__(
             name="calculator",
             description="Perform basic math calculations"
         )
+        self.engine = engine or ExpressionEngine()
     
     def execute(self, expression: str) -> Dict[str, Any]:
         """Execute a math expression safely"""
         try:
             # Simple safety check
-            allowed_chars = set('0123456789+-*/(). ')
-            if not all(c in allowed_chars for c in expression):
+            if not self.allowed_chars.issuperset(expression):
                 return {"error": "Invalid characters", "success": False}
             
-            result = eval(expression)
+            result = self.engine.evaluate(expression)
             return {"expression": expression, "result": result, "success": True}
-            
+        
         except Exception as e:
             return {"expression": expression, "error": str(e), "success": False}
     
+    def execute_many(self, expressions: List[str]) -> List[Dict[str, Any]]:
+        """Execute several expressions, one result dict per input in the same order"""
+        return [self.execute(expression) for expression in expressions]
+    
+    def normalize_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        """Key on the expression as written: inner whitespace is significant ('1 2' is not '12')"""
+        return kwargs
+    
     def get_parameters(self) -> Dict[str, Any]:
         return {
             "type": "object",
@@ -73,6 +132,8 @@ class CalculatorTool(BaseTool):
 class TimeTool(BaseTool):
     """Tool for getting current time and date"""
     
+    cacheable = False  # The answer changes every second
+    
     def __init__(self):
         super().__init__(
             name="get_time", 
@@ -111,11 +172,41 @@ class TimeTool(BaseTool):
             }
         }
 
+def _no_failure(result: Any) -> bool:
+    return False
+
 class ToolRegistry:
     """Registry to manage and execute tools"""
     
-    def __init__(self):
+    # How often a batch waiting on slow tools checks its cancel event
+    cancel_poll_interval = 0.05
+    
+    def __init__(
+        self,
+        max_workers: int = 8,
+        cache: Optional[ToolResultCache] = None,
+        use_cache: bool = True,
+        sandbox: Optional[ToolSandbox] = None,
+        coerce_arguments: bool = True,
+        rate_limiter: Optional[RateLimiter] = None,
+        resilience: Optional[Resilience] = None
+    ):
         self.tools: Dict[str, BaseTool] = {}
+        self.coerce_arguments = coerce_arguments
+        self._validators: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {}
+        self.max_workers = max_workers
+        self.cache = cache if cache is not None else (ToolResultCache() if use_cache else None)
+        self.sandbox = sandbox
+        self._sandboxed: set = set()
+        self.rate_limiter = rate_limiter
+        self.resilience = resilience
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        # Schemas are sent with every LLM request: built once, dropped on register
+        self._schema_lock = threading.Lock()
+        self._schemas: Optional[List[Dict[str, Any]]] = None
+        self._schemas_json: Optional[bytes] = None
+        self._schemas_version: Optional[str] = None
         self._register_default_tools()
     
     def _register_default_tools(self):
@@ -123,9 +214,21 @@ class ToolRegistry:
         self.register(CalculatorTool())
         self.register(TimeTool())
     
-    def register(self, tool: BaseTool):
-        """Register a new tool"""
+    def register(self, tool: BaseTool, sandboxed: bool = False):
+        """Register a new tool; ``sandboxed`` tools run in the process sandbox"""
+        if tool.name in self.tools and self.cache is not None:
+            self.cache.invalidate(tool.name)  # Results of the replaced tool are stale
         self.tools[tool.name] = tool
+        self._validators[tool.name] = compile_schema(tool.get_parameters(), self.coerce_arguments)
+        if tool.rate_limit_per_minute or tool.max_concurrent:
+            if self.rate_limiter is None:
+                self.rate_limiter = RateLimiter()
+            self.rate_limiter.set_tool_limit(tool.name, tool.rate_limit_per_minute, tool.max_concurrent)
+        if sandboxed:
+            self._sandboxed.add(tool.name)
+        else:
+            self._sandboxed.discard(tool.name)
+        self._drop_schemas()
         return self
     
     def get_tool(self, name: str) -> Optional[BaseTool]:
@@ -142,11 +245,250 @@ class ToolRegistry:
         if not tool:
             return {"error": f"Tool '{tool_name}' not found", "success": False}
         
+        kwargs, key, early = self._prepare(tool, kwargs)
+        if early is not None:
+            return early
+        
         try:
-            return tool.execute(**kwargs)
+            if self.resilience is not None:
+                result = self.resilience.call(
+                    tool.dependency or tool.name,
+                    functools.partial(self._run, tool, kwargs),
+                    **self._resilience_options(tool)
+                )
+            else:
+                result = self._run(tool, kwargs)
         except Exception as e:
             return {"error": str(e), "success": False}
+        self._cache_result(tool, key, result)
+        return result
+    
+    def execute_tools(
+        self,
+        calls: Sequence[Sequence],
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Run independent tool calls concurrently; results come back in input order.
+        
+        Each call is ``(tool_name, kwargs)`` or ``(tool_name, kwargs, timeout)``.
+        A call's timeout counts from the start of the batch, so time spent
+        queued behind ``max_workers`` busy calls is included. Calls that time
+        out, or are still pending when ``cancel`` is set, get an error result;
+        queued ones never start, while a call already running is abandoned and
+        finishes in the background.
+        """
+        if len(calls) == 1 and timeout is None and len(calls[0]) < 3 and cancel is None:
+            name, kwargs = calls[0][0], calls[0][1]
+            return [self.execute_tool(name, **(kwargs or {}))]
+        
+        pool = self._executor()
+        start = time.monotonic()
+        futures = {}
+        deadlines = []
+        for i, call in enumerate(calls):
+            name, kwargs = call[0], call[1] or {}
+            call_timeout = call[2] if len(call) > 2 else timeout
+            futures[pool.submit(self.execute_tool, name, **kwargs)] = i
+            deadlines.append(start + call_timeout if call_timeout is not None else None)
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+        pending = set(futures)
+        while pending:
+            now = time.monotonic()
+            cancelled = cancel is not None and cancel.is_set()
+            for future in list(pending):
+                i = futures[future]
+                if cancelled:
+                    reason = "cancelled"
+                elif deadlines[i] is not None and deadlines[i] <= now:
+                    reason = f"timed out after {deadlines[i] - start:g}s"
+                else:
+                    continue
+                future.cancel()
+                pending.discard(future)
+                results[i] = {"error": f"Tool '{calls[i][0]}' {reason}", "success": False}
+            if not pending:
+                break
+            
+            waits = [deadlines[futures[f]] - now for f in pending if deadlines[futures[f]] is not None]
+            if cancel is not None:
+                waits.append(self.cancel_poll_interval)
+            done, pending = wait(pending, timeout=min(waits) if waits else None, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[futures[future]] = future.result()
+        return results
+    
+    async def aexecute_tool(self, tool_name: str, **kwargs) -> Dict[str, Any]:
+        """Async counterpart of ``execute_tool``"""
+        tool = self.get_tool(tool_name)
+        if not tool:
+            return {"error": f"Tool '{tool_name}' not found", "success": False}
+        
+        kwargs, key, early = self._prepare(tool, kwargs)
+        if early is not None:
+            return early
+        
+        try:
+            if self.resilience is not None:
+                result = await self.resilience.acall(
+                    tool.dependency or tool.name,
+                    functools.partial(self._arun, tool, kwargs),
+                    **self._resilience_options(tool)
+                )
+            else:
+                result = await self._arun(tool, kwargs)
+        except Exception as e:
+            return {"error": str(e), "success": False}
+        self._cache_result(tool, key, result)
+        return result
+    
+    async def aexecute_tools(
+        self,
+        calls: Sequence[Sequence],
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async counterpart of ``execute_tools``: run the calls concurrently on the loop.
+        
+        Calls take the same ``(tool_name, kwargs[, timeout])`` form and
+        results keep input order. Cancelling the awaiting task cancels every
+        call; a sync tool already running in the executor finishes in the
+        background.
+        """
+        return list(await asyncio.gather(*(self._aexecute_call(call, timeout) for call in calls)))
+    
+    def resilience_stats(self) -> Dict[str, Any]:
+        """Per-dependency breaker state and retry counters (empty when no resilience layer is set)"""
+        return self.resilience.stats() if self.resilience is not None else {}
+    
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """Per-tool queueing time and rejections (empty when no limiter is set)"""
+        return self.rate_limiter.stats() if self.rate_limiter is not None else {}
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics of the result cache (empty when caching is off)"""
+        return self.cache.stats() if self.cache is not None else {}
+    
+    def close(self) -> None:
+        """Shut down the worker pool used by ``execute_tools``, the sandbox and the cache's database"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+            if self.sandbox is not None:
+                self.sandbox.close()
+        if self.cache is not None:
+            self.cache.close()
     
     def get_all_schemas(self) -> List[Dict[str, Any]]:
-        """Get schemas for all tools"""
-        return [tool.get_schema() for tool in self.tools.values()]
\ No newline at end of file
+        """Get schemas for all tools (a deep copy, so callers may change it freely)"""
+        return copy.deepcopy(self._build_schemas()[0])
+    
+    def get_schemas_json(self) -> bytes:
+        """All tool schemas as pre-serialized compact JSON, ready to splice into a request body"""
+        return self._build_schemas()[1]
+    
+    @property
+    def schemas_version(self) -> str:
+        """Hash of the serialized schemas; changes whenever the tool set does"""
+        return self._build_schemas()[2]
+    
+    def invalidate_schemas(self) -> None:
+        """Drop the cached schemas and validators, e.g. after changing a tool's parameters"""
+        self._drop_schemas()
+        self._validators.clear()  # Recompiled on each tool's next call
+    
+    def _drop_schemas(self) -> None:
+        """Forget the cached schemas; the next request rebuilds them"""
+        with self._schema_lock:
+            self._schemas = self._schemas_json = self._schemas_version = None
+    
+    def _build_schemas(self) -> tuple:
+        """Cached (schemas, JSON bytes, version), rebuilt after an invalidation"""
+        with self._schema_lock:
+            if self._schemas is None:
+                schemas = [tool.get_schema() for tool in self.tools.values()]
+                payload = json.dumps(schemas, separators=(",", ":"), sort_keys=True).encode("utf-8")
+                self._schemas = schemas
+                self._schemas_json = payload
+                self._schemas_version = hashlib.sha256(payload).hexdigest()[:16]
+            return self._schemas, self._schemas_json, self._schemas_version
+    
+    def _prepare(
+        self, tool: BaseTool, kwargs: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[str], Optional[Dict[str, Any]]]:
+        """Validate a call and look it up in the result cache: (arguments, cache key, error or cached result)"""
+        try:
+            kwargs = self._validator(tool)(kwargs)
+        except ValidationError as e:
+            return kwargs, None, {"error": f"Invalid arguments for tool '{tool.name}': {e}", "success": False}
+        
+        key = self._cache_key(tool, kwargs)
+        cached = self.cache.get(tool.name, key) if key is not None else None
+        return kwargs, key, cached
+    
+    def _validator(self, tool: BaseTool) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """The tool's compiled argument validator, compiled on first use if needed"""
+        validator = self._validators.get(tool.name)
+        if validator is None:
+            validator = compile_schema(tool.get_parameters(), self.coerce_arguments)
+            self._validators[tool.name] = validator
+        return validator
+    
+    def _run(self, tool: BaseTool, kwargs: Dict[str, Any]) -> Any:
+        """One attempt at a call: rate limits, then the sandbox or the tool itself"""
+        with self.rate_limiter.limit(tool.name) if self.rate_limiter else contextlib.nullcontext():
+            if tool.name in self._sandboxed:
+                return self._tool_sandbox().execute(tool, kwargs)
+            return tool.execute(**kwargs)
+    
+    async def _arun(self, tool: BaseTool, kwargs: Dict[str, Any]) -> Any:
+        """Async counterpart of ``_run``"""
+        async with self.rate_limiter.alimit(tool.name) if self.rate_limiter else contextlib.nullcontext():
+            if tool.name in self._sandboxed:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, self._tool_sandbox().execute, tool, kwargs)
+            return await tool.aexecute(**kwargs)
+    
+    @staticmethod
+    def _resilience_options(tool: BaseTool) -> Dict[str, Any]:
+        """How the resilience layer treats a tool; a local rate-limit refusal is not a dependency failure"""
+        return {
+            "retry": tool.retryable,
+            "is_failure": is_error_result if tool.retryable else _no_failure,
+            "ignore": (RateLimitExceeded,)
+        }
+    
+    def _cache_key(self, tool: BaseTool, kwargs: Dict[str, Any]) -> Optional[str]:
+        """Result-cache key for a call, or None when it must not be cached"""
+        if self.cache is None or not tool.cacheable:
+            return None
+        return make_key(tool.name, tool.normalize_kwargs(kwargs))
+    
+    def _cache_result(self, tool: BaseTool, key: Optional[str], result: Any) -> None:
+        """Remember successful results only, so transient failures are retried"""
+        if key is not None and isinstance(result, dict) and result.get("success"):
+            self.cache.set(key, result, tool.cache_ttl)
+    
+    async def _aexecute_call(self, call: Sequence, timeout: Optional[float]) -> Dict[str, Any]:
+        name, kwargs = call[0], call[1] or {}
+        call_timeout = call[2] if len(call) > 2 else timeout
+        try:
+            return await asyncio.wait_for(self.aexecute_tool(name, **kwargs), call_timeout)
+        except asyncio.TimeoutError:
+            return {"error": f"Tool '{name}' timed out after {call_timeout:g}s", "success": False}
+    
+    def _tool_sandbox(self) -> ToolSandbox:
+        """The sandbox for isolated tools, started with defaults on first use"""
+        with self._pool_lock:
+            if self.sandbox is None:
+                self.sandbox = ToolSandbox()
+            return self.sandbox
+    
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tool")
+            return self._pool
\ No newline at end of file
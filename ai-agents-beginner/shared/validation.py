@@ -0,0 +1,213 @@
+"""
+Argument Validation for AI Agent Tools - JSON schemas compiled once into fast checkers
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+Checker = Callable[[Any, str], Any]
+
+class ValidationError(ValueError):
+    """Arguments that do not match a tool's parameter schema"""
+
+_TRUE_STRINGS = {"true", "yes", "1"}
+_FALSE_STRINGS = {"false", "no", "0"}
+
+def _describe(path: str) -> str:
+    return f"'{path}'" if path else "arguments"
+
+def _type_checker(expected: str, coerce: bool) -> Checker:
+    """Checker for one JSON-schema type, optionally converting obvious LLM slips"""
+    def check_string(value, path):
+        if isinstance(value, str):
+            return value
+        if coerce and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        raise ValidationError(f"{_describe(path)} must be a string")
+    
+    def check_integer(value, path):
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if coerce and isinstance(value, str):
+            try:
+                return int(value.strip())
+            except ValueError:
+                pass
+        raise ValidationError(f"{_describe(path)} must be an integer")
+    
+    def check_number(value, path):
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        if coerce and isinstance(value, str):
+            try:
+                return float(value.strip())
+            except ValueError:
+                pass
+        raise ValidationError(f"{_describe(path)} must be a number")
+    
+    def check_boolean(value, path):
+        if isinstance(value, bool):
+            return value
+        if coerce and isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in _TRUE_STRINGS:
+                return True
+            if lowered in _FALSE_STRINGS:
+                return False
+        raise ValidationError(f"{_describe(path)} must be a boolean")
+    
+    def check_array(value, path):
+        if isinstance(value, list):
+            return value
+        if isinstance(value, tuple):
+            return list(value)
+        raise ValidationError(f"{_describe(path)} must be an array")
+    
+    def check_object(value, path):
+        if isinstance(value, dict):
+            return value
+        raise ValidationError(f"{_describe(path)} must be an object")
+    
+    def check_null(value, path):
+        if value is None:
+            return value
+        raise ValidationError(f"{_describe(path)} must be null")
+    
+    checkers = {
+        "string": check_string,
+        "integer": check_integer,
+        "number": check_number,
+        "boolean": check_boolean,
+        "array": check_array,
+        "object": check_object,
+        "null": check_null
+    }
+    return checkers.get(expected, lambda value, path: value)  # Unknown types are not checked
+
+def _compile(schema: Dict[str, Any], coerce: bool) -> Checker:
+    """Compose the checks a (sub)schema asks for into a single function"""
+    steps: List[Checker] = []
+    
+    types = schema.get("type")
+    if isinstance(types, list):
+        alternatives = [_type_checker(t, False) for t in types]
+        fallbacks = [_type_checker(t, coerce) for t in types]
+        
+        def check_union(value, path):
+            # Exact matches win over coercions, so "5" stays a string in ["string", "integer"]
+            for checker in alternatives + fallbacks:
+                try:
+                    return checker(value, path)
+                except ValidationError:
+                    continue
+            raise ValidationError(f"{_describe(path)} must be one of: {', '.join(types)}")
+        steps.append(check_union)
+    elif types is not None:
+        steps.append(_type_checker(types, coerce))
+    
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+        try:
+            allowed_set = frozenset(allowed)
+        except TypeError:
+            allowed_set = None
+        
+        def check_enum(value, path):
+            try:
+                ok = value in allowed_set if allowed_set is not None else value in allowed
+            except TypeError:
+                ok = False
+            if not ok:
+                raise ValidationError(f"{_describe(path)} must be one of {allowed}")
+            return value
+        steps.append(check_enum)
+    
+    low, high = schema.get("minimum"), schema.get("maximum")
+    if low is not None or high is not None:
+        def check_range(value, path):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                if low is not None and value < low:
+                    raise ValidationError(f"{_describe(path)} must be >= {low}")
+                if high is not None and value > high:
+                    raise ValidationError(f"{_describe(path)} must be <= {high}")
+            return value
+        steps.append(check_range)
+    
+    min_len, max_len = schema.get("minLength"), schema.get("maxLength")
+    if min_len is not None or max_len is not None:
+        def check_length(value, path):
+            if isinstance(value, str):
+                if min_len is not None and len(value) < min_len:
+                    raise ValidationError(f"{_describe(path)} must have at least {min_len} characters")
+                if max_len is not None and len(value) > max_len:
+                    raise ValidationError(f"{_describe(path)} must have at most {max_len} characters")
+            return value
+        steps.append(check_length)
+    
+    if "items" in schema:
+        item_checker = _compile(schema["items"], coerce)
+        
+        def check_items(value, path):
+            if isinstance(value, list):
+                return [item_checker(item, f"{path}[{i}]") for i, item in enumerate(value)]
+            return value
+        steps.append(check_items)
+    
+    if "properties" in schema or "required" in schema or schema.get("additionalProperties") is False:
+        steps.append(_compile_object(schema, coerce))
+    
+    if not steps:
+        return lambda value, path: value
+    if len(steps) == 1:
+        return steps[0]
+    
+    def check_all(value, path):
+        for step in steps:
+            value = step(value, path)
+        return value
+    return check_all
+
+def _compile_object(schema: Dict[str, Any], coerce: bool) -> Checker:
+    properties = {name: _compile(sub, coerce) for name, sub in schema.get("properties", {}).items()}
+    defaults = {
+        name: sub["default"] for name, sub in schema.get("properties", {}).items() if "default" in sub
+    }
+    required = tuple(schema.get("required", ()))
+    closed = schema.get("additionalProperties") is False
+    
+    def check_object(value, path):
+        if not isinstance(value, dict):
+            return value
+        prefix = f"{path}." if path else ""
+        missing = [prefix + name for name in required if name not in value]
+        if missing:
+            raise ValidationError(f"Missing required {'field' if len(missing) == 1 else 'fields'}: {', '.join(missing)}")
+        if closed:
+            unknown = [prefix + name for name in value if name not in properties]
+            if unknown:
+                raise ValidationError(f"Unexpected {'field' if len(unknown) == 1 else 'fields'}: {', '.join(unknown)}")
+        
+        result = dict(defaults)
+        for name, item in value.items():
+            checker = properties.get(name)
+            result[name] = checker(item, f"{path}.{name}" if path else name) if checker else item
+        return result
+    return check_object
+
+def compile_schema(schema: Optional[Dict[str, Any]], coerce: bool = True) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile a tool's parameter schema into ``validate(kwargs) -> kwargs``.
+    
+    The validator checks types, enums, ranges, lengths, required and
+    (with ``additionalProperties: false``) unexpected fields, fills in
+    defaults and returns a new dict; it raises ValidationError on the first
+    problem. With ``coerce`` it converts unambiguous slips such as
+    ``"5"`` for an integer or ``"true"`` for a boolean instead of rejecting.
+    Unknown keywords are ignored, so any schema compiles.
+    """
+    checker = _compile(schema or {}, coerce)
+    
+    def validate(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        return checker(kwargs, "")
+    return validate
\ No newline at end of file
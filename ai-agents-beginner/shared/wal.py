@@ -0,0 +1,131 @@
+"""
+Write-Ahead Log for AI Agent Memory - Append-only persistence with batched fsync
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator
+
+class WriteAheadLog:
+    """
+    Append-only JSON-lines log of memory mutations.
+    
+    Every record is written and flushed to the OS immediately, so a crashed
+    process loses nothing; ``fsync`` is batched every ``sync_every`` records
+    or ``sync_interval`` seconds to bound what a power loss can drop.
+    ``rotate`` moves the active log aside so a compactor can fold it into a
+    snapshot while new records keep flowing into a fresh file.
+    """
+    
+    def __init__(self, path: str, sync_every: int = 64, sync_interval: float = 1.0):
+        self.path = path
+        self.rotated_path = path + ".old"
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._file = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+    
+    @property
+    def size(self) -> int:
+        """Bytes in the active log"""
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+    
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append one record"""
+        self.append_many([record])
+    
+    def append_many(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Append several records with a single write and flush"""
+        lines = [json.dumps(record, separators=(",", ":"), default=str) + "\n" for record in records]
+        if not lines:
+            return
+        with self._lock:
+            f = self._open()
+            f.write("".join(lines))
+            f.flush()
+            self._pending += len(lines)
+            if (self._pending >= self.sync_every
+                    or time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync()
+    
+    def sync(self) -> None:
+        """Force pending records to stable storage"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+    
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """Yield records from the rotated log (if any) then the active log"""
+        for path in (self.rotated_path, self.path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue  # Torn write from a crash mid-append
+            except FileNotFoundError:
+                continue
+    
+    def rotate(self) -> None:
+        """Move the active log aside and start a fresh one"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+            if not os.path.exists(self.path):
+                return
+            if not os.path.exists(self.rotated_path):
+                os.replace(self.path, self.rotated_path)
+                return
+            # A previous compaction never finished: keep both segments
+            with open(self.rotated_path, "a", encoding="utf-8") as dst, \
+                    open(self.path, "r", encoding="utf-8") as src:
+                dst.write("\n")
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.remove(self.path)
+    
+    def discard_rotated(self) -> None:
+        """Delete the rotated log once its records are in a snapshot"""
+        try:
+            os.remove(self.rotated_path)
+        except FileNotFoundError:
+            pass
+    
+    def close(self) -> None:
+        """Sync and close the active log"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+    
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+    
+    def _sync(self) -> None:
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+def write_atomic(path: str, payload: str) -> None:
+    """Write a file through a temporary copy so readers never see partial data"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
\ No newline at end of file
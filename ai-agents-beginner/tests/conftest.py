@@ -0,0 +1,8 @@
+"""
+Test configuration - make the shared package importable when running pytest from any directory
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
\ No newline at end of file
@@ -0,0 +1,112 @@
+"""
+Restricted arithmetic engine used by CalculatorTool in place of eval
+"""
+
+import threading
+
+import pytest
+
+from shared.expr import ExpressionEngine, ExpressionError
+
+@pytest.fixture
+def engine():
+    return ExpressionEngine()
+
+@pytest.mark.parametrize("source, expected", [
+    ("2 + 3 * 4", 14),
+    ("(1 + 2) * 3", 9),
+    ("-3 + +2", -1),
+    ("7 / 2", 3.5),
+    ("7 // 2", 3),
+    ("2 ** 10", 1024),
+    ("2 ** -1", 0.5),
+    ("1.5 * 4", 6.0),
+    ("  10 - 4  ", 6)
+])
+def test_allowed_grammar(engine, source, expected):
+    assert engine.evaluate(source) == expected
+
+@pytest.mark.parametrize("source", [
+    "x",
+    "abs(-1)",
+    "__import__('os').system('true')",
+    "(1).__class__",
+    "lambda: 1",
+    "[1, 2]",
+    "'a' * 3",
+    "True + 1",
+    "1 if 1 else 2",
+    "1 < 2",
+    "7 % 2",
+    "1 << 2",
+    "~1",
+    "not 1"
+])
+def test_rejected_nodes_and_names(engine, source):
+    with pytest.raises(ExpressionError):
+        engine.evaluate(source)
+
+def test_syntax_errors_are_raised(engine):
+    with pytest.raises(SyntaxError):
+        engine.evaluate("1 +")
+
+def test_tower_of_powers_fails_fast(engine):
+    with pytest.raises(ExpressionError, match="Exponent larger than"):
+        engine.evaluate("9**9**9")
+
+def test_operation_cap():
+    engine = ExpressionEngine(max_ops=10)
+    assert engine.evaluate("+".join(["1"] * 11)) == 11
+    with pytest.raises(ExpressionError, match="more than 10 operations"):
+        engine.evaluate("+".join(["1"] * 12))
+
+def test_length_cap():
+    with pytest.raises(ExpressionError, match="longer than 5 characters"):
+        ExpressionEngine(max_length=5).evaluate("1 + 2 + 3")
+
+@pytest.mark.parametrize("source", ["2 ** 5000", "(2 ** 4000) * (2 ** 4000)"])
+def test_bit_size_cap(engine, source):
+    with pytest.raises(ExpressionError, match="exceeds 4096 bits"):
+        engine.evaluate(source)
+
+def test_complex_result_is_rejected(engine):
+    with pytest.raises(ExpressionError, match="Complex result"):
+        engine.evaluate("(-8) ** 0.5")
+
+@pytest.mark.parametrize("source, error", [
+    ("10.0 ** 400", OverflowError),
+    ("1 / 0", ZeroDivisionError)
+])
+def test_arithmetic_errors_are_remembered(engine, source, error):
+    for _ in range(2):
+        with pytest.raises(error):
+            engine.evaluate(source)
+
+def test_compilations_are_cached(engine):
+    assert engine.compile("1 + 1") is engine.compile("1 + 1")
+    assert engine.cache_info()["hits"] == 1
+
+def test_evaluate_many_keeps_errors_in_place(engine):
+    results = engine.evaluate_many(["1 + 1", "x", "1 / 0"])
+    assert results[0] == 2
+    assert isinstance(results[1], ExpressionError)
+    assert isinstance(results[2], ZeroDivisionError)
+
+def test_concurrent_first_evaluation():
+    errors = []
+    for _ in range(50):
+        compiled = ExpressionEngine().compile("2 ** 100 * 3 - 1")
+        barrier = threading.Barrier(8)
+        
+        def evaluate():
+            barrier.wait()
+            try:
+                assert compiled.evaluate() == 2 ** 100 * 3 - 1
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=evaluate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert errors == []
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Behavioural tests shared by every memory backend
+"""
+
+import os
+
+import pytest
+
+from shared.memory import SimpleMemory, SQLiteMemory, VectorMemory
+
+def _simple(tmp_path):
+    return SimpleMemory()
+
+def _vector(tmp_path):
+    return VectorMemory(persist_path=os.path.join(tmp_path, "memory.json"))
+
+def _sqlite(tmp_path):
+    return SQLiteMemory(db_path=os.path.join(tmp_path, "memory.db"))
+
+BACKENDS = [
+    pytest.param(_simple, id="simple"),
+    pytest.param(_vector, id="vector"),
+    pytest.param(_sqlite, id="sqlite")
+]
+PERSISTENT = [
+    pytest.param(_vector, id="vector"),
+    pytest.param(_sqlite, id="sqlite")
+]
+
+def _close(memory):
+    if hasattr(memory, "close"):
+        memory.close()
+
+@pytest.fixture(params=BACKENDS)
+def memory(request, tmp_path):
+    backend = request.param(str(tmp_path))
+    yield backend
+    _close(backend)
+
+def test_add_and_get(memory):
+    memory.add("pref", "User likes green tea", {"source": "chat"})
+    memory.add("data", {"n": 1})
+    assert memory.get("pref") == "User likes green tea"
+    assert memory.get("data") == {"n": 1}
+    assert memory.get("missing") is None
+
+def test_add_overwrites(memory):
+    memory.add("pref", "User likes green tea")
+    memory.add("pref", "User likes black coffee")
+    assert memory.get("pref") == "User likes black coffee"
+
+def test_search_ranks_matching_entry_first(memory):
+    memory.add("pref", "User likes green tea")
+    memory.add("city", "User lives in Lyon")
+    memory.add("job", "User works as a nurse")
+    results = memory.search("green tea", limit=2)
+    assert results
+    assert results[0] == ("pref", "User likes green tea")
+    assert len(results) <= 2
+
+def test_clear(memory):
+    memory.add("pref", "User likes green tea")
+    memory.clear()
+    assert memory.get("pref") is None
+    assert memory.search("green tea") == []
+
+@pytest.mark.parametrize("factory", PERSISTENT)
+def test_reopen_keeps_entries(factory, tmp_path):
+    memory = factory(str(tmp_path))
+    memory.add("pref", "User likes green tea")
+    memory.add("city", "User lives in Lyon")
+    _close(memory)
+    
+    reopened = factory(str(tmp_path))
+    try:
+        assert reopened.get("pref") == "User likes green tea"
+        assert reopened.search("Lyon", limit=1)[0] == ("city", "User lives in Lyon")
+    finally:
+        _close(reopened)
+
+@pytest.mark.parametrize("factory", PERSISTENT)
+def test_reopen_after_clear_is_empty(factory, tmp_path):
+    memory = factory(str(tmp_path))
+    memory.add("pref", "User likes green tea")
+    memory.clear()
+    _close(memory)
+    
+    reopened = factory(str(tmp_path))
+    try:
+        assert reopened.get("pref") is None
+    finally:
+        _close(reopened)
+
+def test_sqlite_timed_flushes_do_not_leak_connections(tmp_path):
+    memory = SQLiteMemory(db_path=os.path.join(tmp_path, "memory.db"), batch_size=100, flush_interval=0.01)
+    try:
+        opened = len(memory._connections)
+        for i in range(20):
+            memory.add(f"k{i}", f"value {i}")
+            timer = memory._timer
+            assert timer is not None
+            timer.join(5)
+            assert len(memory._connections) == opened
+        assert memory.size() == 20
+    finally:
+        memory.close()
\ No newline at end of file
@@ -0,0 +1,210 @@
+"""
+Token buckets, concurrency caps and the registry's rate limiter, driven by an injected clock
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict
+
+import pytest
+
+import shared.ratelimit
+from shared.ratelimit import ConcurrencyLimit, RateLimiter, RateLimitExceeded, TokenBucket
+from shared.tools import BaseTool, ToolRegistry
+
+class FakeClock:
+    """Monotonic clock that only moves when something sleeps on it"""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+        self.sleeps = []
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+    
+    async def asleep(self, seconds: float) -> None:
+        self.sleep(seconds)
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(shared.ratelimit.time, "sleep", clock.sleep)
+    monkeypatch.setattr(shared.ratelimit.asyncio, "sleep", clock.asleep)
+    return clock
+
+def test_burst_is_served_then_spread_out(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)  # Callers queue in arrival order
+
+def test_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+    bucket.reserve()
+    bucket.reserve()
+    clock.now += 1
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now += 100
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(1.0)
+
+def test_reserve_over_max_wait_takes_nothing(clock):
+    bucket = TokenBucket(rate=1.0, capacity=1, clock=clock)
+    bucket.reserve()
+    assert bucket.reserve(max_wait=0.5) is None
+    assert bucket.reserve(max_wait=1.0) == pytest.approx(1.0)
+
+def test_refund_returns_tokens(clock):
+    bucket = TokenBucket(rate=1.0, capacity=1, clock=clock)
+    bucket.reserve()
+    bucket.refund()
+    assert bucket.reserve() == 0.0
+
+def test_per_minute_defaults_to_one_token_burst(clock):
+    bucket = TokenBucket.per_minute(30, clock=clock)
+    assert bucket.rate == pytest.approx(0.5)
+    assert bucket.capacity == 1.0
+
+def test_acquire_blocks_for_the_delay(clock):
+    bucket = TokenBucket(rate=4.0, capacity=1, clock=clock)
+    assert bucket.acquire()
+    assert bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.25)]
+    assert not bucket.acquire(max_wait=0.1)
+
+def test_async_acquire_awaits_the_delay(clock):
+    bucket = TokenBucket(rate=4.0, capacity=1, clock=clock)
+    
+    async def run():
+        return [await bucket.aacquire() for _ in range(3)]
+    assert asyncio.run(run()) == [True, True, True]
+    assert clock.sleeps == [pytest.approx(0.25), pytest.approx(0.25)]
+
+def test_concurrency_limit_hands_slots_to_waiters_in_order():
+    limit = ConcurrencyLimit(1)
+    assert limit.acquire()
+    assert not limit.acquire(timeout=0)
+    
+    order = []
+    
+    def wait(name):
+        assert limit.acquire(timeout=5)
+        order.append(name)
+        limit.release()
+    threads = []
+    for name in ("first", "second"):
+        thread = threading.Thread(target=wait, args=(name,))
+        thread.start()
+        threads.append(thread)
+        while len(limit._waiters) < len(threads):
+            time.sleep(0.001)
+    limit.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["first", "second"]
+    assert limit.active == 0
+
+def test_async_waiter_is_woken_by_a_thread():
+    limit = ConcurrencyLimit(1)
+    limit.acquire()
+    
+    async def run():
+        threading.Timer(0.01, limit.release).start()
+        return await limit.aacquire(timeout=5)
+    assert asyncio.run(run())
+    assert limit.active == 1
+
+def test_limiter_waits_by_default(clock):
+    limiter = RateLimiter(requests_per_minute=60, max_wait=None, clock=clock)
+    for _ in range(3):
+        with limiter.limit("search"):
+            pass
+    stats = limiter.stats()["search"]
+    assert stats["calls"] == 3
+    assert stats["queued"] == 2
+    assert stats["wait_max_s"] == pytest.approx(1.0)
+    assert stats["rejected"] == 0
+
+def test_limiter_rejects_past_max_wait_and_refunds_tokens(clock):
+    limiter = RateLimiter(requests_per_minute=600, burst=5, max_wait=0.5, clock=clock)
+    limiter.set_tool_limit("search", requests_per_minute=60)
+    with limiter.limit("search"):
+        pass
+    with pytest.raises(RateLimitExceeded):
+        with limiter.limit("search"):
+            pass
+    assert limiter.stats()["search"]["rejected"] == 1
+    # The global token taken before the tool bucket refused was given back
+    assert limiter._bucket._tokens == pytest.approx(4.0)
+
+def test_limiter_rejects_when_no_slot_frees_up(clock):
+    limiter = RateLimiter(max_concurrent=1, max_wait=0, clock=clock)
+    with limiter.limit("search"):
+        with pytest.raises(RateLimitExceeded, match="No free slot"):
+            with limiter.limit("search"):
+                pass
+    with limiter.limit("search"):
+        pass
+
+def test_async_limiter(clock):
+    limiter = RateLimiter(requests_per_minute=60, max_wait=None, clock=clock)
+    
+    async def run():
+        for _ in range(2):
+            async with limiter.alimit("search"):
+                pass
+    asyncio.run(run())
+    assert limiter.stats()["search"]["calls"] == 2
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+class SlowTool(BaseTool):
+    """Tracks how many of its calls run at once"""
+    
+    max_concurrent = 2
+    
+    def __init__(self):
+        super().__init__("slow", "Sleep briefly")
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+    
+    def execute(self) -> Dict[str, Any]:
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.02)
+        with self._lock:
+            self.active -= 1
+        return {"success": True}
+    
+    def get_parameters(self) -> Dict[str, Any]:
+        return {"type": "object", "properties": {}}
+
+def test_execute_tools_respects_the_tool_concurrency_cap():
+    registry = ToolRegistry(use_cache=False, max_workers=8)
+    tool = SlowTool()
+    registry.register(tool)
+    try:
+        results = registry.execute_tools([("slow", {})] * 8)
+        assert all(result["success"] for result in results)
+        assert tool.peak <= 2
+        assert registry.rate_limit_stats()["slow"]["calls"] == 8
+    finally:
+        registry.close()
+
+def test_rejected_call_becomes_an_error_result():
+    registry = ToolRegistry(use_cache=False, rate_limiter=RateLimiter(max_wait=0))
+    registry.rate_limiter.set_tool_limit("calculator", requests_per_minute=1)
+    try:
+        assert registry.execute_tool("calculator", expression="1+1")["success"] is True
+        result = registry.execute_tool("calculator", expression="2+2")
+        assert result["success"] is False
+        assert "Rate limit for tool 'calculator'" in result["error"]
+    finally:
+        registry.close()
\ No newline at end of file
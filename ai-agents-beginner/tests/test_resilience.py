@@ -0,0 +1,192 @@
+"""
+Circuit breaker, retry budget and retry loop, driven by an injected clock
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from shared.resilience import CircuitBreaker, CircuitOpenError, Resilience, RetryBudget, RetryPolicy
+
+class FakeClock:
+    """Monotonic clock the test moves by hand"""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+class Flaky:
+    """Raises for the first ``failures`` calls, then returns 'ok'"""
+    
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+    
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("down")
+        return "ok"
+
+def _resilience(clock, **kwargs):
+    return Resilience(RetryPolicy(max_attempts=3, base_delay=0.0), clock=clock, **kwargs)
+
+def test_breaker_opens_after_consecutive_failures():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # Resets the streak
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() == 10
+
+def test_half_open_probe_success_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # One probe at a time
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.transitions == {"open": 1, "half_open": 1, "closed": 1}
+
+def test_half_open_probe_failure_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.retry_after() == 10
+
+def test_released_probe_slot_can_be_reused():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, half_open_max_calls=1, clock=clock)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+def test_retry_budget_caps_retries_at_a_share_of_calls():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, window=10, clock=clock)
+    for _ in range(4):
+        budget.record_call()
+    assert [budget.try_retry() for _ in range(3)] == [True, True, False]
+
+def test_retry_budget_window_slides():
+    clock = FakeClock()
+    budget = RetryBudget(ratio=0.5, min_per_second=0.0, window=10, clock=clock)
+    budget.record_call()
+    budget.record_call()
+    assert budget.try_retry()
+    assert not budget.try_retry()
+    clock.now += 10
+    assert not budget.try_retry()  # The calls that earned the budget have left the window
+    budget.record_call()
+    budget.record_call()
+    assert budget.try_retry()
+
+def test_backoff_is_jittered_within_the_cap():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, rng=random.Random(0))
+    for retry in range(6):
+        delays = [policy.backoff(retry) for _ in range(50)]
+        assert all(0.0 <= d <= min(5.0, 2.0 ** retry) for d in delays)
+        assert len(set(delays)) > 1
+
+def test_call_retries_until_success():
+    resilience = _resilience(FakeClock())
+    fn = Flaky(failures=2)
+    assert resilience.call("api", fn) == "ok"
+    stats = resilience.stats()["api"]
+    assert (stats["calls"], stats["retries"], stats["failures"], stats["successes"]) == (1, 2, 2, 1)
+
+def test_call_raises_the_last_error_when_attempts_run_out():
+    resilience = _resilience(FakeClock())
+    fn = Flaky(failures=5)
+    with pytest.raises(ConnectionError):
+        resilience.call("api", fn)
+    assert fn.calls == 3
+
+def test_error_results_are_retried_and_returned():
+    resilience = _resilience(FakeClock())
+    results = iter([{"error": "busy", "success": False}] * 3)
+    assert resilience.call("api", lambda: next(results)) == {"error": "busy", "success": False}
+    assert resilience.stats()["api"]["retries"] == 2
+
+def test_retry_false_makes_one_attempt():
+    resilience = _resilience(FakeClock())
+    fn = Flaky(failures=1)
+    with pytest.raises(ConnectionError):
+        resilience.call("api", fn, retry=False)
+    assert fn.calls == 1
+
+def test_open_circuit_short_circuits_until_reset():
+    clock = FakeClock()
+    resilience = _resilience(clock, failure_threshold=3, reset_timeout=30)
+    fn = Flaky(failures=3)
+    with pytest.raises(ConnectionError):
+        resilience.call("api", fn)
+    with pytest.raises(CircuitOpenError):
+        resilience.call("api", fn)
+    assert fn.calls == 3
+    assert resilience.stats()["api"]["short_circuited"] == 1
+    
+    clock.now += 30
+    assert resilience.call("api", fn) == "ok"  # Half-open probe succeeds
+    assert resilience.stats()["api"]["state"] == CircuitBreaker.CLOSED
+
+def test_ignored_exceptions_do_not_count():
+    resilience = _resilience(FakeClock(), failure_threshold=1)
+    
+    def refuse():
+        raise KeyError("local refusal")
+    with pytest.raises(KeyError):
+        resilience.call("api", refuse, ignore=(KeyError,))
+    assert resilience.stats()["api"]["failures"] == 0
+    assert resilience.breaker("api").state == CircuitBreaker.CLOSED
+
+def test_exhausted_budget_stops_retries():
+    resilience = Resilience(
+        RetryPolicy(max_attempts=5, base_delay=0.0), budget_ratio=0.0, budget_min_per_second=0.1,
+        budget_window=10, clock=FakeClock()
+    )
+    fn = Flaky(failures=10)
+    with pytest.raises(ConnectionError):
+        resilience.call("api", fn)
+    assert fn.calls == 2  # One retry allowed by min_per_second * window
+    assert resilience.stats()["api"]["budget_exhausted"] == 1
+
+def test_dependencies_have_separate_breakers():
+    resilience = _resilience(FakeClock(), failure_threshold=1)
+    with pytest.raises(ConnectionError):
+        resilience.call("search", Flaky(failures=1), retry=False)
+    assert resilience.call("weather", lambda: "sunny") == "sunny"
+
+def test_async_call_and_wrap():
+    resilience = _resilience(FakeClock())
+    fn = Flaky(failures=1)
+    
+    async def fetch():
+        return fn()
+    assert asyncio.run(resilience.acall("api", fetch)) == "ok"
+    
+    wrapped = resilience.wrap("api")(Flaky(failures=2))
+    assert wrapped() == "ok"
+    
+    @resilience.wrap("other")
+    async def afetch(value):
+        return value
+    assert asyncio.run(afetch(3)) == 3
\ No newline at end of file
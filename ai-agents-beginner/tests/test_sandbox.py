@@ -0,0 +1,48 @@
+"""
+Tool sandbox limits: memory is only enforced where it can be measured
+"""
+
+import os
+import time
+from typing import Any, Dict
+
+import pytest
+
+import shared.sandbox
+from shared.sandbox import ToolSandbox
+from shared.tools import BaseTool
+
+HAS_PROC = os.path.exists(f"/proc/{os.getpid()}/statm")
+
+class HogTool(BaseTool):
+    """Allocates ``mb`` megabytes and holds them"""
+    
+    def __init__(self):
+        super().__init__("hog", "Allocate memory")
+    
+    def execute(self, mb: int = 1) -> Dict[str, Any]:
+        block = bytearray(mb * 2**20)
+        time.sleep(2)
+        return {"size": len(block), "success": True}
+    
+    def get_parameters(self) -> Dict[str, Any]:
+        return {"type": "object", "properties": {"mb": {"type": "integer"}}}
+
+def test_memory_limit_without_proc_is_refused(monkeypatch):
+    real_exists = os.path.exists
+    monkeypatch.setattr(
+        shared.sandbox.os.path, "exists", lambda path: False if path.startswith("/proc/") else real_exists(path)
+    )
+    with pytest.raises(ValueError, match="memory_mb"):
+        ToolSandbox(n_workers=1, memory_mb=256)
+
+@pytest.mark.skipif(not HAS_PROC, reason="memory limits need /proc")
+def test_memory_hog_is_killed():
+    sandbox = ToolSandbox(n_workers=1, memory_mb=64, timeout=10)
+    try:
+        result = sandbox.execute(HogTool(), {"mb": 256})
+        assert result["success"] is False
+        assert "exceeded 64 MB of memory" in result["error"]
+        assert sandbox.stats()["killed_memory"] == 1
+    finally:
+        sandbox.close()
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""
+Tiered memory: write-through, demotion on eviction, promotion and merged search
+"""
+
+import os
+
+from shared.dedup import SimHashIndex
+from shared.embeddings import CallableEmbedder
+from shared.memory import TieredMemory, VectorMemory
+
+def _tiered(tmp_path, **kwargs):
+    return TieredMemory(persist_path=os.path.join(tmp_path, "memory.json"), **kwargs)
+
+def test_write_through_stores_adds_in_both_tiers(tmp_path):
+    memory = _tiered(str(tmp_path), hot_size=2)
+    try:
+        for i in range(5):
+            memory.add(f"k{i}", f"value {i}")
+        assert memory.cold.get("k0") == "value 0"
+        assert memory.stats()["demotions"] == 0
+        assert memory.get("k0") == "value 0"
+        assert memory.stats()["promotions"] == 1
+    finally:
+        memory.close()
+
+def test_eviction_demotes_without_write_through(tmp_path):
+    memory = _tiered(str(tmp_path), hot_size=2, write_through=False)
+    try:
+        memory.add("k0", "value 0", {"source": "chat"})
+        assert memory.cold.get("k0") is None
+        memory.add("k1", "value 1")
+        memory.add("k2", "value 2")
+        assert memory.stats()["demotions"] == 1
+        assert memory.cold.get("k0") == "value 0"
+        assert memory.cold.metadata["k0"]["source"] == "chat"
+        assert memory.get("k0") == "value 0"
+    finally:
+        memory.close()
+
+def test_close_saves_unsaved_hot_entries(tmp_path):
+    memory = _tiered(str(tmp_path), write_through=False)
+    memory.add("pref", "User likes green tea")
+    memory.close()
+    
+    reopened = VectorMemory(persist_path=os.path.join(str(tmp_path), "memory.json"))
+    try:
+        assert reopened.get("pref") == "User likes green tea"
+    finally:
+        reopened.close()
+
+def test_overwritten_hot_entry_hides_stale_cold_copy(tmp_path):
+    memory = _tiered(str(tmp_path), write_through=False)
+    try:
+        memory.cold.add("pref", "User likes green tea")
+        memory.add("pref", "User likes black coffee")
+        assert memory.search("User likes", limit=5) == [("pref", "User likes black coffee")]
+    finally:
+        memory.close()
+
+def test_adds_go_through_cold_dedup(tmp_path):
+    cold = VectorMemory(
+        persist_path=os.path.join(str(tmp_path), "memory.json"), dedup=SimHashIndex(threshold=0.9)
+    )
+    memory = TieredMemory(cold=cold)
+    try:
+        memory.add("a", "User likes green tea")
+        memory.add("b", "User likes green tea")
+        assert cold.dedup_stats()["checked"] == 2
+        assert len(cold.data) == 1
+        assert memory.get("b") == "User likes green tea"
+    finally:
+        memory.close()
+
+def test_search_drops_entries_unrelated_to_the_query(tmp_path):
+    # Two orthogonal directions: texts about tea, and everything else
+    embedder = CallableEmbedder(lambda texts: [[1.0, 0.0] if "tea" in t else [0.0, 1.0] for t in texts], dim=2)
+    cold = VectorMemory(persist_path=os.path.join(str(tmp_path), "memory.json"), embedder=embedder)
+    memory = TieredMemory(cold=cold)
+    try:
+        memory.add("pref", "User likes green tea")
+        memory.add("plan", "Time to leave for the airport")
+        # The keyword hot tier matches "time" in the plan, which has no similarity to the query
+        assert memory.search("tea time") == [("pref", "User likes green tea")]
+    finally:
+        memory.close()
\ No newline at end of file
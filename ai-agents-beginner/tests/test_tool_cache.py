@@ -0,0 +1,47 @@
+"""
+Tool result cache keys: per-tool argument normalization decides what counts as the same call
+"""
+
+from typing import Any, Dict
+
+from shared.tools import BaseTool, ToolRegistry
+
+class EchoTool(BaseTool):
+    """Cacheable tool that counts its executions"""
+    
+    cacheable = True
+    
+    def __init__(self):
+        super().__init__("echo", "Echo the text back")
+        self.calls = 0
+    
+    def execute(self, text: str) -> Dict[str, Any]:
+        self.calls += 1
+        return {"text": text, "success": True}
+    
+    def get_parameters(self) -> Dict[str, Any]:
+        return {"type": "object", "properties": {"text": {"type": "string"}}, "required": ["text"]}
+
+def test_calculator_keys_on_the_expression_as_written():
+    registry = ToolRegistry()
+    try:
+        first = registry.execute_tool("calculator", expression=" 2+2 ")
+        second = registry.execute_tool("calculator", expression="2+2")
+        assert first["expression"] == " 2+2 "
+        assert second["expression"] == "2+2"
+        assert registry.cache_stats()["hits"] == 0
+    finally:
+        registry.close()
+
+def test_default_normalization_trims_strings():
+    registry = ToolRegistry()
+    tool = EchoTool()
+    registry.register(tool)
+    try:
+        registry.execute_tool("echo", text="green tea")
+        assert registry.execute_tool("echo", text="  green tea ")["text"] == "green tea"
+        assert tool.calls == 1
+        registry.execute_tool("echo", text="green  tea")
+        assert tool.calls == 2
+    finally:
+        registry.close()
@@ -0,0 +1,31 @@
+"""
+Cached tool schemas: callers get copies, so the cache always matches its JSON and version
+"""
+
+import json
+
+from shared.tools import ToolRegistry
+
+def test_mutating_returned_schemas_does_not_touch_the_cache():
+    registry = ToolRegistry(use_cache=False)
+    try:
+        version = registry.schemas_version
+        schemas = registry.get_all_schemas()
+        schemas[0]["function"]["strict"] = True
+        schemas.append({"type": "function", "function": {"name": "extra"}})
+        
+        assert registry.get_all_schemas() == json.loads(registry.get_schemas_json())
+        assert registry.schemas_version == version
+    finally:
+        registry.close()
+
+def test_invalidate_after_removing_a_tool_changes_the_version():
+    registry = ToolRegistry(use_cache=False)
+    try:
+        version = registry.schemas_version
+        registry.tools.pop("get_time")
+        registry.invalidate_schemas()
+        assert registry.schemas_version != version
+        assert [s["function"]["name"] for s in json.loads(registry.get_schemas_json())] == ["calculator"]
+    finally:
+        registry.close()
\ No newline at end of file
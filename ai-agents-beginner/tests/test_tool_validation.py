@@ -0,0 +1,133 @@
+"""
+Compiled argument validators and how ToolRegistry applies them before running a tool
+"""
+
+import asyncio
+from typing import Any, Dict
+
+import pytest
+
+import shared.tools
+from shared.tools import BaseTool, ToolRegistry
+from shared.validation import ValidationError, compile_schema
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "city": {"type": "string", "minLength": 2},
+        "days": {"type": "integer", "minimum": 1, "maximum": 14, "default": 3},
+        "units": {"type": "string", "enum": ["metric", "imperial"]},
+        "alerts": {"type": "boolean"},
+        "tags": {"type": "array", "items": {"type": "string"}},
+        "id": {"type": ["string", "integer"]}
+    },
+    "required": ["city"],
+    "additionalProperties": False
+}
+
+class ForecastTool(BaseTool):
+    """Records the arguments it receives"""
+    
+    def __init__(self, schema: Dict[str, Any] = SCHEMA):
+        super().__init__("forecast", "Weather forecast")
+        self.schema = schema
+        self.received = []
+    
+    def execute(self, **kwargs) -> Dict[str, Any]:
+        self.received.append(kwargs)
+        return {"kwargs": kwargs, "success": True}
+    
+    def get_parameters(self) -> Dict[str, Any]:
+        return self.schema
+
+def test_valid_arguments_get_defaults():
+    validate = compile_schema(SCHEMA)
+    assert validate({"city": "Lyon"}) == {"city": "Lyon", "days": 3}
+
+def test_coercion_converts_obvious_slips():
+    validate = compile_schema(SCHEMA)
+    result = validate({"city": "Lyon", "days": "5", "alerts": "yes", "tags": ("a", 1)})
+    assert result == {"city": "Lyon", "days": 5, "alerts": True, "tags": ["a", "1"]}
+
+def test_union_prefers_exact_type():
+    validate = compile_schema(SCHEMA)
+    assert validate({"city": "Lyon", "id": "5"})["id"] == "5"
+    assert validate({"city": "Lyon", "id": 5})["id"] == 5
+
+@pytest.mark.parametrize("kwargs, message", [
+    ({}, "Missing required field: city"),
+    ({"city": "Lyon", "days": "five"}, "'days' must be an integer"),
+    ({"city": "Lyon", "days": 30}, "'days' must be <= 14"),
+    ({"city": "L"}, "'city' must have at least 2 characters"),
+    ({"city": "Lyon", "units": "kelvin"}, "'units' must be one of"),
+    ({"city": "Lyon", "alerts": "maybe"}, "'alerts' must be a boolean"),
+    ({"city": "Lyon", "country": "FR"}, "Unexpected field: country")
+])
+def test_invalid_arguments_are_rejected(kwargs, message):
+    with pytest.raises(ValidationError, match=message):
+        compile_schema(SCHEMA)(kwargs)
+
+def test_without_coercion_strings_are_rejected():
+    with pytest.raises(ValidationError):
+        compile_schema(SCHEMA, coerce=False)({"city": "Lyon", "days": "5"})
+
+def test_registry_rejects_bad_calls_before_running_the_tool():
+    registry = ToolRegistry(use_cache=False)
+    tool = ForecastTool()
+    registry.register(tool)
+    try:
+        result = registry.execute_tool("forecast", days=2)
+        assert result["success"] is False
+        assert "Invalid arguments for tool 'forecast'" in result["error"]
+        assert tool.received == []
+        
+        assert registry.execute_tool("forecast", city="Lyon", days="2")["kwargs"] == {"city": "Lyon", "days": 2}
+    finally:
+        registry.close()
+
+def test_async_calls_are_validated_too():
+    registry = ToolRegistry(use_cache=False)
+    registry.register(ForecastTool())
+    try:
+        assert asyncio.run(registry.aexecute_tool("forecast"))["success"] is False
+        assert asyncio.run(registry.aexecute_tool("forecast", city="Lyon"))["kwargs"]["days"] == 3
+    finally:
+        registry.close()
+
+def test_tool_added_to_the_tools_dict_is_validated_on_first_use():
+    registry = ToolRegistry(use_cache=False)
+    registry.tools["forecast"] = ForecastTool()
+    try:
+        assert registry.execute_tool("forecast", city="Lyon")["success"] is True
+        assert registry.execute_tool("forecast")["success"] is False
+    finally:
+        registry.close()
+
+def test_register_compiles_only_the_new_tool(monkeypatch):
+    registry = ToolRegistry(use_cache=False)
+    compiled = []
+    real = shared.tools.compile_schema
+    
+    def counting(schema, coerce):
+        compiled.append(schema)
+        return real(schema, coerce)
+    monkeypatch.setattr(shared.tools, "compile_schema", counting)
+    for i in range(5):
+        tool = ForecastTool()
+        tool.name = f"forecast{i}"
+        registry.register(tool)
+    assert len(compiled) == 5
+    registry.close()
+
+def test_invalidate_schemas_picks_up_changed_parameters():
+    registry = ToolRegistry(use_cache=False)
+    tool = ForecastTool()
+    registry.register(tool)
+    try:
+        version = registry.schemas_version
+        tool.schema = {"type": "object", "properties": {"city": {"type": "string"}}}
+        registry.invalidate_schemas()
+        assert registry.schemas_version != version
+        assert registry.execute_tool("forecast")["success"] is True
+    finally:
+        registry.close()
\ No newline at end of file